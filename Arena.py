@@ -1,16 +1,29 @@
 import logging
+import math
+import multiprocessing
 
 from tqdm import tqdm
 
 log = logging.getLogger(__name__)
 
+arenaWorker = None  # the Arena of a worker process, see Arena.playGamesParallel
+
+
+def initArenaWorker(player1, player2, game, display):
+    global arenaWorker
+    arenaWorker = Arena(player1(game), player2(game), game, display)
+
+
+def playArenaGame(swapped):
+    return arenaWorker.playOrderedGame(swapped)
+
 
 class Arena():
     """
     An Arena class where any 2 agents can be pit against each other.
     """
 
-    def __init__(self, player1, player2, game, display=None):
+    def __init__(self, player1, player2, game, display=None, numWorkers=1):
         """
         Input:
             player 1,2: two functions that takes board as input, return action
@@ -18,6 +31,11 @@ class Arena():
             display: a function that takes board as input and prints it (e.g.
                      display in othello/OthelloGame). Is necessary for verbose
                      mode.
+            numWorkers: number of processes playGames uses. If it is more
+                        than 1, player 1,2 must instead be player factories:
+                        picklable functions that take the game as input and
+                        return a player function (see MCTSPlayerFactory in
+                        Coach.py). Every worker creates its players once.
 
         see othello/OthelloPlayers.py for an example. See pit.py for pitting
         human players/other baselines with each other.
@@ -26,6 +44,7 @@ class Arena():
         self.player2 = player2
         self.game = game
         self.display = display
+        self.numWorkers = numWorkers
 
     def playGame(self, verbose=False):
         """
@@ -62,6 +81,21 @@ class Arena():
             self.display(board)
         return curPlayer * self.game.getGameEnded(board, curPlayer)
 
+    def playOrderedGame(self, swapped, verbose=False):
+        """
+        Executes one episode of a game in which player2 moves first if swapped.
+
+        Returns:
+            the result of playGame from the point of view of player1.
+        """
+        if not swapped:
+            return self.playGame(verbose=verbose)
+        self.player1, self.player2 = self.player2, self.player1
+        try:
+            return -self.playGame(verbose=verbose)
+        finally:
+            self.player1, self.player2 = self.player2, self.player1
+
     def playGames(self, num, verbose=False):
         """
         Plays num games in which player1 starts num/2 games and player2 starts
@@ -74,6 +108,9 @@ class Arena():
         """
 
         num = int(num / 2)
+        if self.numWorkers > 1:
+            return self.playGamesParallel(num)
+
         oneWon = 0
         twoWon = 0
         draws = 0
@@ -98,3 +135,107 @@ class Arena():
                 draws += 1
 
         return oneWon, twoWon, draws
+
+    def playGamesParallel(self, num):
+        """
+        Plays num games in which player1 starts and num games in which player2
+        starts on a pool of numWorkers processes. player1 and player2 are
+        player factories (see __init__).
+
+        Returns:
+            oneWon: games won by player1
+            twoWon: games won by player2
+            draws:  games won by nobody
+        """
+        oneWon = 0
+        twoWon = 0
+        draws = 0
+        games = [False] * num + [True] * num  # whether player2 starts
+        for gameResult in tqdm(self.gameResults(games), total=len(games), desc="Arena.playGames"):
+            if gameResult == 1:
+                oneWon += 1
+            elif gameResult == -1:
+                twoWon += 1
+            else:
+                draws += 1
+
+        return oneWon, twoWon, draws
+
+    def playGamesGated(self, num, threshold, sprt=None, verbose=False):
+        """
+        Plays up to num games between player1, the incumbent, and player2, the
+        challenger, to decide whether player2 wins at least a threshold
+        fraction of the decisive games. The players alternate moving first, and
+        play stops as soon as the decision is settled:
+            - it can no longer change, whatever the remaining games' results
+            - or, if sprt is given, a sequential probability ratio test
+              decides it. sprt = (delta, alpha, beta) tests the hypotheses
+              that player2 wins a decisive game with probability
+              threshold - delta against threshold + delta, with error rates
+              alpha and beta. It only stops when the win fraction so far
+              agrees with its decision.
+        With numWorkers > 1 the games run in parallel, but their results are
+        counted in the order the games were scheduled, so that the counted
+        games always alternate who moves first. Games played ahead of the
+        last counted one are discarded when play stops.
+
+        Returns:
+            oneWon: games won by player1
+            twoWon: games won by player2
+            draws:  games won by nobody
+            played: number of games played
+        """
+        num = int(num / 2) * 2
+        if sprt is not None:
+            delta, alpha, beta = sprt
+            p0, p1 = max(threshold - delta, 1e-6), min(threshold + delta, 1 - 1e-6)
+            winLLR, lossLLR = math.log(p1 / p0), math.log((1 - p1) / (1 - p0))
+            upper, lower = math.log((1 - beta) / alpha), math.log(beta / (1 - alpha))
+
+        oneWon = 0
+        twoWon = 0
+        draws = 0
+        games = [i % 2 == 1 for i in range(num)]  # whether player2 starts
+        results = self.gameResults(games, verbose=verbose)
+        for gameResult in tqdm(results, total=num, desc="Arena.playGamesGated"):
+            if gameResult == 1:
+                oneWon += 1
+            elif gameResult == -1:
+                twoWon += 1
+            else:
+                draws += 1
+
+            remaining = num - oneWon - twoWon - draws
+            decisive = oneWon + twoWon
+            accepted = decisive > 0 and twoWon / decisive >= threshold
+            if twoWon > 0 and twoWon / (decisive + remaining) >= threshold:
+                break  # accepted even if player1 wins all remaining games
+            if twoWon + remaining == 0 or (twoWon + remaining) / (decisive + remaining) < threshold:
+                break  # rejected even if player2 wins all remaining games
+            if sprt is not None:
+                llr = twoWon * winLLR + oneWon * lossLLR
+                if (llr >= upper and accepted) or (llr <= lower and not accepted):
+                    break
+        results.close()
+
+        return oneWon, twoWon, draws, oneWon + twoWon + draws
+
+    def gameResults(self, games, verbose=False):
+        """
+        Plays one game per entry of games, which says whether player2 starts,
+        on numWorkers processes if it is more than 1. Closing the generator
+        stops the workers.
+
+        Returns:
+            a generator of game results from the point of view of player1, in
+            the order of games, even if later games finish first.
+        """
+        if self.numWorkers <= 1:
+            for swapped in games:
+                yield self.playOrderedGame(swapped, verbose=verbose)
+            return
+
+        ctx = multiprocessing.get_context('spawn')
+        with ctx.Pool(min(self.numWorkers, len(games)), initializer=initArenaWorker,
+                      initargs=(self.player1, self.player2, self.game, self.display)) as pool:
+            yield from pool.imap(playArenaGame, games)
@@ -0,0 +1,83 @@
+from collections import OrderedDict
+
+import numpy as np
+
+from NeuralNet import NeuralNet
+
+
+class CachedNNet(NeuralNet):
+    """
+    Wraps a NeuralNet and remembers the outputs of predict for the last
+    maxSize boards it evaluated, keyed by game.stringRepresentation. Positions
+    that recur across searches, such as the openings of self-play games, are
+    then evaluated only once per network. The cache is cleared whenever the
+    weights change through train or load_checkpoint.
+
+    hits and misses count the lookups since the wrapper was created.
+    """
+
+    def __init__(self, nnet, game, maxSize):
+        self.nnet = nnet
+        self.game = game
+        self.maxSize = maxSize
+        self.cache = OrderedDict()  # stores (pi, v) for board s, least recently used first
+        self.hits = 0
+        self.misses = 0
+
+    def hitRate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.
+
+    def clear(self):
+        self.cache.clear()
+
+    def lookup(self, s):
+        result = self.cache.get(s)
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.cache.move_to_end(s)
+        return result
+
+    def store(self, s, pi, v):
+        # networks return v as a float or an array of one element, and pi may be
+        # a row of a batch array the network reuses, so it is copied
+        result = self.cache[s] = (np.array(pi), float(np.squeeze(v)))
+        if len(self.cache) > self.maxSize:
+            self.cache.popitem(last=False)
+        return result
+
+    def train(self, examples):
+        self.clear()
+        return self.nnet.train(examples)
+
+    def predict(self, board):
+        s = self.game.stringRepresentation(board)
+        result = self.lookup(s)
+        if result is None:
+            result = self.store(s, *self.nnet.predict(board))
+        return result
+
+    def predict_batch(self, boards):
+        """
+        Looks up every board and evaluates the ones that are not cached with a
+        single call to predict_batch of the wrapped network.
+        """
+        keys = [self.game.stringRepresentation(board) for board in boards]
+        results = [self.lookup(s) for s in keys]
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            pis, vs = self.nnet.predict_batch([boards[i] for i in missing])
+            for i, pi, v in zip(missing, pis, vs):
+                results[i] = self.store(keys[i], pi, v)
+
+        pis, vs = zip(*results)
+        return np.array(pis), np.array(vs)
+
+    def save_checkpoint(self, folder, filename):
+        return self.nnet.save_checkpoint(folder, filename)
+
+    def load_checkpoint(self, folder, filename):
+        self.clear()
+        return self.nnet.load_checkpoint(folder, filename)
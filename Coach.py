@@ -1,4 +1,5 @@
 import logging
+import multiprocessing
 import os
 import sys
 from collections import deque
@@ -9,10 +10,80 @@ import numpy as np
 from tqdm import tqdm
 
 from Arena import Arena
+from CachedNNet import CachedNNet
 from MCTS import MCTS
+from utils import dotdict
+from Zobrist import plainBoard
 
 log = logging.getLogger(__name__)
 
+# the game, network and args of a self-play worker process, see executeEpisodesParallel
+workerGame = None
+workerNNet = None
+workerArgs = None
+
+
+def initSelfPlayWorker(game, nnetClass, args, checkpoint):
+    global workerGame, workerNNet, workerArgs
+    workerGame, workerArgs = game, args
+    workerNNet = nnetClass(game)
+    workerNNet.load_checkpoint(folder=checkpoint[0], filename=checkpoint[1])
+    nnetCacheSize = getattr(args, 'nnetCacheSize', 0)
+    if nnetCacheSize:
+        workerNNet = CachedNNet(workerNNet, game, nnetCacheSize)
+
+
+def executeSeededEpisode(seed):
+    np.random.seed(seed)
+    return playEpisode(workerGame, MCTS(workerGame, workerNNet, workerArgs), workerArgs)
+
+
+def playEpisode(game, mcts, args):
+    """
+    Plays one episode of self-play with mcts, see Coach.executeEpisode.
+    """
+    trainExamples = []
+    board = game.getInitBoard()
+    curPlayer = 1
+    episodeStep = 0
+
+    while True:
+        episodeStep += 1
+        canonicalBoard = game.getCanonicalForm(board, curPlayer)
+        temp = int(episodeStep < args.tempThreshold)
+
+        pi = mcts.getActionProb(canonicalBoard, temp=temp)
+        sym = game.getSymmetries(canonicalBoard, pi)
+        for b, p in sym:
+            trainExamples.append([plainBoard(b), curPlayer, p, None])
+
+        action = np.random.choice(len(pi), p=pi)
+        board, curPlayer = game.getNextState(board, curPlayer, action)
+
+        r = game.getGameEnded(board, curPlayer)
+
+        if r != 0:
+            return [(x[0], x[2], r * ((-1) ** (x[1] != curPlayer))) for x in trainExamples]
+
+
+class MCTSPlayerFactory():
+    """
+    A picklable player factory for Arena with numWorkers > 1. Called with the
+    game, it loads the network from checkpoint and returns a player that
+    plays the most visited action of an MCTS with args.
+    """
+
+    def __init__(self, nnetClass, checkpoint, args):
+        self.nnetClass = nnetClass
+        self.checkpoint = checkpoint
+        self.args = args
+
+    def __call__(self, game):
+        nnet = self.nnetClass(game)
+        nnet.load_checkpoint(folder=self.checkpoint[0], filename=self.checkpoint[1])
+        mcts = MCTS(game, nnet, self.args)
+        return lambda x: np.argmax(mcts.getActionProb(x, temp=0))
+
 
 class Coach():
     """
@@ -22,10 +93,20 @@ class Coach():
 
     def __init__(self, game, nnet, args):
         self.game = game
+        self.nnetClass = nnet.__class__
         self.nnet = nnet
-        self.pnet = self.nnet.__class__(self.game)  # the competitor network
+        self.pnet = self.nnetClass(self.game)  # the competitor network
         self.args = args
+        self.nnetCacheSize = getattr(self.args, 'nnetCacheSize', 0)
+        if self.nnetCacheSize:
+            self.nnet = CachedNNet(self.nnet, self.game, self.nnetCacheSize)
+            self.pnet = CachedNNet(self.pnet, self.game, self.nnetCacheSize)
         self.mcts = MCTS(self.game, self.nnet, self.args)
+        self.lockstepGames = getattr(self.args, 'lockstepGames', 1)
+        self.selfPlayWorkers = getattr(self.args, 'selfPlayWorkers', 1)
+        self.arenaWorkers = getattr(self.args, 'arenaWorkers', 1)
+        if self.lockstepGames > 1 and getattr(self.args, 'treeBackend', 'dict') != 'array':
+            raise ValueError('lockstepGames > 1 requires treeBackend "array"')
         self.trainExamplesHistory = []  # history of examples from args.numItersForTrainExamplesHistory latest iterations
         self.skipFirstSelfPlay = False  # can be overriden in loadTrainExamples()
 
@@ -45,28 +126,115 @@ class Coach():
                            pi is the MCTS informed policy vector, v is +1 if
                            the player eventually won the game, else -1.
         """
+        return playEpisode(self.game, self.mcts, self.args)
+
+    def executeEpisodesLockstep(self, numEpisodes):
+        """
+        This function executes numEpisodes episodes of self-play like
+        executeEpisode, but keeps up to args.lockstepGames of them running at
+        the same time, each with its own MCTS. At every step, each running game
+        selects its next leaves (up to args.mctsBatchSize of them) and the
+        leaves of all games are evaluated with a single nnet.predict_batch call.
+        A game plays its move once it has run numMCTSSims simulations, and a
+        finished game is replaced by a new one until numEpisodes were started.
+        Each move is framed by MCTS.startMove and MCTS.finishMove, so tree
+        reuse and the tree size limits apply as in executeEpisode.
+
+        Returns:
+            trainExamples: a list of examples of the form (canonicalBoard, pi, v)
+                           from all episodes, as returned by executeEpisode.
+        """
         trainExamples = []
-        board = self.game.getInitBoard()
-        self.curPlayer = 1
-        episodeStep = 0
+        batchSize = getattr(self.args, 'mctsBatchSize', 1)
+        games = []
+        started = 0
+        pbar = tqdm(total=numEpisodes, desc="Self Play")
+
+        while games or started < numEpisodes:
+            while len(games) < self.lockstepGames and started < numEpisodes:
+                g = dotdict({
+                    'board': self.game.getInitBoard(),
+                    'curPlayer': 1,
+                    'episodeStep': 1,
+                    'mcts': MCTS(self.game, self.nnet, self.args),
+                    'trainExamples': [],
+                })
+                g.sims = g.mcts.startMove(self.game.getCanonicalForm(g.board, g.curPlayer))
+                games.append(g)
+                started += 1
+
+            # collect the leaves of every game and evaluate them together
+            leaves = []
+            for g in games:
+                canonicalBoard = self.game.getCanonicalForm(g.board, g.curPlayer)
+                gameLeaves, sims = g.mcts.gatherLeaves(canonicalBoard,
+                                                       min(batchSize, self.args.numMCTSSims - g.sims))
+                g.sims += sims
+                leaves.append(gameLeaves)
+            boards = [board for gameLeaves in leaves for _, _, board in gameLeaves]
+            if boards:
+                pis, vs = self.nnet.predict_batch(boards)
+                i = 0
+                for g, gameLeaves in zip(games, leaves):
+                    g.sims += g.mcts.expandLeaves(gameLeaves, pis[i:i + len(gameLeaves)], vs[i:i + len(gameLeaves)])
+                    i += len(gameLeaves)
 
-        while True:
-            episodeStep += 1
-            canonicalBoard = self.game.getCanonicalForm(board, self.curPlayer)
-            temp = int(episodeStep < self.args.tempThreshold)
+            # play a move in every game that finished its simulations
+            running = []
+            for g in games:
+                if g.sims < self.args.numMCTSSims:
+                    running.append(g)
+                    continue
+                canonicalBoard = self.game.getCanonicalForm(g.board, g.curPlayer)
+                temp = int(g.episodeStep < self.args.tempThreshold)
 
-            pi = self.mcts.getActionProb(canonicalBoard, temp=temp)
-            sym = self.game.getSymmetries(canonicalBoard, pi)
-            for b, p in sym:
-                trainExamples.append([b, self.curPlayer, p, None])
+                pi = g.mcts.finishMove(canonicalBoard, temp=temp)
+                sym = self.game.getSymmetries(canonicalBoard, pi)
+                for b, p in sym:
+                    g.trainExamples.append([plainBoard(b), g.curPlayer, p, None])
 
-            action = np.random.choice(len(pi), p=pi)
-            board, self.curPlayer = self.game.getNextState(board, self.curPlayer, action)
+                action = np.random.choice(len(pi), p=pi)
+                g.board, g.curPlayer = self.game.getNextState(g.board, g.curPlayer, action)
+                g.episodeStep += 1
 
-            r = self.game.getGameEnded(board, self.curPlayer)
+                r = self.game.getGameEnded(g.board, g.curPlayer)
 
-            if r != 0:
-                return [(x[0], x[2], r * ((-1) ** (x[1] != self.curPlayer))) for x in trainExamples]
+                if r != 0:
+                    trainExamples += [(x[0], x[2], r * ((-1) ** (x[1] != g.curPlayer))) for x in g.trainExamples]
+                    pbar.update(1)
+                else:
+                    g.sims = g.mcts.startMove(self.game.getCanonicalForm(g.board, g.curPlayer))
+                    running.append(g)
+            games = running
+
+        pbar.close()
+        return trainExamples
+
+    def executeEpisodesParallel(self, numEpisodes, iteration):
+        """
+        This function executes numEpisodes episodes of self-play with
+        executeEpisode on a pool of args.selfPlayWorkers processes. The current
+        network is saved to args.checkpoint once and every worker loads it when
+        it starts. Before each episode the worker seeds NumPy with
+        (args.seed, iteration, episode), so the examples do not depend on how
+        the episodes are distributed over the workers.
+
+        Returns:
+            trainExamples: a list of examples of the form (canonicalBoard, pi, v)
+                           from all episodes, in episode order.
+        """
+        filename = 'selfplay.pth.tar'
+        self.nnet.save_checkpoint(folder=self.args.checkpoint, filename=filename)
+        seed = getattr(self.args, 'seed', 0)
+        seeds = [(seed, iteration, episode) for episode in range(numEpisodes)]
+
+        trainExamples = []
+        ctx = multiprocessing.get_context('spawn')
+        with ctx.Pool(self.selfPlayWorkers, initializer=initSelfPlayWorker,
+                      initargs=(self.game, self.nnetClass, self.args, (self.args.checkpoint, filename))) as pool:
+            for examples in tqdm(pool.imap(executeSeededEpisode, seeds), total=numEpisodes, desc="Self Play"):
+                trainExamples += examples
+        return trainExamples
 
     def learn(self):
         """
@@ -84,9 +252,17 @@ class Coach():
             if not self.skipFirstSelfPlay or i > 1:
                 iterationTrainExamples = deque([], maxlen=self.args.maxlenOfQueue)
 
-                for _ in tqdm(range(self.args.numEps), desc="Self Play"):
-                    self.mcts = MCTS(self.game, self.nnet, self.args)  # reset search tree
-                    iterationTrainExamples += self.executeEpisode()
+                if self.selfPlayWorkers > 1:
+                    iterationTrainExamples += self.executeEpisodesParallel(self.args.numEps, i)
+                elif self.lockstepGames > 1:
+                    iterationTrainExamples += self.executeEpisodesLockstep(self.args.numEps)
+                else:
+                    for _ in tqdm(range(self.args.numEps), desc="Self Play"):
+                        self.mcts = MCTS(self.game, self.nnet, self.args)  # reset search tree
+                        iterationTrainExamples += self.executeEpisode()
+
+                if self.nnetCacheSize:
+                    log.info(f'Network cache hit rate: {self.nnet.hitRate():.1%}')
 
                 # save the iteration examples to the history 
                 self.trainExamplesHistory.append(iterationTrainExamples)
@@ -108,15 +284,30 @@ class Coach():
             # training new network, keeping a copy of the old one
             self.nnet.save_checkpoint(folder=self.args.checkpoint, filename='temp.pth.tar')
             self.pnet.load_checkpoint(folder=self.args.checkpoint, filename='temp.pth.tar')
-            pmcts = MCTS(self.game, self.pnet, self.args)
 
             self.nnet.train(trainExamples)
-            nmcts = MCTS(self.game, self.nnet, self.args)
 
             log.info('PITTING AGAINST PREVIOUS VERSION')
-            arena = Arena(lambda x: np.argmax(pmcts.getActionProb(x, temp=0)),
-                          lambda x: np.argmax(nmcts.getActionProb(x, temp=0)), self.game)
-            pwins, nwins, draws = arena.playGames(self.args.arenaCompare)
+            if self.arenaWorkers > 1:
+                self.nnet.save_checkpoint(folder=self.args.checkpoint, filename='arena.pth.tar')
+                arena = Arena(MCTSPlayerFactory(self.nnetClass, (self.args.checkpoint, 'temp.pth.tar'), self.args),
+                              MCTSPlayerFactory(self.nnetClass, (self.args.checkpoint, 'arena.pth.tar'), self.args),
+                              self.game, numWorkers=self.arenaWorkers)
+            else:
+                pmcts = MCTS(self.game, self.pnet, self.args)
+                nmcts = MCTS(self.game, self.nnet, self.args)
+                arena = Arena(lambda x: np.argmax(pmcts.getActionProb(x, temp=0)),
+                              lambda x: np.argmax(nmcts.getActionProb(x, temp=0)), self.game)
+            arenaEarlyStop = getattr(self.args, 'arenaEarlyStop', None)
+            if arenaEarlyStop:
+                sprt = None
+                if arenaEarlyStop == 'sprt':
+                    sprt = (self.args.sprtDelta, self.args.sprtAlpha, self.args.sprtBeta)
+                pwins, nwins, draws, played = arena.playGamesGated(self.args.arenaCompare,
+                                                                   self.args.updateThreshold, sprt=sprt)
+                log.info(f'Arena decided after {played} of {self.args.arenaCompare} games')
+            else:
+                pwins, nwins, draws = arena.playGames(self.args.arenaCompare)
 
             log.info('NEW/PREV WINS : %d / %d ; DRAWS : %d' % (nwins, pwins, draws))
             if pwins + nwins == 0 or float(nwins) / (pwins + nwins) < self.args.updateThreshold:
@@ -1,3 +1,8 @@
+import hashlib
+
+import numpy as np
+
+
 class Game():
     """
     This class specifies the base Game class. To define your own game, subclass
@@ -59,6 +64,20 @@ class Game():
         """
         pass
 
+    def getValidActions(self, board, player):
+        """
+        Input:
+            board: current board
+            player: current player
+
+        Returns:
+            validActions: the indices of the valid moves in increasing order,
+                          i.e. the nonzero entries of getValidMoves. MCTS uses
+                          this form; games with large action spaces can
+                          override it to skip building the full vector.
+        """
+        return np.flatnonzero(self.getValidMoves(board, player))
+
     def getGameEnded(self, board, player):
         """
         Input:
@@ -111,3 +130,20 @@ class Game():
                          Required by MCTS for hashing.
         """
         pass
+
+    def getHash(self, board):
+        """
+        Input:
+            board: current board
+
+        Returns:
+            key: a 64-bit integer identifying the board, used by MCTS instead of
+                 stringRepresentation when args.hashStates is set. The default
+                 implementation digests stringRepresentation; games can keep
+                 Zobrist keys up to date in getNextState instead (see
+                 Zobrist.py).
+        """
+        s = self.stringRepresentation(board)
+        if isinstance(s, str):
+            s = s.encode()
+        return int.from_bytes(hashlib.blake2b(s, digest_size=8).digest(), 'little')
@@ -0,0 +1,37 @@
+import numpy as np
+import tensorflow as tf
+
+
+class KerasPredictor():
+    """
+    Evaluates a Keras model without going through model.predict, which sets
+    up a data pipeline and callbacks on every call. For the single boards
+    that MCTS evaluates, that setup costs far more than the forward pass of
+    a small network.
+
+    The model is instead called directly inside a tf.function. The function
+    is traced once, on the first call, for float32 inputs with any batch
+    size, and is reused by every later call. It reads the variables of the
+    model, so it stays valid after fit and load_weights.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        inputShape = (None,) + tuple(model.input_shape[1:])
+        self.forward = tf.function(self.call, input_signature=[tf.TensorSpec(inputShape, tf.float32)], autograph=False)
+
+    def call(self, boards):
+        return self.model(boards, training=False)
+
+    def __call__(self, boards):
+        """
+        Input:
+            boards: an array of boards shaped like the input of the model,
+                    including the batch dimension
+
+        Returns:
+            the outputs of the model for all boards as numpy arrays, i.e.
+            (pis, vs) for the networks of this repository
+        """
+        outputs = self.forward(tf.convert_to_tensor(np.asarray(boards), dtype=tf.float32))
+        return tuple(output.numpy() for output in outputs)
@@ -1,44 +1,174 @@
 import logging
-import math
 
 import numpy as np
 
-EPS = 1e-8
+from SearchTree import ArrayTree, DictTree
 
 log = logging.getLogger(__name__)
 
+TREE_BACKENDS = {
+    'dict': DictTree,
+    'array': ArrayTree,
+}
+
 
 class MCTS():
     """
     This class handles the MCTS tree.
+
+    The statistics of the tree are kept in a backend selected by
+    args.treeBackend: 'dict' (default) stores them in dicts keyed by s,
+    'array' stores one row of NumPy arrays per node (see SearchTree.py).
+
+    With args.mctsBatchSize > 1 (array backend only) the search collects that
+    many leaves per round, steering the paths apart with a virtual loss of
+    args.virtualLoss per pending visit, and evaluates them with a single call
+    to nnet.predict_batch.
+
+    With args.reuseTree, getActionProb keeps the statistics below
+    canonicalBoard from earlier searches (see advanceRoot) and only runs as
+    many simulations as are needed to bring it to numMCTSSims visits.
+    startMove and finishMove do this bookkeeping around the simulations, for
+    getActionProb as for callers that drive gatherLeaves and expandLeaves.
+
+    With args.hashStates the nodes are keyed by game.getHash, a 64-bit integer,
+    instead of game.stringRepresentation.
+
+    With args.maxTreeNodes (or args.maxTreeBytes, converted with the estimate
+    of the backend's nodeBytes) the tree is cut back to that many nodes after
+    every getActionProb. args.treeEviction chooses which nodes are dropped:
+    'lru' (default) the ones visited the fewest moves ago, 'generation' the
+    ones added the fewest moves ago. tree.evicted counts the dropped nodes.
     """
 
     def __init__(self, game, nnet, args):
         self.game = game
         self.nnet = nnet
         self.args = args
-        self.Qsa = {}  # stores Q values for s,a (as defined in the paper)
-        self.Nsa = {}  # stores #times edge s,a was visited
-        self.Ns = {}  # stores #times board s was visited
-        self.Ps = {}  # stores initial policy (returned by neural net)
 
-        self.Es = {}  # stores game.getGameEnded ended for board s
-        self.Vs = {}  # stores game.getValidMoves for board s
+        backend = getattr(args, 'treeBackend', 'dict')
+        if backend not in TREE_BACKENDS:
+            raise ValueError(f'Unknown treeBackend "{backend}", expected one of {list(TREE_BACKENDS)}')
+        self.tree = TREE_BACKENDS[backend](self.game.getActionSize())
+
+        self.batchSize = getattr(args, 'mctsBatchSize', 1)
+        self.virtualLoss = getattr(args, 'virtualLoss', 1.)
+        self.reuseTree = getattr(args, 'reuseTree', False)
+        self.stateKey = self.game.getHash if getattr(args, 'hashStates', False) else self.game.stringRepresentation
+
+        self.maxTreeNodes = getattr(args, 'maxTreeNodes', None)
+        maxTreeBytes = getattr(args, 'maxTreeBytes', None)
+        if maxTreeBytes is not None:
+            maxTreeNodes = max(1, maxTreeBytes // self.tree.nodeBytes())
+            self.maxTreeNodes = min(self.maxTreeNodes or maxTreeNodes, maxTreeNodes)
+        self.treeEviction = getattr(args, 'treeEviction', 'lru')
+        if self.treeEviction not in ('lru', 'generation'):
+            raise ValueError(f'Unknown treeEviction "{self.treeEviction}", expected "lru" or "generation"')
+        if self.batchSize > 1 and backend != 'array':
+            raise ValueError('mctsBatchSize > 1 requires treeBackend "array"')
 
     def getActionProb(self, canonicalBoard, temp=1):
         """
         This function performs numMCTSSims simulations of MCTS starting from
-        canonicalBoard.
+        canonicalBoard. With args.reuseTree, canonicalBoard first becomes the
+        root of the tree and the simulations it already received are counted.
 
         Returns:
             probs: a policy vector where the probability of the ith action is
                    proportional to Nsa[(s,a)]**(1./temp)
         """
-        for i in range(self.args.numMCTSSims):
-            self.search(canonicalBoard)
+        numSims = self.args.numMCTSSims - self.startMove(canonicalBoard)
+
+        if self.batchSize > 1:
+            sims = 0
+            while sims < numSims:
+                sims += self.searchBatch(canonicalBoard, min(self.batchSize, numSims - sims))
+        else:
+            for i in range(numSims):
+                self.search(canonicalBoard)
+
+        return self.finishMove(canonicalBoard, temp)
+
+    def startMove(self, canonicalBoard):
+        """
+        Prepares the tree for the search of the move from canonicalBoard:
+        starts a new generation and, with args.reuseTree, makes canonicalBoard
+        the root (see advanceRoot). getActionProb calls it before searching;
+        callers that run the simulations themselves through gatherLeaves and
+        expandLeaves call it before the first of them.
+
+        Returns:
+            sims: the number of simulations that already went through
+                  canonicalBoard and count towards numMCTSSims
+        """
+        self.tree.generation += 1
+        if self.reuseTree:
+            return self.advanceRoot(canonicalBoard)
+        return 0
+
+    def finishMove(self, canonicalBoard, temp=1):
+        """
+        Ends the search of the move from canonicalBoard started by startMove:
+        reads the policy from the visit counts (see getVisitProbs), then cuts
+        the tree back to maxTreeNodes (see limitTree).
+
+        Returns:
+            probs: a policy vector where the probability of the ith action is
+                   proportional to Nsa[(s,a)]**(1./temp)
+        """
+        probs = self.getVisitProbs(canonicalBoard, temp)
+        self.limitTree()
+        return probs
+
+    def limitTree(self):
+        """
+        Evicts nodes until the tree holds at most maxTreeNodes of them.
+        """
+        if self.maxTreeNodes is not None and len(self.tree) > self.maxTreeNodes:
+            count = len(self.tree) - self.maxTreeNodes
+            self.tree.evict(count, self.treeEviction)
+            log.debug(f'Evicted {count} nodes, {self.tree.evicted} in total')
+
+    def advanceRoot(self, canonicalBoard):
+        """
+        Makes canonicalBoard the root of the tree: the statistics of every node
+        that can be reached from it through visited edges are kept, all other
+        nodes are freed. Call it with the position after the moves that were
+        actually played, e.g. before searching the next move. The walk only
+        follows the child keys the tree recorded for the edges taken by the
+        search, so no move is replayed.
+
+        Returns:
+            visits: the number of simulations that already went through
+                    canonicalBoard
+        """
+        root = self.stateKey(canonicalBoard)
+        reachable = set()
+        stack = [root] if self.tree.getNode(root) is not None else []
+        while stack:
+            s = stack.pop()
+            if s in reachable:
+                continue
+            reachable.add(s)
+            for nextS in self.tree.getChildren(s):
+                if self.tree.getNode(nextS) is not None:
+                    stack.append(nextS)
+        self.tree.retain(reachable)
+
+        node = self.tree.getNode(root)
+        return 0 if node is None else self.tree.getVisits(node)
+
+    def getVisitProbs(self, canonicalBoard, temp=1):
+        """
+        Returns the policy given by the current visit counts of the edges of
+        canonicalBoard, without running any simulation.
 
-        s = self.game.stringRepresentation(canonicalBoard)
-        counts = [self.Nsa[(s, a)] if (s, a) in self.Nsa else 0 for a in range(self.game.getActionSize())]
+        Returns:
+            probs: a policy vector where the probability of the ith action is
+                   proportional to Nsa[(s,a)]**(1./temp)
+        """
+        s = self.stateKey(canonicalBoard)
+        counts = self.tree.getCounts(s)
 
         if temp == 0:
             bestAs = np.array(np.argwhere(counts == np.max(counts))).flatten()
@@ -54,9 +184,10 @@ class MCTS():
 
     def search(self, canonicalBoard):
         """
-        This function performs one iteration of MCTS. It is recursively called
-        till a leaf node is found. The action chosen at each node is one that
-        has the maximum upper confidence bound as in the paper.
+        This function performs one iteration of MCTS. It walks down from
+        canonicalBoard, recording the (node, action) pairs it takes, till a leaf
+        node is found. The action chosen at each node is one that has the
+        maximum upper confidence bound as in the paper.
 
         Once a leaf node is found, the neural network is called to return an
         initial policy P and a value v for the state. This value is propagated
@@ -64,6 +195,10 @@ class MCTS():
         outcome is propagated up the search path. The values of Ns, Nsa, Qsa are
         updated.
 
+        The walk uses an explicit path instead of recursion, so the depth of the
+        tree is not limited by the Python stack, and the statistics are updated
+        in the same order as a recursive search would.
+
         NOTE: the return values are the negative of the value of the current
         state. This is done since v is in [-1,1] and if v is the value of a
         state for the current player, then its value is -v for the other player.
@@ -72,65 +207,163 @@ class MCTS():
             v: the negative of the value of the current canonicalBoard
         """
 
-        s = self.game.stringRepresentation(canonicalBoard)
+        path = []
+        board = canonicalBoard
+        while True:
+            s = self.stateKey(board)
+            if path:
+                self.tree.addChild(*path[-1], s)
 
-        if s not in self.Es:
-            self.Es[s] = self.game.getGameEnded(canonicalBoard, 1)
-        if self.Es[s] != 0:
-            # terminal node
-            return -self.Es[s]
+            node = self.tree.getNode(s)
+            if node is None:
+                node = self.tree.addNode(s, self.game.getGameEnded(board, 1))
+            v = self.tree.getEnded(node)
+            if v != 0:
+                # terminal node
+                break
 
-        if s not in self.Ps:
-            # leaf node
-            self.Ps[s], v = self.nnet.predict(canonicalBoard)
-            valids = self.game.getValidMoves(canonicalBoard, 1)
-            self.Ps[s] = self.Ps[s] * valids  # masking invalid moves
-            sum_Ps_s = np.sum(self.Ps[s])
-            if sum_Ps_s > 0:
-                self.Ps[s] /= sum_Ps_s  # renormalize
-            else:
-                # if all valid moves were masked make all valid moves equally probable
+            if not self.tree.isExpanded(node):
+                # leaf node
+                ps, v = self.nnet.predict(board)
+                self.expand(node, board, ps)
+                v = float(np.squeeze(v))
+                break
 
-                # NB! All valid moves may be masked if either your NNet architecture is insufficient or you've get overfitting or something else.
-                # If you have got dozens or hundreds of these messages you should pay attention to your NNet and/or training process.   
-                log.error("All valid moves were masked, doing a workaround.")
-                self.Ps[s] = self.Ps[s] + valids
-                self.Ps[s] /= np.sum(self.Ps[s])
+            a = self.tree.selectAction(node, self.args.cpuct)
+            path.append((node, a))
+            next_s, next_player = self.game.getNextState(board, 1, a)
+            board = self.game.getCanonicalForm(next_s, next_player)
 
-            self.Vs[s] = valids
-            self.Ns[s] = 0
-            return -v
+        # v is the value of the leaf for the player to move there
+        for node, a in reversed(path):
+            v = -v
+            self.tree.update(node, a, v)
+        return -v
 
-        valids = self.Vs[s]
-        cur_best = -float('inf')
-        best_act = -1
+    def searchBatch(self, canonicalBoard, batchSize):
+        """
+        This function performs up to batchSize iterations of MCTS at once. It
+        selects batchSize paths from canonicalBoard, adding a virtual loss to
+        every edge on them so that later paths prefer other branches. Terminal
+        leaves are backed up right away; the other leaves are evaluated with a
+        single nnet.predict_batch call, expanded and then backed up. A path that
+        ends in a leaf already waiting for evaluation is dropped.
 
-        # pick the action with the highest upper confidence bound
-        for a in range(self.game.getActionSize()):
-            if valids[a]:
-                if (s, a) in self.Qsa:
-                    u = self.Qsa[(s, a)] + self.args.cpuct * self.Ps[s][a] * math.sqrt(self.Ns[s]) / (
-                            1 + self.Nsa[(s, a)])
-                else:
-                    u = self.args.cpuct * self.Ps[s][a] * math.sqrt(self.Ns[s] + EPS)  # Q = 0 ?
+        Returns:
+            sims: the number of simulations that were backed up
+        """
+        leaves, sims = self.gatherLeaves(canonicalBoard, batchSize)
+        if leaves:
+            pis, vs = self.nnet.predict_batch([board for _, _, board in leaves])
+            sims += self.expandLeaves(leaves, pis, vs)
+        return sims
 
-                if u > cur_best:
-                    cur_best = u
-                    best_act = a
+    def gatherLeaves(self, canonicalBoard, batchSize):
+        """
+        The selection half of searchBatch: selects up to batchSize paths from
+        canonicalBoard and backs up the ones ending in a terminal node.
 
-        a = best_act
-        next_s, next_player = self.game.getNextState(canonicalBoard, 1, a)
-        next_s = self.game.getCanonicalForm(next_s, next_player)
+        Returns:
+            leaves: list of (path, node, board) for the leaves that still need
+                    to be evaluated by the network and passed to expandLeaves
+            sims: the number of simulations that were already backed up
+        """
+        sims = 0
+        leaves = []
+        pendingNodes = set()
+        for _ in range(batchSize):
+            path, node, board = self.selectLeaf(canonicalBoard)
+            ended = self.tree.getEnded(node)
+            if ended != 0:
+                # terminal node
+                self.backup(path, ended)
+                sims += 1
+            elif node in pendingNodes:
+                for parent, a in path:
+                    self.tree.removeVirtualLoss(parent, a)
+            else:
+                pendingNodes.add(node)
+                leaves.append((path, node, board))
+        return leaves, sims
 
-        v = self.search(next_s)
+    def expandLeaves(self, leaves, pis, vs):
+        """
+        The evaluation half of searchBatch: expands every leaf returned by
+        gatherLeaves with its network policy and backs up its value.
 
-        if (s, a) in self.Qsa:
-            self.Qsa[(s, a)] = (self.Nsa[(s, a)] * self.Qsa[(s, a)] + v) / (self.Nsa[(s, a)] + 1)
-            self.Nsa[(s, a)] += 1
+        Returns:
+            sims: the number of simulations that were backed up
+        """
+        for (path, node, board), ps, v in zip(leaves, pis, vs):
+            self.expand(node, board, ps)
+            self.backup(path, float(np.squeeze(v)))
+        return len(leaves)
+
+    def selectLeaf(self, canonicalBoard):
+        """
+        Walks down from canonicalBoard along the actions with the highest upper
+        confidence bound (counting pending visits as virtual losses) until it
+        reaches a terminal or unexpanded node, adding a virtual loss to every
+        edge it takes.
+
+        Returns:
+            path: list of (node, action) pairs from canonicalBoard to the leaf
+            node: the leaf node
+            board: the canonical board of the leaf
+        """
+        path = []
+        board = canonicalBoard
+        while True:
+            s = self.stateKey(board)
+            if path:
+                self.tree.addChild(*path[-1], s)
+            node = self.tree.getNode(s)
+            if node is None:
+                node = self.tree.addNode(s, self.game.getGameEnded(board, 1))
+            if self.tree.getEnded(node) != 0 or not self.tree.isExpanded(node):
+                return path, node, board
+
+            a = self.tree.selectAction(node, self.args.cpuct, self.virtualLoss)
+            self.tree.addVirtualLoss(node, a)
+            path.append((node, a))
+            next_s, next_player = self.game.getNextState(board, 1, a)
+            board = self.game.getCanonicalForm(next_s, next_player)
 
+    def backup(self, path, v):
+        """
+        Propagates the value v of the leaf at the end of path (from the point of
+        view of the player to move there) up the path, removing the virtual
+        losses added by selectLeaf. The sign flips at every level just like the
+        return value of search.
+        """
+        for node, a in reversed(path):
+            v = -v
+            self.tree.removeVirtualLoss(node, a)
+            self.tree.update(node, a, v)
+
+    def expand(self, node, canonicalBoard, ps):
+        """
+        Masks the policy ps returned by the neural network with the valid moves
+        of canonicalBoard, renormalizes it and stores it as the prior of node.
+        """
+        if hasattr(self.game, 'getValidActions'):
+            actions = self.game.getValidActions(canonicalBoard, 1)
+        else:
+            # games that do not subclass Game
+            actions = np.flatnonzero(self.game.getValidMoves(canonicalBoard, 1))
+        valid_ps = ps[actions]
+        ps = np.zeros(len(ps))
+        ps[actions] = valid_ps  # masking invalid moves
+        sum_ps = np.sum(ps)
+        if sum_ps > 0:
+            ps /= sum_ps  # renormalize
         else:
-            self.Qsa[(s, a)] = v
-            self.Nsa[(s, a)] = 1
+            # if all valid moves were masked make all valid moves equally probable
 
-        self.Ns[s] += 1
-        return -v
+            # NB! All valid moves may be masked if either your NNet architecture is insufficient or you've get overfitting or something else.
+            # If you have got dozens or hundreds of these messages you should pay attention to your NNet and/or training process.   
+            log.error("All valid moves were masked, doing a workaround.")
+            ps[actions] = 1
+            ps /= np.sum(ps)
+
+        self.tree.expand(node, ps, actions)
@@ -1,3 +1,6 @@
+import numpy as np
+
+
 class NeuralNet():
     """
     This class specifies the base NeuralNet class. To define your own neural
@@ -36,6 +39,22 @@ class NeuralNet():
         """
         pass
 
+    def predict_batch(self, boards):
+        """
+        Input:
+            boards: a list of boards in their canonical form.
+
+        Returns:
+            pis: a numpy array of shape (len(boards), game.getActionSize) with
+                 the policy vector of each board
+            vs: a numpy array of length len(boards) with the value of each board
+
+        The default implementation calls predict once per board. Override it to
+        evaluate all boards in a single forward pass.
+        """
+        pis, vs = zip(*[self.predict(board) for board in boards])
+        return np.array(pis), np.array(vs).reshape(len(boards))
+
     def save_checkpoint(self, folder, filename):
         """
         Saves the current neural network (with its parameters) in
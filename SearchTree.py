@@ -0,0 +1,314 @@
+import math
+
+import numpy as np
+
+EPS = 1e-8
+
+
+def selectPuct(actions, Ps, Nsa, Qsa, Ns, cpuct):
+    """
+    Returns the action with the highest upper confidence bound, computed for
+    all actions at once from the priors Ps, visit counts Nsa and Q values Qsa
+    of their edges and the visit count Ns of the node. The actions must be in
+    increasing order: np.argmax returns the first maximum, so ties are broken
+    towards the lowest action like the original per-action loop.
+    """
+    u = np.where(Nsa > 0,
+                 Qsa + cpuct * Ps * math.sqrt(Ns) / (1 + Nsa),
+                 cpuct * Ps * math.sqrt(Ns + EPS))  # Q = 0 ?
+    return int(actions[np.argmax(u)])
+
+
+class DictTree():
+    """
+    Stores the MCTS statistics in dicts keyed by the string representation of
+    the board; nodes are identified by their string representation s. The
+    priors, visit counts and Q values of the edges of s are NumPy arrays
+    aligned with its valid actions Vs[s], so selectAction scores them all at
+    once and nodes with few valid actions stay small.
+    """
+
+    def __init__(self, actionSize):
+        self.actionSize = actionSize
+        self.Qsa = {}  # stores the Q values of the valid actions of s (as defined in the paper)
+        self.Nsa = {}  # stores #times each valid action of s was visited
+        self.Ns = {}  # stores #times board s was visited
+        self.Ps = {}  # stores the initial policy (returned by neural net) of the valid actions of s
+
+        self.Es = {}  # stores game.getGameEnded ended for board s
+        self.Vs = {}  # stores game.getValidActions for board s
+        self.Cs = {}  # stores {a: s'} for the edges s,a that were taken, s' being the key of the next board
+
+        self.generation = 0  # advanced by MCTS before every move it searches
+        self.born = {}  # stores the generation in which board s was added
+        self.lastVisit = {}  # stores the last generation in which board s was visited
+        self.evicted = 0  # number of nodes dropped by evict
+
+    def getNode(self, s):
+        return s if s in self.Es else None
+
+    def addNode(self, s, ended):
+        self.Es[s] = ended
+        self.born[s] = self.lastVisit[s] = self.generation
+        return s
+
+    def getEnded(self, node):
+        return self.Es[node]
+
+    def isExpanded(self, node):
+        return node in self.Ps
+
+    def expand(self, node, ps, actions):
+        self.Ps[node] = np.asarray(ps)[actions]
+        self.Vs[node] = actions
+        self.Ns[node] = 0
+        self.Nsa[node] = np.zeros(len(actions), dtype=np.int64)
+        self.Qsa[node] = np.zeros(len(actions))
+
+    def selectAction(self, node, cpuct):
+        # pick the action with the highest upper confidence bound
+        return selectPuct(self.Vs[node], self.Ps[node], self.Nsa[node], self.Qsa[node], self.Ns[node], cpuct)
+
+    def update(self, node, a, v):
+        s = node
+        i = np.searchsorted(self.Vs[s], a)
+        n = self.Nsa[s][i]
+        self.Qsa[s][i] = (n * self.Qsa[s][i] + v) / (n + 1)
+        self.Nsa[s][i] = n + 1
+        self.Ns[s] += 1
+        self.lastVisit[s] = self.generation
+
+    def addChild(self, node, a, s):
+        self.Cs.setdefault(node, {})[a] = s
+
+    def getChildren(self, s):
+        return self.Cs.get(s, {}).values()
+
+    def getCounts(self, s):
+        counts = np.zeros(self.actionSize, dtype=np.int64)
+        if s in self.Nsa:
+            counts[self.Vs[s]] = self.Nsa[s]
+        return counts
+
+    def getVisits(self, node):
+        # the simulation that expanded the node is not counted in Ns
+        return self.Ns[node] + 1 if node in self.Ns else 0
+
+    def retain(self, states):
+        """
+        Drops all nodes whose string representation is not in the set states.
+        """
+        for name in ('Qsa', 'Nsa', 'Ns', 'Ps', 'Es', 'Vs', 'Cs', 'born', 'lastVisit'):
+            setattr(self, name, {s: x for s, x in getattr(self, name).items() if s in states})
+
+    def evict(self, count, policy='lru'):
+        """
+        Drops the count nodes that were visited least recently (policy 'lru')
+        or added longest ago (policy 'generation'). Ties are broken towards the
+        nodes that were added first.
+        """
+        stamps = self.lastVisit if policy == 'lru' else self.born
+        victims = sorted(self.Es, key=stamps.__getitem__)[:count]
+        self.retain(set(self.Es).difference(victims))
+        self.evicted += len(victims)
+
+    def nodeBytes(self):
+        # rough estimate: the valid moves of the node with their priors, counts
+        # and Q values if every action is valid, plus the dict entries
+        return 32 * self.actionSize + 1000
+
+    def __len__(self):
+        return len(self.Es)
+
+
+class ArrayTree():
+    """
+    Stores the MCTS statistics with one row per node. The string representation
+    of a board is hashed once to find its node index; the visit counts, Q values
+    and priors of all its edges are then contiguous NumPy rows of length
+    actionSize, and the valid actions of the node are kept as an index array.
+    The rows live in preallocated arrays that are doubled in size whenever they
+    fill up.
+
+    For batched search, edges that are part of a path still waiting for its
+    leaf evaluation carry pending visits (virtual loss). They are kept apart
+    from Nsa/Qsa and only change how selectAction scores those edges, so the
+    real statistics are not disturbed.
+
+    Nodes dropped by evict leave their rows on a free list, and addNode reuses
+    those rows before it grows the arrays.
+    """
+
+    def __init__(self, actionSize, capacity=64):
+        self.actionSize = actionSize
+        self.index = {}  # maps the string representation s to its node index
+        self.size = 0  # number of rows in use or on the free list
+        self.free = []  # rows of evicted nodes
+
+        self.Ns = np.zeros(capacity, dtype=np.int64)
+        self.Es = np.zeros(capacity)
+        self.Nsa = np.zeros((capacity, actionSize), dtype=np.int32)
+        self.Qsa = np.zeros((capacity, actionSize))
+        self.Ps = np.zeros((capacity, actionSize))
+        self.Vs = []  # valid actions of each expanded node, None until expanded
+        self.Cs = []  # {a: s'} for the edges of each node that were taken, s' being the key of the next board
+        self.pending = {}  # node -> {a: number of in-flight visits through edge (node,a)}
+
+        self.generation = 0  # advanced by MCTS before every move it searches
+        self.born = np.zeros(capacity, dtype=np.int64)  # generation in which each node was added
+        self.lastVisit = np.zeros(capacity, dtype=np.int64)  # last generation in which each node was visited
+        self.evicted = 0  # number of nodes dropped by evict
+
+    def getNode(self, s):
+        return self.index.get(s)
+
+    def addNode(self, s, ended):
+        if self.free:
+            node = self.free.pop()
+            self.Ns[node] = 0
+            self.Nsa[node] = 0
+            self.Qsa[node] = 0
+            self.Cs[node] = {}
+        else:
+            if self.size == len(self.Ns):
+                self._grow()
+            node = self.size
+            self.size += 1
+            self.Vs.append(None)
+            self.Cs.append({})
+        self.index[s] = node
+        self.Es[node] = ended
+        self.born[node] = self.lastVisit[node] = self.generation
+        return node
+
+    def getEnded(self, node):
+        return self.Es[node]
+
+    def isExpanded(self, node):
+        return self.Vs[node] is not None
+
+    def expand(self, node, ps, actions):
+        self.Ps[node] = ps
+        self.Vs[node] = actions
+
+    def selectAction(self, node, cpuct, virtualLoss=0.):
+        """
+        Computes the upper confidence bound of every valid edge of node at once
+        and returns the action with the highest one, see selectPuct.
+
+        Edges with pending visits are scored as if each of those visits had
+        already returned a value of -virtualLoss.
+        """
+        actions = self.Vs[node]
+        Ps = self.Ps[node, actions]
+        Nsa = self.Nsa[node, actions]
+        Qsa = self.Qsa[node, actions]
+        Ns = self.Ns[node]
+
+        pending = self.pending.get(node)
+        if pending:
+            counts = np.zeros(len(actions), dtype=np.int64)
+            counts[np.searchsorted(actions, list(pending.keys()))] = list(pending.values())
+            inFlight = counts > 0
+            Qsa = np.where(inFlight, (Nsa * Qsa - virtualLoss * counts) / np.maximum(Nsa + counts, 1), Qsa)
+            Nsa = Nsa + counts
+            Ns = Ns + counts.sum()
+
+        # pick the action with the highest upper confidence bound
+        return selectPuct(actions, Ps, Nsa, Qsa, Ns, cpuct)
+
+    def update(self, node, a, v):
+        n = self.Nsa[node, a]
+        self.Qsa[node, a] = (n * self.Qsa[node, a] + v) / (n + 1)
+        self.Nsa[node, a] = n + 1
+        self.Ns[node] += 1
+        self.lastVisit[node] = self.generation
+
+    def addVirtualLoss(self, node, a):
+        pending = self.pending.setdefault(node, {})
+        pending[a] = pending.get(a, 0) + 1
+
+    def removeVirtualLoss(self, node, a):
+        pending = self.pending[node]
+        pending[a] -= 1
+        if pending[a] == 0:
+            del pending[a]
+            if not pending:
+                del self.pending[node]
+
+    def addChild(self, node, a, s):
+        self.Cs[node][a] = s
+
+    def getChildren(self, s):
+        node = self.index.get(s)
+        return () if node is None else self.Cs[node].values()
+
+    def getCounts(self, s):
+        node = self.index.get(s)
+        if node is None:
+            return np.zeros(self.actionSize, dtype=np.int32)
+        return self.Nsa[node].copy()
+
+    def getVisits(self, node):
+        # the simulation that expanded the node is not counted in Ns
+        return int(self.Ns[node]) + 1 if self.isExpanded(node) else 0
+
+    def retain(self, states):
+        """
+        Drops all nodes whose string representation is not in the set states.
+        The rows of the remaining nodes are moved, in their current order, into
+        new arrays just large enough to hold them, so the memory of the dropped
+        ones is released.
+        """
+        assert not self.pending, 'cannot drop nodes while leaf evaluations are pending'
+        kept = sorted((node, s) for s, node in self.index.items() if s in states)
+        rows = [node for node, _ in kept]
+        capacity = 64
+        while capacity < len(rows):
+            capacity *= 2
+
+        for name in ('Ns', 'Es', 'Nsa', 'Qsa', 'Ps', 'born', 'lastVisit'):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:len(rows)] = old[rows]
+            setattr(self, name, new)
+        self.Vs = [self.Vs[node] for node in rows]
+        self.Cs = [self.Cs[node] for node in rows]
+        self.index = {s: i for i, (_, s) in enumerate(kept)}
+        self.size = len(rows)
+        self.free = []
+
+    def evict(self, count, policy='lru'):
+        """
+        Drops the count nodes that were visited least recently (policy 'lru')
+        or added longest ago (policy 'generation'). Ties are broken towards the
+        nodes that were added first. The rows of the dropped nodes are kept
+        for reuse, so the arrays do not shrink.
+        """
+        assert not self.pending, 'cannot drop nodes while leaf evaluations are pending'
+        states = list(self.index)
+        nodes = np.fromiter(self.index.values(), dtype=np.int64, count=len(states))
+        stamps = self.lastVisit if policy == 'lru' else self.born
+        for i in np.argsort(stamps[nodes], kind='stable')[:count]:
+            node = int(nodes[i])
+            del self.index[states[i]]
+            self.Vs[node] = None
+            self.Cs[node] = {}
+            self.free.append(node)
+            self.evicted += 1
+
+    def nodeBytes(self):
+        # the rows of the node; the index entry and valid actions come on top
+        row = self.Nsa.itemsize + self.Qsa.itemsize + self.Ps.itemsize
+        return row * self.actionSize + self.Ns.itemsize + self.Es.itemsize + 2 * self.born.itemsize
+
+    def __len__(self):
+        return len(self.index)
+
+    def _grow(self):
+        capacity = 2 * len(self.Ns)
+        for name in ('Ns', 'Es', 'Nsa', 'Qsa', 'Ps', 'born', 'lastVisit'):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
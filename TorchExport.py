@@ -0,0 +1,213 @@
+"""
+Exports the PyTorch networks of this repository (othello/pytorch and
+tafl/pytorch, which share their architecture) for CPU inference, and serves
+predictions from the exported files through ExportedNNet. quantize makes an
+int8 copy of a network for CPU inference within the NNetWrappers.
+
+The exported network has every batch norm folded into the convolution or
+linear layer before it, runs with dropout disabled, and outputs the policy as
+probabilities. It is written both as TorchScript (.pt) and as ONNX (.onnx),
+with a variable batch size.
+
+Convert a checkpoint of NNetWrapper from the repository root with e.g.
+    python TorchExport.py othello --size 8 --checkpoint ./temp/best.pth.tar --out ./temp/best
+    python TorchExport.py tafl --variant Brandubh --checkpoint ./temp/best.pth.tar --out ./temp/best
+which writes ./temp/best.pt and ./temp/best.onnx.
+"""
+
+import argparse
+import copy
+import inspect
+import os
+
+import numpy as np
+import torch
+import torch.ao.nn.quantized.dynamic as nnqd
+import torch.nn as nn
+from torch.ao.quantization import default_dynamic_qconfig, quantize_dynamic
+
+# layers of the networks that are followed by a batch norm
+FOLDED_LAYERS = [('conv1', 'bn1'), ('conv2', 'bn2'), ('conv3', 'bn3'), ('conv4', 'bn4'),
+                 ('fc1', 'fc_bn1'), ('fc2', 'fc_bn2')]
+
+
+def foldBatchNorm(layer, bn):
+    """
+    Returns a copy of the Conv2d or Linear layer with the batch norm bn that
+    follows it folded into its weights and bias, using the running statistics
+    of bn as in eval mode.
+    """
+    with torch.no_grad():
+        scale = bn.weight / torch.sqrt(bn.running_var + bn.eps)
+        folded = copy.deepcopy(layer)
+        folded.weight.copy_(layer.weight * scale.reshape((-1,) + (1,) * (layer.weight.dim() - 1)))
+        if folded.bias is None:
+            folded.bias = nn.Parameter(torch.zeros_like(bn.running_mean))
+        folded.bias.copy_((folded.bias - bn.running_mean) * scale + bn.bias)
+    return folded
+
+
+def foldBatchNorms(nnet):
+    """
+    Returns a copy of the OthelloNNet or TaflNNet nnet on the CPU in eval
+    mode, with every batch norm folded into the layer before it.
+    """
+    nnet = copy.deepcopy(nnet).cpu().eval()
+    for layer, bn in FOLDED_LAYERS:
+        setattr(nnet, layer, foldBatchNorm(getattr(nnet, layer), getattr(nnet, bn)))
+        setattr(nnet, bn, nn.Identity())
+    return nnet
+
+
+def quantize(nnet):
+    """
+    Returns a copy of the OthelloNNet or TaflNNet nnet for CPU inference whose
+    convolutions and linear layers compute in int8, after folding the batch
+    norms (see foldBatchNorms). The weights are quantized once, while the
+    inputs of every layer are quantized on the fly from their range in each
+    call, so no calibration data is needed. The copy has the outputs of nnet
+    and runs on the CPU only; make a new one whenever the weights of nnet
+    change.
+    """
+    qconfig = {nn.Conv2d: default_dynamic_qconfig, nn.Linear: default_dynamic_qconfig}
+    mapping = {nn.Conv2d: nnqd.Conv2d, nn.Linear: nnqd.Linear}
+    return quantize_dynamic(foldBatchNorms(nnet), qconfig, dtype=torch.qint8, mapping=mapping)
+
+
+class InferenceNet(nn.Module):
+    """
+    A copy of an OthelloNNet or TaflNNet prepared for inference on the CPU:
+    batch norms folded into the layers before them, eval mode, and the policy
+    returned as probabilities rather than log-probabilities.
+    """
+
+    def __init__(self, nnet):
+        super().__init__()
+        self.nnet = foldBatchNorms(nnet)
+
+    def forward(self, boards):
+        pi, v = self.nnet(boards)
+        return torch.exp(pi), v
+
+
+def export(nnet, path):
+    """
+    Writes the network of the PyTorch NNetWrapper nnet to path.pt as
+    TorchScript and to path.onnx as ONNX.
+
+    Returns:
+        the paths of both files
+    """
+    model = InferenceNet(nnet.nnet)
+    example = torch.zeros(2, nnet.board_x, nnet.board_y)
+    folder = os.path.dirname(path)
+    if folder and not os.path.exists(folder):
+        os.makedirs(folder)
+
+    scriptPath = path + '.pt'
+    with torch.no_grad():
+        torch.jit.trace(model, example).save(scriptPath)
+
+    onnxPath = path + '.onnx'
+    # newer versions of torch default to an exporter that needs onnxscript
+    options = {'dynamo': False} if 'dynamo' in inspect.signature(torch.onnx.export).parameters else {}
+    torch.onnx.export(model, example, onnxPath, input_names=['boards'], output_names=['pi', 'v'],
+                      dynamic_axes={'boards': {0: 'batch'}, 'pi': {0: 'batch'}, 'v': {0: 'batch'}}, **options)
+    return scriptPath, onnxPath
+
+
+class ExportedNNet():
+    """
+    Serves predictions from a network written by export, through ONNX Runtime
+    for .onnx files or TorchScript for .pt files. Both run on the CPU. It is
+    an evaluation-only predictor with predict, predict_batch and
+    load_checkpoint of NeuralNet but no train or save_checkpoint: train the
+    network with its NNetWrapper and export it again.
+
+    Use it in place of an NNetWrapper where the network is only evaluated,
+    e.g. in pit.py:
+        n1 = ExportedNNet(g)
+        n1.load_checkpoint('./temp/', 'best.onnx')
+    """
+
+    def __init__(self, game, path=None, threads=None):
+        """
+        Input:
+            game: the game the network was trained for
+            path: an exported network to load, see load_checkpoint
+            threads: number of threads per forward pass, the default of the
+                     runtime if None
+        """
+        self.board_x, self.board_y = game.getBoardSize()
+        self.action_size = game.getActionSize()
+        self.threads = threads
+        self.run = None
+        if path is not None:
+            self.load_checkpoint(*os.path.split(path))
+
+    def predict(self, board):
+        """
+        board: np array with board
+        """
+        pi, v = self.run(board.astype(np.float32).reshape(1, self.board_x, self.board_y))
+        return pi[0], v[0]
+
+    def predict_batch(self, boards):
+        """
+        boards: list of np arrays with boards
+        """
+        pi, v = self.run(np.array([board.astype(np.float32) for board in boards]))
+        return pi, v[:, 0]
+
+    def runOnnx(self, boards):
+        return self.session.run(None, {'boards': boards})
+
+    def runTorchScript(self, boards):
+        with torch.inference_mode():
+            pi, v = self.module(torch.from_numpy(boards))
+        return pi.numpy(), v.numpy()
+
+    def load_checkpoint(self, folder='checkpoint', filename='checkpoint.onnx'):
+        filepath = os.path.join(folder, filename)
+        if not os.path.exists(filepath):
+            raise ValueError("No model in path {}".format(filepath))
+        if filepath.endswith('.onnx'):
+            import onnxruntime
+            options = onnxruntime.SessionOptions()
+            if self.threads:
+                options.intra_op_num_threads = self.threads
+            self.session = onnxruntime.InferenceSession(filepath, options, providers=['CPUExecutionProvider'])
+            self.run = self.runOnnx
+        else:
+            if self.threads:
+                torch.set_num_threads(self.threads)
+            self.module = torch.jit.load(filepath, map_location='cpu').eval()
+            self.run = self.runTorchScript
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('game', choices=['othello', 'tafl'])
+    parser.add_argument('--size', type=int, default=8, help='Othello board size')
+    parser.add_argument('--variant', default='Brandubh', help='Tafl variant')
+    parser.add_argument('--checkpoint', required=True, help='.pth.tar file saved by NNetWrapper.save_checkpoint')
+    parser.add_argument('--out', required=True, help='path of the exported files, without extension')
+    opts = parser.parse_args()
+
+    if opts.game == 'othello':
+        from othello.OthelloGame import OthelloGame
+        from othello.pytorch.NNet import NNetWrapper
+        game = OthelloGame(opts.size)
+    else:
+        from tafl.TaflGame import TaflGame
+        from tafl.pytorch.NNet import NNetWrapper
+        game = TaflGame(opts.variant)
+
+    nnet = NNetWrapper(game)
+    nnet.load_checkpoint(*os.path.split(opts.checkpoint))
+    for path in export(nnet, opts.out):
+        print('Wrote', path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+import numpy as np
+
+
+class HashedBoard(np.ndarray):
+    """
+    A board array that can carry the Zobrist keys of its contents, see
+    ZobristTable, the bitboards of its pieces for games that play on
+    bitboards, and the winner if the game that returned it found one.
+    Boards that carry them must not be modified in place. Views, copies and
+    results of arithmetic are new arrays whose contents may differ or be
+    modified, so __array_finalize__ starts them without either.
+    """
+
+    zobrist = None  # (key of the board, key of the negated board)
+    bits = None  # (bitboard of the pieces of 1, bitboard of the pieces of -1), in the game's layout
+    winner = None  # recorded by getNextState of games that check for a win there
+
+    def __array_finalize__(self, obj):
+        self.zobrist = None
+        self.bits = None
+        self.winner = None
+
+
+def plainBoard(board):
+    """
+    Returns a HashedBoard as a plain ndarray without its keys, e.g. to store
+    it in training examples, and any other board unchanged.
+    """
+    return board.view(np.ndarray) if isinstance(board, HashedBoard) else board
+
+
+class ZobristTable():
+    """
+    Random 64-bit keys for every (cell, value) pair of boards of the given
+    shape whose cells hold the given values, which must be symmetric around 0
+    (e.g. -1, 0, 1). The Zobrist key of a board is the XOR of the keys of all
+    its cells, so a move only has to XOR out the old and XOR in the new values
+    of the cells it changes.
+
+    Games with such boards return HashedBoards from getCanonicalForm and
+    getNextState. The keys of a HashedBoard are computed on the first call to
+    hash and then passed on to the boards derived from it by update and
+    canonical. Both the key of the board and that of its negation are kept, so
+    that getCanonicalForm only has to swap them. pairs holds both keys of
+    every (cell, value) so that one lookup updates the two. The keys are
+    Python ints: a move changes only a few cells, and XORing their keys one by
+    one is cheaper than a NumPy reduction over such short arrays.
+    """
+
+    def __init__(self, shape, values, seed=0):
+        values = sorted(values)
+        assert values == [-v for v in reversed(values)], 'values must be symmetric around 0'
+        self.low = values[0]
+        numCells = int(np.prod(shape))
+        numValues = values[-1] - values[0] + 1
+        rng = np.random.RandomState(seed)
+        self.keys = np.frombuffer(rng.bytes(8 * numCells * numValues), dtype=np.uint64).reshape(numCells, numValues)
+        # pairs of the key of value v for the board and for the negated board,
+        # where it is the key of -v
+        self.pairs = np.stack([self.keys, self.keys[:, ::-1]], axis=-1)
+        self.pairList = self.pairs.tolist()
+        self.cells = np.arange(numCells)
+
+    def hash(self, board):
+        """
+        Returns:
+            zobrist: a tuple with the keys of board and of -board, which is
+                     cached on board if it is a HashedBoard
+        """
+        zobrist = getattr(board, 'zobrist', None)
+        if zobrist is None:
+            values = np.asarray(board).ravel() - self.low
+            zobrist = tuple(np.bitwise_xor.reduce(self.pairs[self.cells, values], axis=0).tolist())
+            if isinstance(board, HashedBoard):
+                board.zobrist = zobrist
+        return zobrist
+
+    def update(self, board, nextBoard):
+        """
+        Input:
+            board: the board before a move
+            nextBoard: a new array with the board after the move
+
+        Returns:
+            nextBoard as a HashedBoard. If board carries keys, those of
+            nextBoard are derived from them through the cells that changed.
+        """
+        zobrist = getattr(board, 'zobrist', None)
+        nextBoard = nextBoard.view(HashedBoard)
+        if zobrist is not None:
+            old = np.asarray(board).ravel()
+            new = np.asarray(nextBoard).ravel()
+            key, negKey = zobrist
+            for cell in (old != new).nonzero()[0].tolist():
+                oldPair = self.pairList[cell][old.item(cell) - self.low]
+                newPair = self.pairList[cell][new.item(cell) - self.low]
+                key ^= oldPair[0] ^ newPair[0]
+                negKey ^= oldPair[1] ^ newPair[1]
+            nextBoard.zobrist = (key, negKey)
+        return nextBoard
+
+    def canonical(self, board, player):
+        """
+        Returns:
+            player*board as a HashedBoard, carrying the keys and bitboards of
+            board (swapped if player is -1) if board has them.
+        """
+        canonicalBoard = (player * np.asarray(board)).view(HashedBoard)
+        zobrist = getattr(board, 'zobrist', None)
+        if zobrist is not None:
+            canonicalBoard.zobrist = zobrist if player == 1 else zobrist[::-1]
+        bits = getattr(board, 'bits', None)
+        if bits is not None:
+            canonicalBoard.bits = bits if player == 1 else bits[::-1]
+        return canonicalBoard
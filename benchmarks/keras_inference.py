@@ -0,0 +1,76 @@
+"""
+Compares the latency of evaluating a Keras network with model.predict and
+with KerasPredictor (see KerasPredictor.py), the path the Keras NNetWrappers
+use, for single boards as MCTS evaluates them and for a batch of boards.
+The networks have random weights and are evaluated on the initial board.
+
+Run from the repository root:
+    python benchmarks/keras_inference.py --games tictactoe othello --calls 50
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import numpy as np
+
+from KerasPredictor import KerasPredictor
+
+
+def makeNNet(name):
+    if name == 'tictactoe':
+        from tictactoe.TicTacToeGame import TicTacToeGame
+        from tictactoe.keras.NNet import NNetWrapper
+        game = TicTacToeGame()
+    elif name == 'othello':
+        from othello.OthelloGame import OthelloGame
+        from othello.keras.NNet import NNetWrapper
+        game = OthelloGame(8)
+    elif name == 'gobang':
+        from gobang.GobangGame import GobangGame
+        from gobang.keras.NNet import NNetWrapper
+        game = GobangGame(15, 5)
+    elif name == 'connect4':
+        from connect4.Connect4Game import Connect4Game
+        from connect4.keras.NNet import NNetWrapper
+        game = Connect4Game()
+    else:
+        raise ValueError(f'unknown game {name}')
+    return game, NNetWrapper(game)
+
+
+def latency(fn, calls):
+    """Returns the mean time of fn in milliseconds, after one warm-up call."""
+    fn()
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--games', nargs='+', default=['tictactoe', 'othello'],
+                        choices=['tictactoe', 'othello', 'gobang', 'connect4'])
+    parser.add_argument('--calls', type=int, default=50, help='calls to time per measurement')
+    parser.add_argument('--batch', type=int, default=16, help='boards per batched call')
+    opts = parser.parse_args()
+
+    print(f'{"game":>10} {"boards":>6} {"predict ms":>11} {"predictor ms":>13} {"speedup":>8}')
+    for name in opts.games:
+        game, nnet = makeNNet(name)
+        model = nnet.nnet.model
+        predictor = KerasPredictor(model)
+        board = np.asarray(game.getInitBoard(), dtype=np.float32)
+        for size in (1, opts.batch):
+            boards = np.repeat(board[np.newaxis], size, axis=0)
+            slow = latency(lambda: model.predict(boards, batch_size=size, verbose=False), opts.calls)
+            fast = latency(lambda: predictor(boards), opts.calls)
+            print(f'{name:>10} {size:>6} {slow:>11.2f} {fast:>13.2f} {slow / fast:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
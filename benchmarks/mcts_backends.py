@@ -0,0 +1,106 @@
+"""
+Compares the MCTS tree backends (see SearchTree.py) in simulations per second
+and resident memory. Each backend runs in a fresh process so that the peak RSS
+it reports is not polluted by the other one.
+
+The network is replaced by a uniform policy with value 0 so that the numbers
+measure the cost of the search itself rather than the forward passes.
+
+Run from the repository root:
+    python benchmarks/mcts_backends.py --n 8 --sims 800 --moves 10
+    python benchmarks/mcts_backends.py --n 8 --sims 800 --moves 10 --bitboard
+    python benchmarks/mcts_backends.py --game tafl --variant Tablut --sims 200
+"""
+
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import numpy as np
+
+from MCTS import MCTS
+from othello.OthelloGame import OthelloGame
+from tafl.TaflGame import TaflGame
+from utils import *
+
+
+class UniformNNet():
+    """Returns a uniform policy and a neutral value for every board."""
+
+    def __init__(self, game):
+        self.pi = np.ones(game.getActionSize()) / game.getActionSize()
+
+    def predict(self, board):
+        return self.pi, 0.
+
+
+def maxRSS():
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.
+
+
+def makeGame(opts):
+    if opts.game == 'tafl':
+        return TaflGame(opts.variant), f'Tafl {opts.variant}'
+    if opts.bitboard:
+        return OthelloGame(opts.n, bitboard=True), f'Othello {opts.n}x{opts.n} (bitboard)'
+    return OthelloGame(opts.n), f'Othello {opts.n}x{opts.n}'
+
+
+def run(backend, opts):
+    np.random.seed(0)
+    game, _ = makeGame(opts)
+    sims, moves = opts.sims, opts.moves
+    args = dotdict({'numMCTSSims': sims, 'cpuct': 1.0, 'treeBackend': backend})
+    mcts = MCTS(game, UniformNNet(game), args)
+
+    rssBefore = maxRSS()
+    board, player = game.getInitBoard(), 1
+    start = time.perf_counter()
+    numSims = 0
+    for _ in range(moves):
+        if game.getGameEnded(board, player) != 0:
+            break
+        canonicalBoard = game.getCanonicalForm(board, player)
+        pi = mcts.getActionProb(canonicalBoard, temp=1)
+        numSims += sims
+        board, player = game.getNextState(board, player, np.random.choice(len(pi), p=pi))
+    elapsed = time.perf_counter() - start
+    return {
+        'backend': backend,
+        'sims/sec': numSims / elapsed,
+        'nodes': len(mcts.tree),
+        'RSS MB': maxRSS() - rssBefore,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--game', choices=['othello', 'tafl'], default='othello')
+    parser.add_argument('--n', type=int, default=8, help='Othello board size')
+    parser.add_argument('--bitboard', action='store_true', help='use the Othello bitboard move generator')
+    parser.add_argument('--variant', default='Brandubh', help='Tafl variant, see tafl/GameVariants.py')
+    parser.add_argument('--sims', type=int, default=800, help='MCTS simulations per move')
+    parser.add_argument('--moves', type=int, default=10, help='number of moves to search')
+    parser.add_argument('--backends', nargs='+', default=['dict', 'array'])
+    opts = parser.parse_args()
+
+    ctx = multiprocessing.get_context('spawn')
+    results = []
+    for backend in opts.backends:
+        with ctx.Pool(1) as pool:
+            results.append(pool.apply(run, (backend, opts)))
+
+    print(f'{makeGame(opts)[1]}, {opts.sims} sims/move, {opts.moves} moves')
+    print(f'{"backend":>8} {"sims/sec":>10} {"nodes":>8} {"RSS MB":>8}')
+    for r in results:
+        print(f'{r["backend"]:>8} {r["sims/sec"]:>10.1f} {r["nodes"]:>8} {r["RSS MB"]:>8.1f}')
+
+
+if __name__ == '__main__':
+    main()
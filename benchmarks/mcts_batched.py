@@ -0,0 +1,66 @@
+"""
+Compares sequential MCTS with batched leaf evaluation (args.mctsBatchSize)
+in simulations per second, using the PyTorch Othello network with random
+weights so that the forward passes are realistic.
+
+Run from the repository root:
+    python benchmarks/mcts_batched.py --n 8 --sims 200 --batch-sizes 1 4 8 16
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import numpy as np
+
+from MCTS import MCTS
+from othello.OthelloGame import OthelloGame
+from othello.pytorch.NNet import NNetWrapper as NNet
+from utils import *
+
+
+def run(game, nnet, sims, moves, batchSize, virtualLoss):
+    np.random.seed(0)
+    args = dotdict({'numMCTSSims': sims, 'cpuct': 1.0, 'treeBackend': 'array',
+                    'mctsBatchSize': batchSize, 'virtualLoss': virtualLoss})
+    mcts = MCTS(game, nnet, args)
+
+    board, player = game.getInitBoard(), 1
+    start = time.perf_counter()
+    numSims = 0
+    for _ in range(moves):
+        if game.getGameEnded(board, player) != 0:
+            break
+        canonicalBoard = game.getCanonicalForm(board, player)
+        pi = mcts.getActionProb(canonicalBoard, temp=1)
+        numSims += sims
+        board, player = game.getNextState(board, player, np.random.choice(len(pi), p=pi))
+    return numSims / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--n', type=int, default=8, help='Othello board size')
+    parser.add_argument('--sims', type=int, default=200, help='MCTS simulations per move')
+    parser.add_argument('--moves', type=int, default=5, help='number of moves to search')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 4, 8, 16])
+    parser.add_argument('--virtual-loss', type=float, default=1.0)
+    opts = parser.parse_args()
+
+    game = OthelloGame(opts.n)
+    nnet = NNet(game)
+
+    print(f'Othello {opts.n}x{opts.n}, {opts.sims} sims/move, {opts.moves} moves')
+    print(f'{"batch":>6} {"sims/sec":>10} {"speedup":>8}')
+    baseline = None
+    for batchSize in opts.batch_sizes:
+        simsPerSec = run(game, nnet, opts.sims, opts.moves, batchSize, opts.virtual_loss)
+        baseline = baseline or simsPerSec
+        print(f'{batchSize:>6} {simsPerSec:>10.1f} {simsPerSec / baseline:>7.2f}x')
+
+
+if __name__ == '__main__':
+    main()
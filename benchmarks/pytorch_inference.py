@@ -0,0 +1,92 @@
+"""
+Compares the latency of NNetWrapper.predict of the PyTorch Othello network
+in its inference mode (eval mode kept between calls, a preallocated input
+tensor, torch.inference_mode and one host copy for both heads) with the
+previous implementation, which converted every board to float64 and then
+to a new float32 tensor, switched to eval mode on every call and copied the
+two heads to the host separately. With --exported it also times the
+network exported by TorchExport.py, served by ExportedNNet through
+TorchScript and, if onnxruntime is installed, ONNX Runtime. The networks
+have random weights.
+
+The per-call overhead matters most when the forward pass is cheap, so the
+number of channels can be reduced from the default of the wrapper.
+
+Run from the repository root:
+    python benchmarks/pytorch_inference.py --sizes 6 8 --calls 200
+    python benchmarks/pytorch_inference.py --sizes 6 8 --channels 64
+    python benchmarks/pytorch_inference.py --sizes 6 8 --exported
+"""
+
+import argparse
+import importlib.util
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import numpy as np
+import torch
+
+from othello.OthelloGame import OthelloGame
+from othello.pytorch import NNet
+from TorchExport import ExportedNNet, export
+
+
+def previousPredict(nnet, board):
+    """predict as it was before the inference mode."""
+    board = torch.FloatTensor(board.astype(np.float64))
+    if NNet.args.cuda: board = board.contiguous().cuda()
+    board = board.view(1, nnet.board_x, nnet.board_y)
+    nnet.nnet.eval()
+    with torch.no_grad():
+        pi, v = nnet.nnet(board)
+    return torch.exp(pi).data.cpu().numpy()[0], v.data.cpu().numpy()[0]
+
+
+def latency(fn, calls):
+    """Returns the mean time of fn in microseconds, after a few warm-up calls."""
+    for _ in range(3):
+        fn()
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[6, 8], help='Othello board sizes')
+    parser.add_argument('--channels', type=int, default=NNet.args.num_channels, help='channels of the network')
+    parser.add_argument('--calls', type=int, default=200, help='calls to time per measurement')
+    parser.add_argument('--exported', action='store_true', help='also time the exported network')
+    opts = parser.parse_args()
+
+    torch.manual_seed(0)
+    NNet.args.num_channels = opts.channels
+    print(f'{opts.channels} channels, {torch.get_num_threads()} threads, cuda {NNet.args.cuda}')
+    backends = ['inference']
+    if opts.exported:
+        backends.append('torchscript')
+        if importlib.util.find_spec('onnxruntime') is not None:
+            backends.append('onnx')
+    print(f'{"board":>6} {"previous us":>12}' + ''.join(f' {name + " us":>15}' for name in backends))
+    for n in opts.sizes:
+        game = OthelloGame(n)
+        nnet = NNet.NNetWrapper(game)
+        board = game.getInitBoard()
+        np.testing.assert_allclose(nnet.predict(board)[0], previousPredict(nnet, board)[0], rtol=1e-5)
+        nnets = [nnet]
+        if opts.exported:
+            paths = export(nnet, os.path.join(tempfile.mkdtemp(), 'othello'))
+            nnets += [ExportedNNet(game, path) for path in paths[:len(backends) - 1]]
+
+        previous = latency(lambda: previousPredict(nnet, board), opts.calls)
+        times = [latency(lambda: other.predict(board), opts.calls) for other in nnets]
+        print(f'{n}x{n:<4} {previous:>12.0f}' + ''.join(f' {t:>8.0f} {previous / t:>5.2f}x' for t in times))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""
+Reports the accuracy and speed of the int8 copy of the PyTorch Othello or
+Tafl network that NNetWrapper evaluates with args.quantize (see
+TorchExport.quantize), against the float32 network on the same weights.
+
+Both networks evaluate a stored set of positions, taken from random games
+and written to --positions on the first run, so that later runs, e.g. with
+another checkpoint, compare on the same boards. The report gives the
+difference of the policies (largest absolute difference, total variation
+distance, and how often both pick the same best move) and of the values,
+and the latency of predict for one board.
+
+Without --checkpoint the networks have random weights, whose nearly
+uniform policies understate the policy error; pass a trained checkpoint
+for representative numbers.
+
+Run from the repository root:
+    python benchmarks/quantization.py --size 6
+    python benchmarks/quantization.py --size 8 --checkpoint ./temp/best.pth.tar
+    python benchmarks/quantization.py --game tafl --variant Brandubh
+"""
+
+import argparse
+import os
+import pickle
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import numpy as np
+import torch
+
+
+def makeGame(opts):
+    if opts.game == 'othello':
+        from othello.OthelloGame import OthelloGame
+        from othello.pytorch import NNet
+        return OthelloGame(opts.size), NNet, f'Othello {opts.size}x{opts.size}'
+    from tafl.TaflGame import TaflGame
+    from tafl.pytorch import NNet
+    return TaflGame(opts.variant), NNet, f'Tafl {opts.variant}'
+
+
+def randomPositions(game, count, seed=0):
+    """Returns count canonical boards from random games."""
+    rng = np.random.RandomState(seed)
+    positions = []
+    board, player = game.getInitBoard(), 1
+    while len(positions) < count:
+        if game.getGameEnded(board, player) != 0:
+            board, player = game.getInitBoard(), 1
+        positions.append(game.getCanonicalForm(board, player))
+        action = rng.choice(np.flatnonzero(game.getValidMoves(board, player)))
+        board, player = game.getNextState(board, player, action)
+    return positions
+
+
+def loadPositions(game, path, count):
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    positions = randomPositions(game, count)
+    with open(path, 'wb') as f:
+        pickle.dump(positions, f)
+    return positions
+
+
+def latency(nnet, board, calls):
+    """Returns the mean time of predict in microseconds, after a few warm-up calls."""
+    for _ in range(3):
+        nnet.predict(board)
+    start = time.perf_counter()
+    for _ in range(calls):
+        nnet.predict(board)
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--game', choices=['othello', 'tafl'], default='othello')
+    parser.add_argument('--size', type=int, default=8, help='Othello board size')
+    parser.add_argument('--variant', default='Brandubh', help='Tafl variant')
+    parser.add_argument('--checkpoint', help='.pth.tar file saved by NNetWrapper.save_checkpoint')
+    parser.add_argument('--channels', type=int, help='channels of the network, the default of the wrapper if not given')
+    parser.add_argument('--positions', help='file with the stored positions, created if missing')
+    parser.add_argument('--count', type=int, default=256, help='number of positions to store')
+    parser.add_argument('--calls', type=int, default=50, help='calls to time per measurement')
+    opts = parser.parse_args()
+
+    game, NNet, name = makeGame(opts)
+    if opts.channels:
+        NNet.args.num_channels = opts.channels
+    NNet.args.cuda = False
+    torch.manual_seed(0)
+
+    nnet = NNet.NNetWrapper(game)
+    if opts.checkpoint:
+        nnet.load_checkpoint(*os.path.split(opts.checkpoint))
+    NNet.args.quantize = True
+    quantized = NNet.NNetWrapper(game)
+    quantized.nnet.load_state_dict(nnet.nnet.state_dict())
+    quantized.update_inference_nnet()
+
+    path = opts.positions or os.path.join(os.path.dirname(os.path.abspath(__file__)), f'positions_{name.replace(" ", "_")}.pkl')
+    positions = loadPositions(game, path, opts.count)
+    pis, vs = nnet.predict_batch(positions)
+    qpis, qvs = quantized.predict_batch(positions)
+
+    print(f'{name}, {NNet.args.num_channels} channels, {len(positions)} positions from {path}')
+    print(f'policy: max abs diff {np.abs(qpis - pis).max():.5f}, '
+          f'mean total variation {0.5 * np.abs(qpis - pis).sum(axis=1).mean():.5f}, '
+          f'same best move {np.mean(qpis.argmax(axis=1) == pis.argmax(axis=1)):.1%}')
+    print(f'value:  max abs diff {np.abs(qvs - vs).max():.5f}, mean abs diff {np.abs(qvs - vs).mean():.5f}')
+    fp32 = latency(nnet, positions[0], opts.calls)
+    int8 = latency(quantized, positions[0], opts.calls)
+    print(f'predict: float32 {fp32:.0f} us, int8 {int8:.0f} us, {fp32 / int8:.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+import numpy as np
+
+
+class BitBoard():
+    """
+    Connect4 bitboards with height-padded columns: the square in column c that
+    is r rows above the bottom is bit c*(height+1)+r. The extra bit on top of
+    every column always stays empty, so runs of bits along any of the four
+    line directions (shifts of 1, height, height+1 and height+2) never wrap
+    from one column into the next. Adding the bottom bit of a column to the
+    bitboard of all stones carries into the lowest empty square of the
+    column, so a drop takes a single addition. Python integers have arbitrary precision,
+    so every board size works.
+    """
+
+    def __init__(self, height, width, win_length):
+        self.height = height
+        self.width = width
+        self.win_length = win_length
+        self.stride = stride = height + 1
+        # vertical, diagonal /, horizontal, diagonal \
+        self.steps = (1, height, stride, height + 2)
+        self.bottom = [1 << (c * stride) for c in range(width)]
+        self.columns = [((1 << height) - 1) << (c * stride) for c in range(width)]
+        self.top = [1 << (c * stride + height - 1) for c in range(width)]
+        self.allTop = sum(self.top)
+        # bit index of every square of the numpy board, whose row 0 is the top
+        rows, cols = np.indices((height, width))
+        self.bitIndex = (cols * stride + height - 1 - rows).ravel()
+        self.numBits = width * stride
+
+    def fromArray(self, board, color):
+        """Returns the bitboard of the pieces of color."""
+        bits = np.zeros(self.numBits, dtype=bool)
+        bits[self.bitIndex] = np.asarray(board).ravel() == color
+        return int.from_bytes(np.packbits(bits, bitorder='little').tobytes(), 'little')
+
+    def drop(self, occupied, column):
+        """Returns the bit of the square a stone dropped into column lands on, 0 if the column is full."""
+        return (occupied + self.bottom[column]) & self.columns[column]
+
+    def valid_moves(self, occupied):
+        """Returns a boolean array of the columns whose top square is empty."""
+        return np.array([not occupied & top for top in self.top])
+
+    def is_win(self, bb):
+        """Checks all lines of bb for win_length stones in a row."""
+        for step in self.steps:
+            run = bb
+            for i in range(1, self.win_length):
+                run &= bb >> (i * step)
+            if run:
+                return True
+        return False
+
+    def is_win_at(self, bb, bit):
+        """Checks only the lines through the stone bit, e.g. the last one played."""
+        for step in self.steps:
+            length = 1
+            x = bit >> step
+            while x & bb:
+                length += 1
+                x >>= step
+            x = bit << step
+            while x & bb:
+                length += 1
+                x <<= step
+            if length >= self.win_length:
+                return True
+        return False
@@ -3,6 +3,8 @@ import numpy as np
 
 sys.path.append('..')
 from Game import Game
+from Zobrist import HashedBoard, ZobristTable
+from .Connect4Bitboard import BitBoard
 from .Connect4Logic import Board
 
 
@@ -11,9 +13,22 @@ class Connect4Game(Game):
     Connect4 Game class implementing the alpha-zero-general Game interface.
     """
 
-    def __init__(self, height=None, width=None, win_length=None, np_pieces=None):
+    def __init__(self, height=None, width=None, win_length=None, np_pieces=None, bitboard=False):
+        """
+        With bitboard=True, the game is played on bitboards (see
+        Connect4Bitboard.py). Boards are still numpy arrays, but the boards
+        returned by getNextState and getCanonicalForm carry their bitboards
+        (see HashedBoard): a drop updates them with one addition, and the
+        valid moves and draws are read from the top squares. getNextState
+        only checks the lines through the stone it drops and records the
+        winner on the board it returns, so that getGameEnded does not have to
+        look at the board again.
+        """
         Game.__init__(self)
         self._base_board = Board(height, width, win_length, np_pieces)
+        self.zobrist = ZobristTable(self.getBoardSize(), (-1, 0, 1))
+        b = self._base_board
+        self.bitboard = BitBoard(b.height, b.width, b.win_length) if bitboard else None
 
     def getInitBoard(self):
         return self._base_board.np_pieces
@@ -26,15 +41,72 @@ class Connect4Game(Game):
 
     def getNextState(self, board, player, action):
         """Returns a copy of the board with updated move, original board is unmodified."""
+        if self.bitboard:
+            return self._getNextStateBitboard(board, player, action)
         b = self._base_board.with_np_pieces(np_pieces=np.copy(board))
         b.add_stone(action, player)
-        return b.np_pieces, -player
+        return self.zobrist.update(board, b.np_pieces), -player
+
+    def _getNextStateBitboard(self, board, player, action):
+        own, opp = self._getBits(board, player)
+        bit = self.bitboard.drop(own | opp, action)
+        if not bit:
+            raise ValueError("Can't play column %s on board %s" % (action, board))
+        row = self.bitboard.height - 1 - (bit.bit_length() - 1) % self.bitboard.stride
+        pieces = np.copy(board)
+        pieces[row, action] = player
+        nextBoard = self.zobrist.update(board, pieces)
+        own |= bit
+        nextBoard.bits = (own, opp) if player == 1 else (opp, own)
+
+        # only the lines through the new stone can have become a win
+        winner = getattr(board, 'winner', None)
+        if self.bitboard.is_win_at(own, bit):
+            winner = player
+        elif winner is None:
+            winner = self._getWinner(own, opp, player)
+        nextBoard.winner = winner
+        return nextBoard, -player
+
+    def _getBits(self, board, player):
+        """
+        Returns the bitboards (own, opp) of board seen by player: the ones it
+        carries, or else the ones read from the array, which are then cached
+        on it if it is a HashedBoard.
+        """
+        bits = getattr(board, 'bits', None)
+        if bits is None:
+            bits = (self.bitboard.fromArray(board, 1), self.bitboard.fromArray(board, -1))
+            if isinstance(board, HashedBoard):
+                board.bits = bits
+        return bits if player == 1 else bits[::-1]
+
+    def _getWinner(self, own, opp, player):
+        if self.bitboard.is_win(own):
+            return player
+        if self.bitboard.is_win(opp):
+            return -player
+        return 0
 
     def getValidMoves(self, board, player):
         "Any zero value in top row in a valid move"
+        if self.bitboard:
+            own, opp = self._getBits(board, player)
+            return self.bitboard.valid_moves(own | opp)
         return self._base_board.with_np_pieces(np_pieces=board).get_valid_moves()
 
     def getGameEnded(self, board, player):
+        if self.bitboard:
+            own, opp = self._getBits(board, player)
+            winner = getattr(board, 'winner', None)
+            if winner is None:
+                winner = self._getWinner(own, opp, player)
+            if winner:
+                return 1 if winner == player else -1
+            if (own | opp) & self.bitboard.allTop == self.bitboard.allTop:
+                # draw has very little value.
+                return 1e-4
+            return 0
         b = self._base_board.with_np_pieces(np_pieces=board)
         winstate = b.get_win_state()
         if winstate.is_ended:
@@ -53,7 +125,11 @@ class Connect4Game(Game):
 
     def getCanonicalForm(self, board, player):
         # Flip player from 1 to -1
-        return board * player
+        canonicalBoard = self.zobrist.canonical(board, player)
+        winner = getattr(board, 'winner', None)
+        if winner is not None:
+            canonicalBoard.winner = winner * player
+        return canonicalBoard
 
     def getSymmetries(self, board, pi):
         """Board is left/right board symmetric"""
@@ -62,6 +138,9 @@ class Connect4Game(Game):
     def stringRepresentation(self, board):
         return board.tostring()
 
+    def getHash(self, board):
+        return int(self.zobrist.hash(board)[0])
+
     @staticmethod
     def display(board):
         print(" -----------------------")
@@ -9,6 +9,7 @@ import sys
 sys.path.append('../..')
 from utils import *
 from NeuralNet import NeuralNet
+from KerasPredictor import KerasPredictor
 
 import logging
 import coloredlogs
@@ -31,6 +32,7 @@ args = dotdict({
 class NNetWrapper(NeuralNet):
     def __init__(self, game):
         self.nnet = onnet(game, args)
+        self.predictor = KerasPredictor(self.nnet.model)
         self.nnet.model.summary()
         self.board_x, self.board_y = game.getBoardSize()
         self.action_size = game.getActionSize()
@@ -56,11 +58,22 @@ class NNetWrapper(NeuralNet):
         board = board[np.newaxis, :, :]
 
         # run
-        pi, v = self.nnet.model.predict(board, verbose=False)
+        pi, v = self.predictor(board)
 
         #print('PREDICTION TIME TAKEN : {0:03f}'.format(time.time()-start))
         return pi[0], v[0]
 
+    def predict_batch(self, boards):
+        """
+        boards: list of np arrays with boards
+        """
+        # preparing input
+        boards = np.asarray(boards)
+
+        # run
+        pi, v = self.predictor(boards)
+        return pi, v[:, 0]
+
     def save_checkpoint(self, folder='checkpoint', filename='checkpoint.pth.tar'):
         # change extension
         filename = filename.split(".")[0] + ".h5"
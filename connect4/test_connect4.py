@@ -7,15 +7,16 @@ from collections import namedtuple
 import textwrap
 import numpy as np
 
+from test_utils import random_positions
 from .Connect4Game import Connect4Game
 
 # Tuple of (Board, Player, Game) to simplify testing.
 BPGTuple = namedtuple('BPGTuple', 'board player game')
 
 
-def init_board_from_moves(moves, height=None, width=None):
+def init_board_from_moves(moves, height=None, width=None, bitboard=False):
     """Returns a BPGTuple based on series of specified moved."""
-    game = Connect4Game(height=height, width=width)
+    game = Connect4Game(height=height, width=width, bitboard=bitboard)
     board, player = game.getInitBoard(), 1
     for move in moves:
         board, player = game.getNextState(board, player, move)
@@ -42,15 +43,16 @@ def test_simple_moves():
 
 def test_overfull_column():
     for height in range(1, 10):
-        # Fill to max height is ok
-        init_board_from_moves([4] * height, height=height)
+        for bitboard in (False, True):
+            # Fill to max height is ok
+            init_board_from_moves([4] * height, height=height, bitboard=bitboard)
 
-        # Check overfilling causes an error.
-        try:
-            init_board_from_moves([4] * (height + 1), height=height)
-            assert False, "Expected error when overfilling column"
-        except ValueError:
-            pass  # Expected.
+            # Check overfilling causes an error.
+            try:
+                init_board_from_moves([4] * (height + 1), height=height, bitboard=bitboard)
+                assert False, "Expected error when overfilling column"
+            except ValueError:
+                pass  # Expected.
 
 
 def test_get_valid_moves():
@@ -64,8 +66,9 @@ def test_get_valid_moves():
     ]
 
     for moves, expected_valid in move_valid_pairs:
-        board, player, game = init_board_from_moves(moves)
-        assert (np.array(expected_valid) == game.getValidMoves(board, player)).all()
+        for bitboard in (False, True):
+            board, player, game = init_board_from_moves(moves, bitboard=bitboard)
+            assert (np.array(expected_valid) == game.getValidMoves(board, player)).all()
 
 
 def test_symmetries():
@@ -165,3 +168,77 @@ def test_immutable_move():
 
     assert original_board_string == game.stringRepresentation(board)
     assert original_board_string != game.stringRepresentation(new_np_pieces)
+
+
+def check_bitboard_matches_default(height, width, win_length, num_games):
+    """Checks that the bitboard backend agrees with the default one on random games."""
+    game = Connect4Game(height, width, win_length)
+    bitboard_game = Connect4Game(height, width, win_length, bitboard=True)
+    bits = bitboard_game.bitboard
+    for board, player, ended in random_positions(bitboard_game, num_games, seed=height * width + win_length):
+        if getattr(board, 'bits', None) is not None:
+            # the bitboards updated by the drops match the array
+            assert board.bits == (bits.fromArray(board, 1), bits.fromArray(board, -1))
+        # with the winner recorded by getNextState and from scratch
+        assert game.getGameEnded(np.array(board), player) == ended
+        assert bitboard_game.getGameEnded(np.array(board), player) == ended
+        assert bitboard_game.getGameEnded(bitboard_game.getCanonicalForm(board, player), 1) == \
+            game.getGameEnded(game.getCanonicalForm(np.array(board), player), 1)
+        if ended:
+            continue
+        valids = game.getValidMoves(board, player)
+        np.testing.assert_array_equal(bitboard_game.getValidMoves(board, player), valids)
+        for action in np.flatnonzero(valids):
+            np.testing.assert_array_equal(bitboard_game.getNextState(board, player, action)[0],
+                                          game.getNextState(np.array(board), player, action)[0])
+
+
+def test_bitboard_matches_default():
+    for height, width, win_length in [(6, 7, 4), (5, 5, 3), (8, 9, 5), (4, 4, 4)]:
+        check_bitboard_matches_default(height, width, win_length, 20)
+
+
+def test_bitboard_last_move_inside_diagonal():
+    # the stone dropped into column 2 completes the diagonal from (5,0) to (2,3)
+    board = np.array([[0, 0, 0, 0, 0, 0, 0],
+                      [0, 0, 0, 0, 0, 0, 0],
+                      [0, 0, 0, 1, 0, 0, 0],
+                      [0, 0, 0, -1, 0, 0, 0],
+                      [0, 1, -1, -1, 0, 0, 0],
+                      [1, -1, -1, 1, 0, 0, 0]])
+    for game in (Connect4Game(), Connect4Game(bitboard=True)):
+        assert game.getGameEnded(board, 1) == 0
+        next_board, player = game.getNextState(board, 1, 2)
+        assert next_board[3, 2] == 1
+        assert game.getGameEnded(next_board, player) == -1
+        assert game.getGameEnded(np.array(next_board), player) == -1
+
+
+def test_bitboard_draw_and_column_padding():
+    game = Connect4Game(4, 4, 4, bitboard=True)
+    full = np.array([[1, 1, -1, -1],
+                     [-1, -1, 1, 1],
+                     [1, 1, -1, -1],
+                     [-1, -1, 1, 1]])
+    assert game.getGameEnded(full, 1) == 1e-4
+    assert not game.getValidMoves(full, 1).any()
+    # the top two stones of column 0 and the bottom two of column 1 are
+    # consecutive bits but for the empty padding bit between the columns
+    board = np.array([[1, 0, 0, 0],
+                      [1, 0, 0, 0],
+                      [-1, 1, 0, 0],
+                      [-1, 1, 0, 0]])
+    assert game.getGameEnded(board, 1) == 0
+    assert game.getGameEnded(board, 1) == Connect4Game(4, 4, 4).getGameEnded(board, 1)
+
+
+def test_bitboard_overfull_column():
+    game = Connect4Game(height=3, bitboard=True)
+    board, player = game.getInitBoard(), 1
+    for _ in range(3):
+        board, player = game.getNextState(board, player, 2)
+    try:
+        game.getNextState(board, player, 2)
+        assert False, "Expected error when overfilling column"
+    except ValueError:
+        pass  # Expected.
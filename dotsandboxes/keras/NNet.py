@@ -4,6 +4,7 @@ import os
 sys.path.append('..')
 from utils import dotdict
 from NeuralNet import NeuralNet
+from KerasPredictor import KerasPredictor
 
 from .DotsAndBoxesNNet import DotsAndBoxesNNet as onnet
 
@@ -37,6 +38,7 @@ def normalize_score(board):
 class NNetWrapper(NeuralNet):
     def __init__(self, game):
         self.nnet = onnet(game, args)
+        self.predictor = KerasPredictor(self.nnet.model)
         self.board_x, self.board_y = game.getBoardSize()
         self.action_size = game.getActionSize()
 
@@ -62,10 +64,21 @@ class NNetWrapper(NeuralNet):
         board = board[np.newaxis, :, :]
         normalize_score(board)
 
-        pi, v = self.nnet.model.predict(board, verbose=False)
+        pi, v = self.predictor(board)
 
         return pi[0], v[0]
 
+    def predict_batch(self, boards):
+        """
+        boards: list of np arrays with boards
+        """
+        boards = np.array(boards)
+        normalize_score(boards)
+
+        pi, v = self.predictor(boards)
+
+        return pi, v[:, 0]
+
     def save_checkpoint(self, folder='checkpoint', filename='checkpoint.pth.tar'):
         # change extension
         filename = filename.split(".")[0] + ".h5"
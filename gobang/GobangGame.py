@@ -3,13 +3,22 @@ import sys
 sys.path.append('..')
 from Game import Game
 from .GobangLogic import Board
+from Zobrist import ZobristTable
 import numpy as np
 
 
 class GobangGame(Game):
+    """
+    getNextState checks only the lines through the stone it places and
+    records the winner on the board it returns, so that getGameEnded does not
+    have to scan the whole board. Boards without a recorded winner, e.g. ones
+    built by hand, are scanned with Board.get_winner.
+    """
+
     def __init__(self, n=15, nir=5):
         self.n = n
         self.n_in_row = nir
+        self.zobrist = ZobristTable((n, n), (-1, 0, 1))
 
     def getInitBoard(self):
         # return initial board (numpy board)
@@ -33,7 +42,14 @@ class GobangGame(Game):
         b.pieces = np.copy(board)
         move = (int(action / self.n), action % self.n)
         b.execute_move(move, player)
-        return (b.pieces, -player)
+        nextBoard = self.zobrist.update(board, b.pieces)
+        winner = getattr(board, 'winner', None)
+        if b.is_win_at(move, self.n_in_row):
+            winner = player
+        elif winner is None:
+            winner = b.get_winner(self.n_in_row)
+        nextBoard.winner = winner
+        return (nextBoard, -player)
 
     # modified
     def getValidMoves(self, board, player):
@@ -54,30 +70,23 @@ class GobangGame(Game):
         # return 0 if not ended, 1 if player 1 won, -1 if player 1 lost
         # player = 1
         b = Board(self.n)
-        b.pieces = np.copy(board)
-        n = self.n_in_row
-
-        for w in range(self.n):
-            for h in range(self.n):
-                if (w in range(self.n - n + 1) and board[w][h] != 0 and
-                        len(set(board[i][h] for i in range(w, w + n))) == 1):
-                    return board[w][h]
-                if (h in range(self.n - n + 1) and board[w][h] != 0 and
-                        len(set(board[w][j] for j in range(h, h + n))) == 1):
-                    return board[w][h]
-                if (w in range(self.n - n + 1) and h in range(self.n - n + 1) and board[w][h] != 0 and
-                        len(set(board[w + k][h + k] for k in range(n))) == 1):
-                    return board[w][h]
-                if (w in range(self.n - n + 1) and h in range(n - 1, self.n) and board[w][h] != 0 and
-                        len(set(board[w + l][h - l] for l in range(n))) == 1):
-                    return board[w][h]
+        b.pieces = board
+        winner = getattr(board, 'winner', None)
+        if winner is None:
+            winner = b.get_winner(self.n_in_row)
+        if winner:
+            return winner
         if b.has_legal_moves():
             return 0
         return 1e-4
 
     def getCanonicalForm(self, board, player):
         # return state if player==1, else return -state if player==-1
-        return player * board
+        canonicalBoard = self.zobrist.canonical(board, player)
+        winner = getattr(board, 'winner', None)
+        if winner is not None:
+            canonicalBoard.winner = winner * player
+        return canonicalBoard
 
     # modified
     def getSymmetries(self, board, pi):
@@ -100,6 +109,9 @@ class GobangGame(Game):
         # 8x8 numpy array (canonical board)
         return board.tostring()
 
+    def getHash(self, board):
+        return int(self.zobrist.hash(board)[0])
+
     @staticmethod
     def display(board):
         n = board.shape[0]
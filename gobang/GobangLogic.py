@@ -10,7 +10,14 @@ Board data:
 Squares are stored and manipulated as (x,y) tuples.
 x is the column, y is the row.
 '''
+import numpy as np
+
+
 class Board():
+
+    # the four line directions, as (x,y) offsets
+    __directions = [(1,0),(0,1),(1,1),(1,-1)]
+
     def __init__(self, n):
         "Set up initial board configuration."
         self.n = n
@@ -39,13 +46,49 @@ class Board():
     def has_legal_moves(self):
         """Returns True if has legal move else False
         """
-        # Get all empty locations.
-        for y in range(self.n):
-            for x in range(self.n):
-                if self[x][y] == 0:
-                    return True
+        return bool((np.asarray(self.pieces) == 0).any())
+
+    def is_win_at(self, move, n_in_row):
+        """Returns True if the stone on move is part of n_in_row stones of
+        its color in a line. Only these lines can be completed by a move.
+        """
+        (x,y) = move
+        color = self[x][y]
+        if color == 0:
+            return False
+        for dx, dy in self.__directions:
+            length = 1
+            for sign in (1, -1):
+                i, j = x + sign*dx, y + sign*dy
+                while 0 <= i < self.n and 0 <= j < self.n and self[i][j] == color:
+                    length += 1
+                    i, j = i + sign*dx, j + sign*dy
+            if length >= n_in_row:
+                return True
         return False
 
+    def get_winner(self, n_in_row):
+        """Returns the color with n_in_row stones in a line, 0 if none.
+        Sums the n_in_row shifted copies of the board along each line
+        direction, i.e. convolves it with a line of ones, so a window that
+        sums to +-n_in_row holds a line of a single color.
+        """
+        pieces = np.asarray(self.pieces)
+        n, k = self.n, n_in_row
+        if k > n:
+            return 0
+        m = n - k + 1
+        windows = [
+            sum(pieces[i:i+m, :] for i in range(k)),
+            sum(pieces[:, i:i+m] for i in range(k)),
+            sum(pieces[i:i+m, i:i+m] for i in range(k)),
+            sum(pieces[i:i+m, k-1-i:n-i] for i in range(k)),
+        ]
+        for color in (1, -1):
+            if any((w == color * k).any() for w in windows):
+                return color
+        return 0
+
     def execute_move(self, move, color):
         """Perform the given move on the board; flips pieces as necessary.
         color gives the color pf the piece to play (1=white,-1=black)
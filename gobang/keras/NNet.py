@@ -10,6 +10,7 @@ import tensorflow as tf
 sys.path.append('..')
 from utils import *
 from NeuralNet import NeuralNet
+from KerasPredictor import KerasPredictor
 
 import argparse
 from .GobangNNet import GobangNNet as onnet
@@ -28,6 +29,7 @@ args = dotdict({
 class NNetWrapper(NeuralNet):
     def __init__(self, game):
         self.nnet = onnet(game, args)
+        self.predictor = KerasPredictor(self.nnet.model)
         self.board_x, self.board_y = game.getBoardSize()
         self.action_size = game.getActionSize()
 
@@ -51,11 +53,22 @@ class NNetWrapper(NeuralNet):
         # preparing input
         board = board[np.newaxis, :, :]
         
-        pi, v = self.nnet.model.predict(board, verbose=False)
+        pi, v = self.predictor(board)
 
         #print('PREDICTION TIME TAKEN : {0:03f}'.format(time.time()-start))
         return pi[0], v[0]
 
+    def predict_batch(self, boards):
+        """
+        boards: list of np arrays with boards
+        """
+        # preparing input
+        boards = np.asarray(boards)
+
+        # run
+        pi, v = self.predictor(boards)
+        return pi, v[:, 0]
+
     def save_checkpoint(self, folder='checkpoint', filename='checkpoint.pth.tar'):
         # change extension
         filename = filename.split(".")[0] + ".h5"
@@ -0,0 +1,91 @@
+"""
+To run tests:
+pytest-3 gobang
+"""
+
+import numpy as np
+
+from test_utils import random_positions
+from .GobangGame import GobangGame
+from .GobangLogic import Board
+
+
+def scan_winner(board, n_in_row):
+    """Returns the color with n_in_row stones in a line by checking every cell."""
+    n = len(board)
+    for w in range(n):
+        for h in range(n):
+            color = board[w][h]
+            if color == 0:
+                continue
+            for dw, dh in [(1, 0), (0, 1), (1, 1), (1, -1)]:
+                cells = [(w + k * dw, h + k * dh) for k in range(n_in_row)]
+                if all(0 <= i < n and 0 <= j < n and board[i][j] == color for i, j in cells):
+                    return color
+    return 0
+
+
+def check_winner_matches_scan(n, n_in_row, num_games):
+    game = GobangGame(n, n_in_row)
+    for board, player, ended in random_positions(game, num_games, seed=n * n_in_row):
+        winner = scan_winner(board, n_in_row)
+        # with and without the winner recorded by getNextState
+        assert game.getGameEnded(np.array(board), player) == ended
+        if winner:
+            assert ended == winner
+            assert game.getGameEnded(game.getCanonicalForm(board, player), 1) == winner * player
+        elif ended:
+            assert ended == 1e-4 and not (board == 0).any()
+
+
+def test_winner_matches_scan():
+    for n, n_in_row in [(15, 5), (6, 4), (5, 5), (4, 3)]:
+        check_winner_matches_scan(n, n_in_row, 20)
+
+
+def test_get_winner_lines():
+    n, n_in_row = 7, 4
+    lines = [
+        [(x, 2) for x in range(3, 7)],
+        [(1, y) for y in range(0, 4)],
+        [(k, k + 1) for k in range(2, 6)],
+        [(k, 6 - k) for k in range(3, 7)],
+    ]
+    for color in (1, -1):
+        for line in lines:
+            b = Board(n)
+            b.pieces = np.zeros((n, n))
+            for move in line[:-1]:
+                b.execute_move(move, color)
+            assert b.get_winner(n_in_row) == 0
+            assert not b.is_win_at(line[-2], n_in_row)
+            b.execute_move(line[-1], color)
+            assert b.get_winner(n_in_row) == color
+            for move in line:
+                assert b.is_win_at(move, n_in_row)
+
+
+def test_last_move_fills_gap():
+    game = GobangGame(7, 5)
+    board = np.zeros((7, 7))
+    for y in (0, 1, 3, 4):
+        board[3, y] = 1
+    board[2, 2] = board[4, 2] = -1
+    assert game.getGameEnded(board, 1) == 0
+    # the stone at (3,2) is in the middle of the five
+    next_board, player = game.getNextState(board, 1, 3 * 7 + 2)
+    assert next_board.winner == 1
+    assert game.getGameEnded(next_board, player) == 1
+    assert game.getGameEnded(np.array(next_board), player) == 1
+
+
+def test_full_board_draw():
+    game = GobangGame(4, 3)
+    board = np.array([[1, 1, -1, -1],
+                      [-1, -1, 1, 1],
+                      [1, 1, -1, -1],
+                      [-1, -1, 1, 0]])
+    next_board, player = game.getNextState(board, 1, 15)
+    assert next_board.winner == 0
+    assert game.getGameEnded(next_board, player) == 1e-4
+    assert game.getGameEnded(np.array(next_board), player) == 1e-4
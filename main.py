@@ -20,6 +20,22 @@ args = dotdict({
     'numMCTSSims': 25,          # Number of games moves for MCTS to simulate.
     'arenaCompare': 40,         # Number of games to play during arena play to determine if new net will be accepted.
     'cpuct': 1,
+    'treeBackend': 'dict',      # MCTS statistics storage: 'dict' keyed by (s,a) or 'array' with one NumPy row per node.
+    'mctsBatchSize': 1,         # Leaves evaluated per network call during MCTS; > 1 needs treeBackend 'array'.
+    'virtualLoss': 1.0,         # Value subtracted per pending visit to spread a batch over different paths.
+    'lockstepGames': 1,         # Self-play games advanced together, sharing one network call per step; > 1 needs treeBackend 'array'.
+    'selfPlayWorkers': 1,       # Worker processes playing self-play episodes in parallel.
+    'seed': 0,                  # Base seed of the parallel self-play episodes.
+    'reuseTree': False,         # Keep the subtree of the position reached and only top it up to numMCTSSims simulations.
+    'maxTreeNodes': None,       # Nodes an MCTS keeps after each move (None: unbounded); 'maxTreeBytes' caps the estimated size instead.
+    'treeEviction': 'lru',      # Nodes dropped first: 'lru' least recently visited, 'generation' oldest.
+    'nnetCacheSize': 0,         # Network evaluations remembered across searches until the weights change (0: no cache).
+    'hashStates': False,        # Key MCTS nodes by the 64-bit game.getHash instead of game.stringRepresentation.
+    'arenaWorkers': 1,          # Worker processes playing the arena games in parallel.
+    'arenaEarlyStop': None,     # None plays all arenaCompare games, 'certain' stops once the outcome is fixed, 'sprt' also stops on a sequential test.
+    'sprtDelta': 0.1,           # The SPRT tests a win rate of updateThreshold - sprtDelta against updateThreshold + sprtDelta,
+    'sprtAlpha': 0.05,          # with these false acceptance
+    'sprtBeta': 0.05,           # and false rejection rates.
 
     'checkpoint': './temp/',
     'load_model': False,
@@ -0,0 +1,111 @@
+'''
+Bitboard move generation for Othello.
+Board data:
+  a board is a pair of integers (own, opp) with one bit per square for the
+  pieces of the player to move and of the opponent. Square (x,y) is bit
+  x*n+y, which is also the action of a move to that square. Python integers
+  have arbitrary precision, so every board size works; for n <= 8 the boards
+  fit in 64 bits.
+Moves and flips are found by shifting whole bitboards one square at a time
+in each of the 8 directions, masking off the squares that wrapped around an
+edge of the board.
+'''
+import numpy as np
+
+
+class BitBoard():
+
+    # list of all 8 directions on the board, as (x,y) offsets
+    __directions = [(1,1),(1,0),(1,-1),(0,-1),(-1,-1),(-1,0),(-1,1),(0,1)]
+
+    def __init__(self, n):
+        self.n = n
+        self.full = (1 << (n*n)) - 1
+        # squares that stay on the board after a step in each direction
+        noFirstColumn = sum(1 << (x*n+y) for x in range(n) for y in range(1, n))
+        noLastColumn = sum(1 << (x*n+y) for x in range(n) for y in range(n-1))
+        self.steps = []
+        for dx, dy in self.__directions:
+            mask = self.full
+            if dy == 1:
+                mask = noFirstColumn
+            elif dy == -1:
+                mask = noLastColumn
+            self.steps.append((dx*n+dy, mask))
+        self.numBytes = (n*n + 7) // 8
+
+    def shift(self, bb, step):
+        shift, mask = step
+        if shift > 0:
+            return (bb << shift) & mask
+        return (bb >> -shift) & mask
+
+    def fromArray(self, board, color):
+        """Returns the bitboards (own, opp) of board seen by color."""
+        flat = np.asarray(board).ravel()
+        own = int.from_bytes(np.packbits(flat == color, bitorder='little').tobytes(), 'little')
+        opp = int.from_bytes(np.packbits(flat == -color, bitorder='little').tobytes(), 'little')
+        return own, opp
+
+    def toArray(self, own, opp, color, dtype=int):
+        """Returns the n x n array with the pieces of own as color and opp as -color."""
+        return ((self.unpack(own) - self.unpack(opp)) * color).astype(dtype).reshape(self.n, self.n)
+
+    def unpack(self, bb):
+        """Returns the bits of bb as an array of length n*n."""
+        bits = np.frombuffer(bb.to_bytes(self.numBytes, 'little'), dtype=np.uint8)
+        return np.unpackbits(bits, bitorder='little')[:self.n*self.n].astype(np.int8)
+
+    @staticmethod
+    def squares(bb):
+        """Returns the squares of the bits of bb, e.g. the few a move changes."""
+        squares = []
+        while bb:
+            low = bb & -bb
+            squares.append(low.bit_length() - 1)
+            bb ^= low
+        return squares
+
+    def get_legal_moves(self, own, opp):
+        """Returns the bitboard of the squares where the player to move can play."""
+        empty = ~(own | opp) & self.full
+        moves = 0
+        for shift, mask in self.steps:
+            # runs of opponent pieces that start next to one of our pieces,
+            # with the shifts written out as this is the innermost loop of MCTS
+            oppMask = opp & mask
+            if shift > 0:
+                run = (own << shift) & oppMask
+                for _ in range(self.n - 3):
+                    run |= (run << shift) & oppMask
+                moves |= (run << shift) & mask & empty
+            else:
+                run = (own >> -shift) & oppMask
+                for _ in range(self.n - 3):
+                    run |= (run >> -shift) & oppMask
+                moves |= (run >> -shift) & mask & empty
+        return moves
+
+    def get_flips(self, own, opp, move):
+        """Returns the bitboard of the pieces flipped by playing the square bit move."""
+        flips = 0
+        for step in self.steps:
+            run = 0
+            x = self.shift(move, step)
+            while x & opp:
+                run |= x
+                x = self.shift(x, step)
+            if x & own:
+                flips |= run
+        return flips
+
+    def execute_move(self, own, opp, action):
+        """Returns the bitboards (own, opp) after the player to move plays action."""
+        move = 1 << int(action)
+        flips = self.get_flips(own, opp, move)
+        assert flips, 'move %d does not flip any piece' % action
+        return own | move | flips, opp & ~flips
+
+    @staticmethod
+    def count(bb):
+        return bin(bb).count('1')
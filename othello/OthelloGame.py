@@ -3,6 +3,8 @@ import sys
 sys.path.append('..')
 from Game import Game
 from .OthelloLogic import Board
+from .OthelloBitboard import BitBoard
+from Zobrist import HashedBoard, ZobristTable
 import numpy as np
 
 class OthelloGame(Game):
@@ -16,8 +18,18 @@ class OthelloGame(Game):
     def getSquarePiece(piece):
         return OthelloGame.square_content[piece]
 
-    def __init__(self, n):
+    def __init__(self, n, bitboard=False):
+        """
+        With bitboard=True, moves are generated and executed on bitboards (see
+        OthelloBitboard.py). Boards are still numpy arrays, so players and
+        neural networks see no difference, but the boards returned by
+        getNextState and getCanonicalForm carry their bitboards (see
+        HashedBoard), so that the moves and the end of the game are found
+        without reading the array again.
+        """
         self.n = n
+        self.zobrist = ZobristTable((n, n), (-1, 0, 1))
+        self.bitboard = BitBoard(n) if bitboard else None
 
     def getInitBoard(self):
         # return initial board (numpy board)
@@ -37,14 +49,31 @@ class OthelloGame(Game):
         # action must be a valid move
         if action == self.n*self.n:
             return (board, -player)
+        if self.bitboard:
+            own, opp = self._getBits(board, player)
+            nextOwn, nextOpp = self.bitboard.execute_move(own, opp, action)
+            # only the new piece and the flipped ones change
+            pieces = np.array(board)
+            pieces.flat[self.bitboard.squares(nextOwn ^ own)] = player
+            nextBoard = self.zobrist.update(board, pieces)
+            nextBoard.bits = (nextOwn, nextOpp) if player == 1 else (nextOpp, nextOwn)
+            return (nextBoard, -player)
         b = Board(self.n)
         b.pieces = np.copy(board)
         move = (int(action/self.n), action%self.n)
         b.execute_move(move, player)
-        return (b.pieces, -player)
+        return (self.zobrist.update(board, b.pieces), -player)
 
     def getValidMoves(self, board, player):
         # return a fixed size binary vector
+        if self.bitboard:
+            moves = self.bitboard.get_legal_moves(*self._getBits(board, player))
+            valids = np.zeros(self.getActionSize(), dtype=int)
+            if moves:
+                valids[:-1] = self.bitboard.unpack(moves)
+            else:
+                valids[-1] = 1
+            return valids
         valids = [0]*self.getActionSize()
         b = Board(self.n)
         b.pieces = np.copy(board)
@@ -59,6 +88,13 @@ class OthelloGame(Game):
     def getGameEnded(self, board, player):
         # return 0 if not ended, 1 if player 1 won, -1 if player 1 lost
         # player = 1
+        if self.bitboard:
+            own, opp = self._getBits(board, player)
+            if self.bitboard.get_legal_moves(own, opp) or self.bitboard.get_legal_moves(opp, own):
+                return 0
+            if self.bitboard.count(own) > self.bitboard.count(opp):
+                return 1
+            return -1
         b = Board(self.n)
         b.pieces = np.copy(board)
         if b.has_legal_moves(player):
@@ -69,9 +105,22 @@ class OthelloGame(Game):
             return 1
         return -1
 
+    def _getBits(self, board, player):
+        """
+        Returns the bitboards (own, opp) of board seen by player: the ones it
+        carries, or else the ones read from the array, which are then cached
+        on it if it is a HashedBoard.
+        """
+        bits = getattr(board, 'bits', None)
+        if bits is None:
+            bits = self.bitboard.fromArray(board, 1)
+            if isinstance(board, HashedBoard):
+                board.bits = bits
+        return bits if player == 1 else bits[::-1]
+
     def getCanonicalForm(self, board, player):
         # return state if player==1, else return -state if player==-1
-        return player*board
+        return self.zobrist.canonical(board, player)
 
     def getSymmetries(self, board, pi):
         # mirror, rotational
@@ -92,6 +141,9 @@ class OthelloGame(Game):
     def stringRepresentation(self, board):
         return board.tostring()
 
+    def getHash(self, board):
+        return int(self.zobrist.hash(board)[0])
+
     def stringRepresentationReadable(self, board):
         board_s = "".join(self.square_content[square] for row in board for square in row)
         return board_s
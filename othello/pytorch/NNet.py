@@ -21,6 +21,7 @@ args = dotdict({
     'batch_size': 64,
     'cuda': torch.cuda.is_available(),
     'num_channels': 512,
+    'quantize': False,  # evaluate an int8 copy of the network on the CPU in predict, see TorchExport.quantize
 })
 
 
@@ -29,10 +30,19 @@ class NNetWrapper(NeuralNet):
         self.nnet = onnet(game, args)
         self.board_x, self.board_y = game.getBoardSize()
         self.action_size = game.getActionSize()
+        self.quantize = args.quantize
+        # quantized networks only run on the CPU
+        self.device = torch.device('cuda' if args.cuda and not self.quantize else 'cpu')
 
         if args.cuda:
             self.nnet.cuda()
 
+        # inference mode: the network stays in eval mode outside of train, and
+        # predict copies each board into this tensor instead of allocating one
+        self.input = torch.zeros(1, self.board_x, self.board_y, device=self.device)
+        self.nnet.eval()
+        self.update_inference_nnet()
+
     def train(self, examples):
         """
         examples: list of examples, each example is of form (board, pi, v)
@@ -75,6 +85,21 @@ class NNetWrapper(NeuralNet):
                 total_loss.backward()
                 optimizer.step()
 
+        self.nnet.eval()
+        self.update_inference_nnet()
+
+    def update_inference_nnet(self):
+        """
+        Sets the network predict evaluates: the trained network, or with
+        args.quantize (as it was when the wrapper was made) an int8 copy of it
+        that is made again after every change of the weights.
+        """
+        if self.quantize:
+            from TorchExport import quantize
+            self.inference_nnet = quantize(self.nnet)
+        else:
+            self.inference_nnet = self.nnet
+
     def predict(self, board):
         """
         board: np array with board
@@ -83,15 +108,30 @@ class NNetWrapper(NeuralNet):
         start = time.time()
 
         # preparing input
-        board = torch.FloatTensor(board.astype(np.float64))
-        if args.cuda: board = board.contiguous().cuda()
-        board = board.view(1, self.board_x, self.board_y)
-        self.nnet.eval()
-        with torch.no_grad():
-            pi, v = self.nnet(board)
+        self.input[0].copy_(torch.from_numpy(np.ascontiguousarray(board, dtype=np.float32)))
+        pi, v = self.infer(self.input)
 
         # print('PREDICTION TIME TAKEN : {0:03f}'.format(time.time()-start))
-        return torch.exp(pi).data.cpu().numpy()[0], v.data.cpu().numpy()[0]
+        return pi[0], v[0]
+
+    def predict_batch(self, boards):
+        """
+        boards: list of np arrays with boards
+        """
+        # preparing input
+        boards = torch.from_numpy(np.array([np.asarray(board) for board in boards], dtype=np.float32)).to(self.device)
+        pi, v = self.infer(boards)
+        return pi, v[:, 0]
+
+    def infer(self, boards):
+        """
+        Evaluates a batch tensor of boards and returns the policies and values
+        as numpy arrays, with both heads copied to the host together.
+        """
+        with torch.inference_mode():
+            pi, v = self.inference_nnet(boards)
+            out = torch.cat((torch.exp(pi), v), dim=1).cpu().numpy()
+        return out[:, :-1], out[:, -1:]
 
     def loss_pi(self, targets, outputs):
         return -torch.sum(targets * outputs) / targets.size()[0]
@@ -118,3 +158,4 @@ class NNetWrapper(NeuralNet):
         map_location = None if args.cuda else 'cpu'
         checkpoint = torch.load(filepath, map_location=map_location)
         self.nnet.load_state_dict(checkpoint['state_dict'])
+        self.update_inference_nnet()
@@ -0,0 +1,136 @@
+"""
+To run tests:
+pytest-3 othello
+"""
+
+import numpy as np
+import pytest
+
+from test_utils import random_positions
+
+from .OthelloBitboard import BitBoard
+from .OthelloGame import OthelloGame
+
+
+def check_bitboard_matches_lists(n, num_games):
+    """Checks that both move generators agree on every position of random games and on every move from it."""
+    game, bitboard_game = OthelloGame(n), OthelloGame(n, bitboard=True)
+    for board, player, ended in random_positions(game, num_games, seed=n):
+        assert bitboard_game.getGameEnded(board, player) == ended
+        if ended != 0:
+            continue
+        valids = game.getValidMoves(board, player)
+        np.testing.assert_array_equal(bitboard_game.getValidMoves(board, player), valids)
+        for action in np.flatnonzero(valids):
+            next_board, next_player = game.getNextState(board, player, action)
+            bitboard_next, bitboard_player = bitboard_game.getNextState(board, player, action)
+            np.testing.assert_array_equal(bitboard_next, next_board)
+            assert bitboard_player == next_player
+
+
+def test_bitboard_matches_lists_6x6():
+    check_bitboard_matches_lists(6, 10)
+
+
+def test_bitboard_matches_lists_8x8():
+    check_bitboard_matches_lists(8, 10)
+
+
+def test_bitboard_larger_than_64_squares():
+    check_bitboard_matches_lists(10, 3)
+
+
+def test_bitboard_boards_carry_their_bits():
+    """Plays random games on the bitboard game's own boards, as MCTS does, against the list game."""
+    game, bitboard_game = OthelloGame(6), OthelloGame(6, bitboard=True)
+    bitboard = bitboard_game.bitboard
+    for board, player, ended in random_positions(bitboard_game, 5, seed=1):
+        plain = np.array(board)
+        assert ended == game.getGameEnded(plain, player)
+        canonical = bitboard_game.getCanonicalForm(board, player)
+        if getattr(board, 'bits', None) is not None:
+            assert board.bits == bitboard.fromArray(plain, 1)
+            assert canonical.bits == bitboard.fromArray(np.array(canonical), 1)
+        if ended == 0:
+            np.testing.assert_array_equal(bitboard_game.getValidMoves(canonical, 1), game.getValidMoves(plain, player))
+
+
+def test_bitboard_pass_and_full_board():
+    game = OthelloGame(4, bitboard=True)
+    # white has no move and must pass, black can play at (2,0) or (3,0)
+    board = np.array([[-1, -1, 1, -1],
+                      [1, 0, -1, -1],
+                      [0, 1, -1, -1],
+                      [0, 1, -1, -1]])
+    assert list(np.flatnonzero(game.getValidMoves(board, 1))) == [16]
+    assert list(np.flatnonzero(game.getValidMoves(board, -1))) == [8, 12]
+    assert game.getGameEnded(board, 1) == 0
+    next_board, next_player = game.getNextState(board, 1, 16)
+    np.testing.assert_array_equal(next_board, board)
+    assert next_player == -1
+    # once the board is full the game is over, won by black
+    full = np.where(board == 0, -1, board)
+    assert game.getGameEnded(full, 1) == -1 and game.getGameEnded(full, -1) == 1
+
+
+def test_bitboard_runs_do_not_wrap():
+    game = OthelloGame(8, bitboard=True)
+    board = np.zeros((8, 8), dtype=int)
+    # (1,1) would flip towards (0,6) if the run from (1,0) continued at the end of row 0
+    board[0, 6], board[0, 7], board[1, 0] = 1, -1, -1
+    valids = game.getValidMoves(board, 1)
+    assert valids[9] == 0
+    np.testing.assert_array_equal(valids, OthelloGame(8).getValidMoves(board, 1))
+
+
+def test_bitboard_round_trip():
+    game = OthelloGame(8)
+    board = game.getInitBoard()
+    bitboard = BitBoard(8)
+    own, opp = bitboard.fromArray(board, -1)
+    assert bitboard.count(own) == bitboard.count(opp) == 2
+    np.testing.assert_array_equal(bitboard.toArray(own, opp, -1), board)
+    # the four opening moves of black
+    assert sorted(np.flatnonzero(bitboard.unpack(bitboard.get_legal_moves(own, opp)))) == \
+        sorted(np.flatnonzero(game.getValidMoves(board, -1)[:-1]))
+
+
+def test_pytorch_predict_inference_mode(monkeypatch):
+    torch = pytest.importorskip('torch')
+    from .pytorch import NNet
+    monkeypatch.setitem(NNet.args, 'num_channels', 16)
+    torch.manual_seed(0)
+    game = OthelloGame(6)
+    nnet = NNet.NNetWrapper(game)
+    board = game.getInitBoard()
+    boards = [board, -board, game.getNextState(board, 1, 8)[0]]
+
+    pi, v = nnet.predict(board)
+    assert pi.shape == (game.getActionSize(),) and v.shape == (1,)
+    with torch.no_grad():
+        log_pis, vs = nnet.nnet(torch.FloatTensor(np.array(boards)))
+    np.testing.assert_allclose(pi, torch.exp(log_pis[0]).numpy(), rtol=1e-5)
+
+    pis, batch_vs = nnet.predict_batch(boards)
+    np.testing.assert_allclose(pis, torch.exp(log_pis).numpy(), rtol=1e-5)
+    np.testing.assert_allclose(batch_vs, vs[:, 0].numpy(), rtol=1e-5)
+    # the preallocated input is overwritten by every call
+    np.testing.assert_allclose(nnet.predict(boards[2])[0], pis[2], rtol=1e-5)
+
+
+def test_pytorch_predict_flipped_board(monkeypatch):
+    torch = pytest.importorskip('torch')
+    from .pytorch import NNet
+    monkeypatch.setitem(NNet.args, 'num_channels', 16)
+    torch.manual_seed(0)
+    game = OthelloGame(6)
+    nnet = NNet.NNetWrapper(game)
+    board = game.getNextState(game.getInitBoard(), 1, 8)[0]
+    # getSymmetries returns views with negative strides
+    flipped = [b for b, _ in game.getSymmetries(board, np.ones(game.getActionSize()))]
+    assert any(stride < 0 for b in flipped for stride in b.strides)
+
+    pis, vs = nnet.predict_batch([np.array(b) for b in flipped])
+    for b, pi in zip(flipped, pis):
+        np.testing.assert_allclose(nnet.predict(b)[0], pi, rtol=1e-5)
+    np.testing.assert_allclose(nnet.predict_batch(flipped)[0], pis, rtol=1e-5)
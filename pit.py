@@ -15,6 +15,7 @@ any agent.
 
 mini_othello = False  # Play in 6x6 instead of the normal 8x8.
 human_vs_cpu = True
+exported = False  # Serve the first network from its ONNX export, written by TorchExport.py from the checkpoint below.
 
 if mini_othello:
     g = OthelloGame(6)
@@ -29,12 +30,18 @@ hp = HumanOthelloPlayer(g).play
 
 
 # nnet players
-n1 = NNet(g)
+if exported:
+    from TorchExport import ExportedNNet
+    n1 = ExportedNNet(g)
+    extension = '.onnx'
+else:
+    n1 = NNet(g)
+    extension = '.pth.tar'
 if mini_othello:
-    n1.load_checkpoint('./pretrained_models/othello/pytorch/','6x100x25_best.pth.tar')
+    n1.load_checkpoint('./pretrained_models/othello/pytorch/','6x100x25_best' + extension)
 else:
-    n1.load_checkpoint('./pretrained_models/othello/pytorch/','8x8_100checkpoints_best.pth.tar')
-args1 = dotdict({'numMCTSSims': 50, 'cpuct':1.0})
+    n1.load_checkpoint('./pretrained_models/othello/pytorch/','8x8_100checkpoints_best' + extension)
+args1 = dotdict({'numMCTSSims': 50, 'cpuct':1.0, 'reuseTree': True, 'maxTreeNodes': 200000})
 mcts1 = MCTS(g, n1, args1)
 n1p = lambda x: np.argmax(mcts1.getActionProb(x, temp=0))
 
@@ -43,7 +50,7 @@ if human_vs_cpu:
 else:
     n2 = NNet(g)
     n2.load_checkpoint('./pretrained_models/othello/pytorch/', '8x8_100checkpoints_best.pth.tar')
-    args2 = dotdict({'numMCTSSims': 50, 'cpuct': 1.0})
+    args2 = dotdict({'numMCTSSims': 50, 'cpuct': 1.0, 'reuseTree': True, 'maxTreeNodes': 200000})
     mcts2 = MCTS(g, n2, args2)
     n2p = lambda x: np.argmax(mcts2.getActionProb(x, temp=0))
 
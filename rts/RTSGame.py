@@ -88,24 +88,19 @@ class RTSGame:
 
     def getValidMoves(self, board: np.ndarray, player: int):
 
-        valids = []
         b = Board(self.n)
-        b.pieces = np.copy(board)
+        b.pieces = board
 
         if player == 1:
             config = CONFIG.player1_config
         else:
             config = CONFIG.player2_config
 
-        for y in range(self.n):
-            for x in range(self.n):
-                if b[x][y][P_NAME_IDX] == player and b[x][y][A_TYPE_IDX] != 1:  # for this player and not Gold
-                    valids.extend(b.get_moves_for_square(x, y, config=config))
-                else:
-                    valids.extend([0] * NUM_ACTS)
-        valids.append(0)  # because of that +1 in action Size
+        valids = np.zeros(self.getActionSize(), dtype=int)  # last one stays 0 because of that +1 in action Size
+        # actions are ordered by y, then x, then action index - see getNextState
+        valids[:-1] = b.get_valid_moves(player, config=config).transpose(1, 0, 2).ravel()
 
-        return np.array(valids)
+        return valids
 
     # noinspection PyUnusedLocal
     def getGameEnded(self, board: np.ndarray, player) -> float:
@@ -147,14 +142,8 @@ class RTSGame:
                 return 0.001
 
         # detect win condition
-        sum_p1 = 0
-        sum_p2 = 0
-        for y in range(n):
-            for x in range(n):
-                if board[x][y][P_NAME_IDX] == 1:
-                    sum_p1 += 1
-                if board[x][y][P_NAME_IDX] == -1:
-                    sum_p2 += 1
+        sum_p1 = np.count_nonzero(board[:, :, P_NAME_IDX] == 1)
+        sum_p2 = np.count_nonzero(board[:, :, P_NAME_IDX] == -1)
 
         if sum_p1 < 2:  # SUM IS 1 WHEN PLAYER ONLY HAS MINERALS LEFT
             return -1
@@ -162,10 +151,10 @@ class RTSGame:
             return +1
 
         # detect no valid actions - possible tie by overpopulating on non-attacking units and buildings - all fields are full or one player is surrounded:
-        if sum(self.getValidMoves(board, 1)) == 0:
+        if not self.getValidMoves(board, 1).any():
             return -1
 
-        if sum(self.getValidMoves(board, -1)) == 0:
+        if not self.getValidMoves(board, -1).any():
             return 1
         # continue game
         return 0
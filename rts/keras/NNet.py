@@ -5,6 +5,7 @@ import numpy as np
 
 sys.path.append('../..')
 from NeuralNet import NeuralNet
+from KerasPredictor import KerasPredictor
 from rts.keras.RTSNNet import RTSNNet
 from rts.src.config import VERBOSE_MODEL_FIT
 
@@ -31,6 +32,7 @@ class NNetWrapper(NeuralNet):
         encoder = encoder or CONFIG.nnet_args.encoder
 
         self.nnet = RTSNNet(game, encoder)
+        self.predictor = KerasPredictor(self.nnet.model)
         self.board_x, self.board_y, num_encoders = game.getBoardSize()
         self.action_size = game.getActionSize()
 
@@ -69,9 +71,21 @@ class NNetWrapper(NeuralNet):
         board = board[np.newaxis, :, :]
 
         # run
-        pi, v = self.nnet.model.predict(board, verbose=False)
+        pi, v = self.predictor(board)
         return pi[0], v[0]
 
+    def predict_batch(self, boards):
+        """
+        Predicts actions for multiple boards in a single pass of the model.
+        :param boards: list of boards
+        :return: arrays of predicted actions and win predictions for all boards (Pis, Vs)
+        """
+        boards = self.encoder.encode_multiple(np.asarray(boards))
+
+        # run
+        pi, v = self.predictor(boards)
+        return pi, v[:, 0]
+
     def save_checkpoint(self, folder='checkpoint', filename='checkpoint.pth.tar'):
         # change extension
         filename = filename.split(".")[0] + ".h5"
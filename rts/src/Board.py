@@ -4,7 +4,7 @@ from typing import Any
 import numpy as np
 
 sys.path.append('../..')
-from rts.src.config import d_a_type, d_acts, A_TYPE_IDX, P_NAME_IDX, CARRY_IDX, MONEY_IDX, NUM_ACTS, ACTS_REV, NUM_ENCODERS, HEALTH_IDX, TIME_IDX
+from rts.src.config import d_a_type, d_acts, A_TYPE_IDX, P_NAME_IDX, CARRY_IDX, MONEY_IDX, NUM_ACTS, ACTS, ACTS_REV, NUM_ENCODERS, HEALTH_IDX, TIME_IDX
 
 """
 Board.py
@@ -13,6 +13,43 @@ Defines game rules (action checking, end-game conditions)
 can_execute_move is checking if move can be executed and execute_move is applying this move to new board
 """
 
+# Row a_type holds which actions actor of that type can execute (see d_acts)
+ACTOR_ACTS = np.zeros((max(d_acts) + 1, NUM_ACTS), dtype=bool)
+for _a_type, _acts in d_acts.items():
+    ACTOR_ACTS[_a_type, [ACTS[act] for act in _acts]] = True
+
+# Offsets of the tile each directional action targets
+DIRECTIONS = {'up': (0, -1), 'down': (0, 1), 'right': (1, 0), 'left': (-1, 0)}
+
+# Offsets of the tiles checked for nearby actors
+NEARBY = [(-1, 1), (0, 1), (1, 1), (-1, 0), (1, 0), (-1, -1), (0, -1), (1, -1)]
+
+# Actions that spawn actors of given type, for each direction
+SPAWNS = {'npc': 2, 'barracks': 3, 'rifle_infantry': 4, 'town_hall': 5}
+
+# Player name of the tiles surrounding the board - neither empty nor owned by any player
+OFF_BOARD = 2
+
+# Indices into flattened boards padded with off-board tiles, for each board size
+neighbour_indices = {}
+
+
+def get_neighbour_indices(n):
+    """
+    Returns indices into the flattened planes of an n x n board padded with one ring of off-board tiles:
+    the tiles of the board in the order of its flattened planes, and their neighbours in each of DIRECTIONS and NEARBY
+    :param n: board size
+    :return: arrays of shape (n * n,), (len(DIRECTIONS), n * n) and (len(NEARBY), n * n)
+    """
+    if n not in neighbour_indices:
+        x, y = np.indices((n, n)).reshape(2, -1) + 1
+
+        def shifted(offsets):
+            return np.array([(x + dx) * (n + 2) + y + dy for dx, dy in offsets])
+
+        neighbour_indices[n] = (shifted([(0, 0)])[0], shifted(DIRECTIONS.values()), shifted(NEARBY))
+    return neighbour_indices[n]
+
 
 class Board:
 
@@ -255,6 +292,60 @@ class Board:
         # return the generated move list
         return moves
 
+    def get_valid_moves(self, player, config) -> np.ndarray:
+        """
+        Returns valid actions for all tiles of player at once, using the same rules as get_moves_for_square.
+        Each rule is evaluated for the whole board at once, with neighbouring tiles gathered through get_neighbour_indices
+        :param player: int - player whose actors are executing actions
+        :param config: additional config that is separate for each player
+        :return: boolean array of shape (n, n, NUM_ACTS) - valid actions for each tile, indexed like pieces
+        """
+        n = self.n
+        tiles, directions, nearby = get_neighbour_indices(n)
+        # flattened planes of the board padded with one ring of off-board tiles
+        padded = np.zeros((NUM_ENCODERS, n + 2, n + 2))
+        padded[P_NAME_IDX] = OFF_BOARD
+        padded[:, 1:-1, 1:-1] = np.moveaxis(self.pieces, 2, 0)
+        padded = padded.reshape(NUM_ENCODERS, -1)
+        p_names = padded[P_NAME_IDX]
+        a_types = padded[A_TYPE_IDX].astype(int)
+
+        a_player = p_names[tiles]
+        a_type = a_types[tiles]
+        money = padded[MONEY_IDX, tiles]
+        carry = padded[CARRY_IDX, tiles]
+        enabled = config.acts_enabled
+
+        # one row per action, one column per tile
+        valid = np.zeros((NUM_ACTS, n * n), dtype=bool)
+        valid[ACTS["idle"]] = enabled.idle
+
+        # targets of directional actions, one row per direction
+        empty = p_names[directions] == 0
+        for direction, row in zip(DIRECTIONS, empty):
+            valid[ACTS[direction]] = enabled[direction] and row
+        for actor, spawned_type in SPAWNS.items():
+            if enabled[actor]:
+                valid[[ACTS[actor + "_" + direction] for direction in DIRECTIONS]] = empty & (money >= config.a_cost[spawned_type])
+        if enabled.attack:
+            valid[[ACTS["attack_" + direction] for direction in DIRECTIONS]] = (p_names[directions] == -a_player) & (a_types[directions] != d_a_type['Gold'])
+        if enabled.heal:
+            max_health = np.array([0] + [config.a_max_health[t] for t in range(1, len(ACTOR_ACTS))])
+            healable = (a_types != d_a_type['Gold']) & (a_types > 0) & (padded[HEALTH_IDX] < max_health[a_types])
+            if not config.SACRIFICIAL_HEAL:
+                healable &= padded[MONEY_IDX] - config.HEAL_COST >= 0
+            valid[[ACTS["heal_" + direction] for direction in DIRECTIONS]] = healable[directions]
+
+        if enabled.mine_resources:
+            valid[ACTS["mine_resources"]] = (carry == 0) & (a_types[nearby] == d_a_type['Gold']).any(axis=0)
+        if enabled.return_resources:
+            hall_nearby = ((a_types[nearby] == d_a_type['Hall']) & (p_names[nearby] == a_player)).any(axis=0)
+            valid[ACTS["return_resources"]] = (carry == 1) & hall_nearby & (money + config.MONEY_INC <= config.MAX_GOLD)
+
+        # only actors of this player can execute actions, and only those of their type
+        actors = (a_player == player) & (a_type != d_a_type['Gold'])
+        return (valid.T & ACTOR_ACTS[a_type] & actors[:, None]).reshape(n, n, NUM_ACTS)
+
     def _valid_act(self, x, y, act, config):
         """
         Returns true if action on specific tile is valid, false otherwise
@@ -0,0 +1,41 @@
+import numpy as np
+
+from rts.RTSGame import RTSGame
+from rts.src.Board import Board
+from rts.src.config import ACTS, NUM_ACTS, P_NAME_IDX, A_TYPE_IDX, HEALTH_IDX, d_a_type
+from rts.src.config_class import CONFIG
+from test_utils import random_positions
+
+
+def test_valid_moves_match_tiles():
+    game = RTSGame()
+    n = game.n
+    for seed in range(3):
+        for board, _, _ in random_positions(game, 1, seed=seed, max_moves=60):
+            b = Board(n)
+            b.pieces = board
+            for player, config in ((1, CONFIG.player1_config), (-1, CONFIG.player2_config)):
+                valid = b.get_valid_moves(player, config)
+                for x in range(n):
+                    for y in range(n):
+                        if board[x, y, P_NAME_IDX] == player and board[x, y, A_TYPE_IDX] != 1:
+                            expected = b.get_moves_for_square(x, y, config=config)
+                        else:
+                            expected = [0] * NUM_ACTS
+                        assert valid[x, y].tolist() == [bool(e) for e in expected]
+
+
+def test_valid_moves_at_edges():
+    n = 8
+    b = Board(n)
+    # a worker in the corner and a rifleman at the top of column 1, whose
+    # enemy on the right can be attacked and the one at (0, n-1), next to
+    # it in the flattened board, cannot
+    for x, y, player, a_type in ((0, 0, 1, 'Work'), (1, 0, 1, 'Rifl'), (2, 0, -1, 'Rifl'), (0, n - 1, -1, 'Rifl')):
+        b.pieces[x, y, P_NAME_IDX] = player
+        b.pieces[x, y, A_TYPE_IDX] = d_a_type[a_type]
+        b.pieces[x, y, HEALTH_IDX] = 1
+    valid = b.get_valid_moves(1, CONFIG.player1_config)
+    assert [act for act in ('up', 'down', 'right', 'left') if valid[0, 0, ACTS[act]]] == ['down']
+    assert [act for act in ACTS if act.startswith('attack') and valid[1, 0, ACTS[act]]] == ['attack_right']
+    assert not valid[2, 0].any() and not valid[0, n - 1].any()
@@ -93,10 +93,10 @@ class SantoriniGame(Game):
         # return a fixed size binary vector
         #_, _, valids = board.get_all_moves
         b = Board(self.n)
-        b.pieces = np.copy(board)
+        b.pieces = board
         color = player
         #valids = []
-        return np.array(b.get_legal_moves_binary(color))
+        return b.get_legal_moves_binary(color)
         # Get all the squares with pieces of the given color.
 
     def getValidMovesHuman(self, board, player):
@@ -112,17 +112,12 @@ class SantoriniGame(Game):
         """
         Returns a list of both character's locations as tuples for the player
         """
-        b = Board(self.n)
-        b.pieces = np.copy(board)
-        
         color = player
     
         # Get all the squares with pieces of the given color.
-        char1_location = np.where(b.pieces[0] == 1*color)
-        char1_location = (char1_location[0][0], char1_location[1][0])
-
-        char2_location = np.where(b.pieces[0] == 2*color)
-        char2_location = (char2_location[0][0], char2_location[1][0])
+        squares = np.asarray(board[0]).ravel()
+        char1_location = divmod(int(np.flatnonzero(squares == 1*color)[0]), self.n)
+        char2_location = divmod(int(np.flatnonzero(squares == 2*color)[0]), self.n)
         
         return [char1_location, char2_location]
 
@@ -140,7 +135,7 @@ class SantoriniGame(Game):
         
         
         b = Board(self.n)
-        b.pieces = np.copy(board)
+        b.pieces = board
         player_pieces = self.getCharacterLocations(b.pieces, player)
         opponent_pieces = self.getCharacterLocations(b.pieces, -1*player)
         
@@ -1,5 +1,27 @@
 import numpy as np
 
+# neighbor tables of the boards of each size, built on first use
+neighborTables = {}
+
+
+def getNeighborTable(n):
+    """
+    Returns an array of shape (n*n+1, 8) with the flat index of the neighbor
+    of every square of an n x n board in each of the directions of Board,
+    in the same order. Off the board is the extra index n*n, whose neighbors
+    are all n*n again, so the table can be applied twice.
+    """
+    if n not in neighborTables:
+        table = np.full((n*n+1, 8), n*n, dtype=np.intp)
+        for x in range(n):
+            for y in range(n):
+                for i, (dx, dy) in enumerate(Board._Board__directions):
+                    if 0 <= x+dx < n and 0 <= y+dy < n:
+                        table[x*n+y, i] = (x+dx)*n + y+dy
+        neighborTables[n] = table
+    return neighborTables[n]
+
+
 class Board():
     """
     A Santorini Board of default shape: (2,5,5)
@@ -45,6 +67,8 @@ class Board():
     # NOTE THESE ARE NEITHER CCW NOR CW!
     __directions = [(-1,-1),(-1,0),(-1,1),(0,-1),(0,1),(1,-1),(1,0),(1,1)]
     #                  Nw,     N,     Ne,   W      E,    Sw,    S,    Se,    
+    # __came_from[m, b] is True if b is the direction opposite to m
+    __came_from = np.eye(8, dtype=bool)[::-1]
     
     def __init__(self, board_length, true_random_placement=False):
         """
@@ -157,15 +181,42 @@ class Board():
     def get_legal_moves_binary(self, color):
         """Returns a binary vector of legal moves for the given color.
         (1 for white, -1 for black
-        """    
-        moves = []
 
-        # Get all the squares with pieces of the given color.
-        piece_locations = self.getCharacterLocations(color)
-        for piece_location in piece_locations:
-                    moves.extend(self.get_moves_for_location(piece_location)[2])
-
-        return moves
+        The 128 actions of both characters are evaluated at once: the move
+        and build squares of every action are looked up in the neighbor
+        table (see getNeighborTable), with the same rules as
+        get_moves_for_location. Action 64*c + 8*m + b moves character c+1
+        in direction m and builds in direction b from there.
+        """
+        n = self.n
+        neighbors = getNeighborTable(n)
+        # the extra entry stands for the squares off the board
+        free = np.zeros(n*n+1, dtype=bool)
+        free[:-1] = self.pieces[0].ravel() == 0
+        height = np.zeros(n*n+1, dtype=int)
+        height[:-1] = self.pieces[1].ravel()
+
+        occupant = self.pieces[0].ravel()
+        chars = np.array([np.argmax(occupant == 1*color), np.argmax(occupant == 2*color)])
+        moves = neighbors[chars]        # shape (2, 8)
+        builds = neighbors[moves]       # shape (2, 8, 8)
+
+        # pieces can only move to unoccupied squares at most one level up
+        valid_moves = free[moves] & (height[moves] <= height[chars][:, None] + 1)
+
+        # builds go on unoccupied squares up to height 3 or where the piece
+        # came from, which is always in the opposite direction
+        valid_builds = (free & (height <= 3))[builds] | self.__came_from
+
+        # A piece that moved to height 3 has won and does not build; those
+        # actions stay valid for the occupied squares around it.
+        won = valid_moves & (height[moves] == 3)
+        if won.any():
+            occupied = ~free
+            occupied[-1] = False
+            valid_builds[won] = occupied[builds[won]] | self.__came_from[np.nonzero(won)[1]]
+
+        return (valid_moves[:, :, None] & valid_builds).ravel().astype(int)
     
     def get_moves_for_location(self, location):
         """
@@ -391,7 +442,7 @@ class Board():
         """
         Returns a boolean (whether player of given color has legal actions)
         """
-        return (len(self.get_legal_moves(color)) > 0)
+        return bool(self.get_legal_moves_binary(color).any())
 
                 
     def execute_move(self, move, color):
@@ -0,0 +1,38 @@
+"""
+To run tests:
+pytest-3 santorini
+"""
+
+import numpy as np
+
+from test_utils import random_positions
+from .SantoriniGame import SantoriniGame
+from .SantoriniLogic import Board
+
+
+def test_legal_moves_binary_matches_per_location():
+    for n in (4, 5):
+        for board, _, _ in random_positions(SantoriniGame(n), 4, seed=n):
+            for color in (1, -1):
+                b = Board(n)
+                b.pieces = np.copy(board)
+                _, _, expected = b.get_all_moves(color)
+                valids = b.get_legal_moves_binary(color)
+                # the per-location version marks builds after a winning move with the occupant
+                np.testing.assert_array_equal(valids, np.asarray(expected) != 0)
+                assert b.has_legal_moves(color) == (len(b.get_legal_moves(color)) > 0)
+
+
+def test_legal_moves_binary_corner_and_heights():
+    b = Board(5)
+    b.pieces = np.zeros((2, 5, 5), dtype=int)
+    b.pieces[0][0, 0], b.pieces[0][2, 2] = 1, 2
+    b.pieces[0][4, 4], b.pieces[0][4, 0] = -1, -2
+    # from the corner, (0,1) is two levels up, (1,0) has a dome and (1,1) is one level up
+    b.pieces[1][0, 1], b.pieces[1][1, 0], b.pieces[1][1, 1] = 2, 4, 1
+    valids = b.get_legal_moves_binary(1)
+    # character 1 can only move Se and then build anywhere around (1,1)
+    # but on the dome (W) and on character 2 (Se); Nw is where it came from
+    assert list(np.flatnonzero(valids[:64])) == [8 * 7 + d for d in (0, 1, 2, 4, 5, 6)]
+    _, _, expected = b.get_all_moves(1)
+    np.testing.assert_array_equal(valids, np.asarray(expected) != 0)
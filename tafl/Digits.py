@@ -1,30 +1,17 @@
 #https://stackoverflow.com/questions/2267362/how-to-convert-an-integer-in-any-base-to-a-string
 
-import string
-digs = string.digits + string.ascii_letters
-
 
 def int2base(x, base, length):
-    if x < 0:
-        sign = -1
-    elif x == 0:
-        return digs[0]
-    else:
-        sign = 1
-
-    x *= sign
+    """Returns the digits of x >= 0 in base, least significant first, padded to length."""
     digits = []
 
     while x:
-        digits.append(digs[int(x % base)])
-        x = int(x / base)
-
-    if sign < 0:
-        digits.append('-')
+        digits.append(int(x % base))
+        x = int(x // base)
 
-    while len(digits)<length: digits.extend(["0"])
+    while len(digits)<length: digits.extend([0])
     
-    return list(map(lambda x: int(x),digits))
+    return digits
     
 
 def test():
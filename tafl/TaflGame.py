@@ -43,16 +43,17 @@ class TaflGame(Game):
 
     def getValidMoves(self, board, player):
         # return a fixed size binary vector
+        valids = np.zeros(self.getActionSize(), dtype=int)
+        valids[self.getValidActions(board, player)] = 1
+        return valids
+
+    def getValidActions(self, board, player):
+        # the valid moves as an array of actions, without the n**4 vector
         #Note: Ignoreing the passed in player variable since we are not inverting colors for getCanonicalForm and Arena calls with constant 1.
-        valids = [0]*self.getActionSize()
-        b = board.getCopy()
-        legalMoves =  b.get_legal_moves(board.getPlayerToMove())
-        if len(legalMoves)==0:
-            valids[-1]=1
-            return np.array(valids)
-        for x1, y1, x2, y2 in legalMoves:
-            valids[x1+y1*self.n+x2*self.n**2+y2*self.n**3]=1
-        return np.array(valids)
+        actions = board.get_legal_actions(board.getPlayerToMove())
+        if len(actions)==0:
+            return np.array([self.getActionSize()-1])
+        return actions
 
     def getGameEnded(self, board, player):
         # return 0 if not ended, if player 1 won, -1 if player 1 lost
@@ -84,6 +85,9 @@ class TaflGame(Game):
         #print("->",str(board))
         return str(board)
 
+    def getHash(self, board):
+        return int(board.getHash())
+
     def getScore(self, board, player):
         if board.done: return 1000*board.done*player
         return board.countDiff(player)
@@ -1,7 +1,30 @@
+import copy
+
 import numpy as np
-from .GameVariants import Tafl
+from Zobrist import ZobristTable
+
+zobristTables = {}  # board size -> (ZobristTable of the piece types per square, key of black to move)
+
+def getZobristTable(size):
+    if size not in zobristTables:
+        zobristTables[size] = (ZobristTable((size, size), (-2, -1, 0, 1, 2)),
+                               ZobristTable((1,), (0,), seed=1).keys[0, 0])
+    return zobristTables[size]
 
 class Board():
+    """
+    Board data:
+      board: the special squares of the variant as [x,y,type], 1 for the
+             corners and 2 for the throne
+      pieces: an array of [x,y,type] rows, -1 for the attackers (black), 1 for
+              the defenders (white) and 2 for the king; captured pieces get
+              x=-99
+    They are mirrored on two grids indexed [y,x]: image, which holds 10 times
+    the type of the square plus the type of the piece on it (see getImage),
+    and occupant, which holds the number of the piece on a square or -1.
+    Moves update the pieces and both grids in place, so copies of a board
+    only copy three small arrays.
+    """
 
 
     def __init__(self, gv):
@@ -9,42 +32,44 @@ class Board():
       self.width=gv.size
       self.height=gv.size
       self.board=gv.board #[x,y,type]
-      self.pieces=gv.pieces #[x,y,type]
+      self.pieces=np.array(gv.pieces, dtype=int).reshape(-1, 3) #[x,y,type]
+      self.squares=np.zeros((self.height, self.width), dtype=int) #type of square, shared by all copies
+      for x,y,t in self.board:
+          self.squares[y,x]=t
+      self.image=self.squares*10
+      self.occupant=np.full((self.height, self.width), -1, dtype=int)
+      for pieceno,(x,y,t) in enumerate(self.pieces):
+          self.image[y,x]+=t
+          self.occupant[y,x]=pieceno
+      kings=np.flatnonzero(self.pieces[:,2]==2)
+      self.king=kings[0] if len(kings) else None
       self.time=0
       self.done=0
+      self.zobrist=None #computed by getHash, then updated by every move
 
     def __str__(self):
-        return str(self.getPlayerToMove()) + ''.join(str(r) for v in self.getImage() for r in v) 
+        return str(self.getPlayerToMove()) + ''.join(map(str, self.image.ravel().tolist()))
 
     # add [][] indexer syntax to the Board
     def __getitem__(self, index): 
-        return np.array(self.getImage())[index]
+        return self.image[index]
 
     def astype(self,t):
-        return np.array(self.getImage()).astype(t)
+        return self.image.astype(t)
 
     def getCopy(self):
-      gv=Tafl()
-      gv.size=self.size
-      gv.board=np.copy(np.array(self.board)).tolist()
-      gv.pieces=np.copy(np.array(self.pieces)).tolist()
-      b = Board(gv)
-      b.time=self.time
-      b.done=self.done
+      b = copy.copy(self)
+      b.pieces=self.pieces.copy()
+      b.image=self.image.copy()
+      b.occupant=self.occupant.copy()
       return b
 
 
     def countDiff(self, color):
         """Counts the # pieces of the given color
         (1 for white, -1 for black, 0 for empty spaces)"""
-        count = 0
-        for p in self.pieces:
-            if p[0] >= 0:
-               if p[2]*color > 0:
-                   count += 1
-               else:
-                   count -= 1
-        return count
+        alive = self.pieces[self.pieces[:,0] >= 0]
+        return int(np.where(alive[:,2]*color > 0, 1, -1).sum())
 
     def get_legal_moves(self, color):
         """Returns all the legal moves for the given color.
@@ -52,6 +77,19 @@ class Board():
         """
         return self._getValidMoves(color)
      
+    def get_legal_actions(self, color):
+        """Returns the legal moves for the given color as an increasing array
+        of the actions x1+y1*n+x2*n**2+y2*n**3 (see TaflGame)
+        """
+        n = self.size
+        actions = []
+        for x1,y1,xs,ys in self._getDestinations(color):
+            start = x1+y1*n
+            actions.extend([start+(x+y1*n)*n*n for x in xs])
+            actions.extend([start+(x1+y*n)*n*n for y in ys])
+        actions.sort()
+        return np.array(actions, dtype=np.intp)
+
     def has_legal_moves(self, color):
         vm = self._getValidMoves(color)
         if len(vm)>0: return True
@@ -72,40 +110,45 @@ class Board():
            #print("Illegal move:",move,legal)
    
     def getImage(self):
-        image = [[0 for col in range(self.width)] for row in range(self.height)]
-        for item in self.board:
-            image[item[1]][item[0]] = item[2]*10
-        for piece in self.pieces:
-            if piece[0] >= 0: image[piece[1]][piece[0]] = piece[2] + image[piece[1]][piece[0]]
-        return image
+        """Returns the [y,x] array of 10 times the square type plus the piece type, which must not be modified"""
+        return self.image
 
     def getPlayerToMove(self):
         return -(self.time%2*2-1)
 
+    def getHash(self):
+        """Returns the Zobrist key of the pieces and the player to move, as in str(board)"""
+        if self.zobrist is None:
+          table, blackKey = getZobristTable(self.size)
+          key = blackKey if self.getPlayerToMove() == -1 else np.uint64(0)
+          alive = self.pieces[self.pieces[:,0] >= 0]
+          keys = table.keys[alive[:,1]*self.size+alive[:,0], alive[:,2]-table.low]
+          self.zobrist = key ^ np.bitwise_xor.reduce(keys)
+        return self.zobrist
+
 
 ################## Internal methods ##################
 
+    def _getPieceKey(self,piece):
+      table = getZobristTable(self.size)[0]
+      return table.keys[piece[1]*self.size+piece[0], piece[2]-table.low]
+
     def _isLegalMove(self,pieceno,x2,y2):
       try:
 
-         if x2 < 0 or y2 < 0 or x2 >= self.width or y2 > self.height: return -1
+         if x2 < 0 or y2 < 0 or x2 >= self.width or y2 >= self.height: return -1
          
-         piece = self.pieces[pieceno]
-         x1=piece[0]
-         y1=piece[1]
+         x1,y1,piecetype = self.pieces[pieceno].tolist()
          if x1<0: return -2 #piece was captured
          if x1 != x2 and y1 != y2: return -3 #must move in straight line
          if x1 == x2 and y1 == y2: return -4 #no move
 
-         piecetype = piece[2]
          if (piecetype == -1 and self.time%2 == 0) or (piecetype != -1 and self.time%2 == 1): return -5 #wrong player
 
-         for item in self.board:
-            if item[0] == x2 and item[1] == y2 and item[2] > 0:
-                if piecetype != 2: return -10 #forbidden space
-         for apiece in self.pieces:
-            if y1==y2 and y1 == apiece[1] and ((x1 < apiece[0] and x2 >= apiece[0]) or (x1 > apiece[0] and x2 <= apiece[0])): return -20 #interposing piece
-            if x1==x2 and x1 == apiece[0] and ((y1 < apiece[1] and y2 >= apiece[1]) or (y1 > apiece[1] and y2 <= apiece[1])): return -20 #interposing piece
+         if self.squares[y2,x2] > 0 and piecetype != 2: return -10 #forbidden space
+         if y1==y2: path = self.occupant[y1, x1+1:x2+1] if x1 < x2 else self.occupant[y1, x2:x1]
+         else: path = self.occupant[y1+1:y2+1, x1] if y1 < y2 else self.occupant[y2:y1, x1]
+         if path.max() >= 0: return -20 #interposing piece
 
          return 0 # legal move
       except Exception as ex:
@@ -115,22 +158,31 @@ class Board():
    
     def _getCaptures(self,pieceno,x2,y2):
        #Assumes was already checked for legal move
+       #an opponent next to the square moved to is captured if a piece of
+       #the player to move is on its other side
        captures=[]
-       piece=self.pieces[pieceno]
-       piecetype = piece[2]
-       for apiece in self.pieces:
-          if piecetype*apiece[2] < 0:
-             d1 = apiece[0]-x2 
-             d2 = apiece[1]-y2
-             if (abs(d1)==1 and d2==0) or (abs(d2)==1 and d1==0): 
-                 for bpiece in self.pieces:
-                    if piecetype*bpiece[2] > 0 and not(piece[0]==bpiece[0] and piece[1]==bpiece[1]):
-                       e1 = bpiece[0]-apiece[0]
-                       e2 = bpiece[1]-apiece[1]
-                       if d1==e1 and d2==e2:
-                          captures.extend([apiece])
+       piecetype = self.pieces[pieceno][2]
+       for dx,dy in ((1,0),(-1,0),(0,1),(0,-1)):
+          x3,y3 = x2+2*dx,y2+2*dy
+          if 0 <= x3 < self.width and 0 <= y3 < self.height:
+             apieceno = self.occupant[y2+dy,x2+dx]
+             bpieceno = self.occupant[y3,x3]
+             if (apieceno >= 0 and bpieceno >= 0 and piecetype*self.pieces[apieceno][2] < 0
+                   and piecetype*self.pieces[bpieceno][2] > 0):
+                captures.append(apieceno)
        return captures
 
+    def _placePiece(self,pieceno,x,y):
+      #moves the piece on the grids, removes it if x < 0
+      x1,y1,piecetype=self.pieces[pieceno]
+      self.image[y1,x1]-=piecetype
+      self.occupant[y1,x1]=-1
+      self.pieces[pieceno,0]=x
+      if x >= 0:
+         self.pieces[pieceno,1]=y
+         self.image[y,x]+=piecetype
+         self.occupant[y,x]=pieceno
+
     # returns code for invalid mode (<0) or number of pieces captured
     def _moveByPieceNo(self,pieceno,x2,y2):
       
@@ -140,12 +192,14 @@ class Board():
       self.time = self.time + 1
 
       piece=self.pieces[pieceno]
-      piece[0]=x2
-      piece[1]=y2
+      if self.zobrist is not None: self.zobrist ^= self._getPieceKey(piece) ^ getZobristTable(self.size)[1]
+      self._placePiece(pieceno,x2,y2)
+      if self.zobrist is not None: self.zobrist ^= self._getPieceKey(piece)
       caps = self._getCaptures(pieceno,x2,y2)
       #print("Captures = ",caps)
       for c in caps:
-          c[0]=-99
+          if self.zobrist is not None: self.zobrist ^= self._getPieceKey(self.pieces[c])
+          self._placePiece(c,-99,None)
 
       self.done = self._getWinLose()
       
@@ -155,31 +209,51 @@ class Board():
 
     def _getWinLose(self):
        if self.time > 50: return -1
-       for apiece in self.pieces:
-           if apiece[2]==2 and apiece[0] > -1:
-               for item in self.board:
-                 if item[0]==apiece[0] and item[1]==apiece[1] and item[2]==1:
-                     return 1 #white won
+       if self.king is not None:
+           x,y,_ = self.pieces[self.king]
+           if x > -1:
+               if self.squares[y,x]==1: return 1 #white won
                return 0 # no winner
        return -1  #white lost
    
     def _getPieceNo(self,x,y):
-       for pieceno in range(len(self.pieces)):
-           piece=self.pieces[pieceno]
-           if piece[0]==x and piece[1]==y: return pieceno
+       if 0 <= x < self.width and 0 <= y < self.height: return self.occupant[y,x]
        return -1    
    
+    def _getDestinations(self,player):
+       #walks from every piece of the player to move along its row and column
+       #until blocked, see _isLegalMove for the rules; returns (x1,y1,xs,ys)
+       #for every piece with the x of the squares it can reach in its row and
+       #the y of those in its column, in increasing order
+       destinations=[]
+       if player != self.getPlayerToMove(): return destinations
+       occupant=self.occupant.tolist()
+       squares=self.squares.tolist()
+       for x1,y1,piecetype in self.pieces.tolist():
+           if x1 < 0 or piecetype*player <= 0: continue
+           xs=[]
+           for dx in (-1,1):
+              ray=[]
+              x=x1+dx
+              while 0 <= x < self.width and occupant[y1][x] < 0:
+                  if squares[y1][x] == 0 or piecetype == 2: ray.append(x)
+                  x+=dx
+              xs = xs + (ray[::-1] if dx < 0 else ray)
+           ys=[]
+           for dy in (-1,1):
+              ray=[]
+              y=y1+dy
+              while 0 <= y < self.height and occupant[y][x1] < 0:
+                  if squares[y][x1] == 0 or piecetype == 2: ray.append(y)
+                  y+=dy
+              ys = ys + (ray[::-1] if dy < 0 else ray)
+           destinations.append((x1,y1,xs,ys))
+       return destinations
+
     def _getValidMoves(self,player):
        moves=[]
-       for pieceno in range(len(self.pieces)):
-           piece=self.pieces[pieceno]
-           if piece[2]*player > 0:
-              #print("checking pieceno ",pieceno,piece)
-              for x in range(0,self.width):
-                  if self._isLegalMove(pieceno,x,piece[1])>=0:moves.extend([[piece[0],piece[1],x,piece[1]]])
-              for y in range(0,self.height):
-                  if self._isLegalMove(pieceno,piece[0],y)>=0:moves.extend([[piece[0],piece[1],piece[0],y]])
+       for x1,y1,xs,ys in self._getDestinations(player):
+           moves.extend([[x1,y1,x,y1] for x in xs])
+           moves.extend([[x1,y1,x1,y] for y in ys])
        #print("moves ",moves)
        return moves
-
-
@@ -0,0 +1,101 @@
+"""
+To run tests:
+pytest-3 tafl
+"""
+
+import numpy as np
+
+from test_utils import random_positions
+from .Digits import int2base
+from .GameVariants import Brandubh, Hnefatafl
+from .TaflGame import TaflGame
+from .TaflLogic import Board
+
+
+def rebuilt_image(board):
+    """The image computed from the special squares and the pieces from scratch."""
+    image = np.zeros((board.height, board.width), dtype=int)
+    for x, y, t in board.board:
+        image[y, x] = t * 10
+    for x, y, t in board.pieces:
+        if x >= 0:
+            image[y, x] += t
+    return image
+
+
+def test_grids_follow_moves():
+    for name in ('Brandubh', 'Hnefatafl'):
+        game = TaflGame(name)
+        for board, _, ended in random_positions(game, 3):
+            np.testing.assert_array_equal(board.getImage(), rebuilt_image(board))
+            for pieceno, (x, y, _) in enumerate(board.pieces):
+                if x >= 0:
+                    assert board.occupant[y, x] == pieceno
+            assert (board.occupant >= 0).sum() == (board.pieces[:, 0] >= 0).sum()
+            if not ended:
+                image = board.getImage().copy()
+                game.getNextState(board, 1, game.getValidActions(board, 1)[0])
+                # the move did not touch the original board
+                np.testing.assert_array_equal(board.getImage(), image)
+
+
+def test_capture():
+    board = Board(Brandubh())
+    board.execute_move((2, 3, 2, 1), 1)
+    board.execute_move((0, 3, 0, 2), -1)
+    assert board.countDiff(-1) == 3
+    # the attacker on (3,1) ends up between the defenders on (2,1) and (4,1)
+    board.execute_move((4, 3, 4, 1), 1)
+    assert board.countDiff(-1) == 2
+    assert board.pieces[board.occupant[1, 2], 2] == 1 and board.occupant[1, 3] == -1
+    assert board.getImage()[1, 3] == 0
+    np.testing.assert_array_equal(board.getImage(), rebuilt_image(board))
+
+
+def test_int2base_larger_boards():
+    n = Hnefatafl().size
+    move = [10, 3, 10, 9]
+    action = move[0] + move[1] * n + move[2] * n ** 2 + move[3] * n ** 3
+    assert int2base(action, n, 4) == move
+    assert int2base(0, n, 4) == [0, 0, 0, 0]
+
+
+def test_valid_actions():
+    for name in ('Brandubh', 'Tablut', 'Hnefatafl'):
+        game = TaflGame(name)
+        n = game.n
+        for board, _, ended in random_positions(game, 1, seed=1):
+            if ended:
+                continue
+            actions = game.getValidActions(board, 1)
+            moves = board.get_legal_moves(board.getPlayerToMove())
+            expected = sorted(x1 + y1 * n + x2 * n ** 2 + y2 * n ** 3 for x1, y1, x2, y2 in moves)
+            assert list(actions) == expected
+            np.testing.assert_array_equal(np.flatnonzero(game.getValidMoves(board, 1)), actions)
+
+
+def make_board(pieces):
+    """A Brandubh board with the given [x, y, type] pieces, white to move."""
+    variant = Brandubh()
+    variant.pieces = pieces
+    return Board(variant)
+
+
+def test_valid_actions_skip_throne():
+    game = TaflGame('Brandubh')
+    n = game.n
+    # the defender on (1,3) slides over the empty throne but cannot stop on it
+    board = make_board([[0, 3, 2], [1, 3, 1], [5, 0, -1]])
+    actions = game.getValidActions(board, 1)
+    row = [x2 for x2 in range(n) if 1 + 3 * n + x2 * n ** 2 + 3 * n ** 3 in actions]
+    column = [y2 for y2 in range(n) if 1 + 3 * n + n ** 2 + y2 * n ** 3 in actions]
+    assert row == [2, 4, 5, 6]
+    assert column == [0, 1, 2, 4, 5, 6]
+
+
+def test_valid_actions_pass_when_blocked():
+    game = TaflGame('Brandubh')
+    # the king on the throne is the only white piece and is walled in
+    board = make_board([[3, 3, 2], [2, 3, -1], [4, 3, -1], [3, 2, -1], [3, 4, -1]])
+    assert list(game.getValidActions(board, 1)) == [game.getActionSize() - 1]
+    assert list(np.flatnonzero(game.getValidMoves(board, 1))) == [game.getActionSize() - 1]
@@ -0,0 +1,111 @@
+"""
+Tests for Arena that do not need a deep learning framework.
+"""
+
+import time
+import unittest
+
+import numpy as np
+
+from Arena import Arena
+from tictactoe.TicTacToeGame import TicTacToeGame
+
+
+class FirstValidPlayer():
+    def __init__(self, game):
+        self.game = game
+
+    def play(self, board):
+        return int(np.flatnonzero(self.game.getValidMoves(board, 1))[0])
+
+
+class LastValidPlayer(FirstValidPlayer):
+    def play(self, board):
+        return int(np.flatnonzero(self.game.getValidMoves(board, 1))[-1])
+
+
+class SlowStartPlayer(FirstValidPlayer):
+    """Takes long over the first move, so that the games it starts finish last."""
+
+    def play(self, board):
+        if not np.any(board):
+            time.sleep(0.2)
+        return super().play(board)
+
+
+# player factories have to be picklable, so they are defined at module level
+def firstValidFactory(game):
+    return FirstValidPlayer(game).play
+
+
+def lastValidFactory(game):
+    return LastValidPlayer(game).play
+
+
+def slowStartFactory(game):
+    return SlowStartPlayer(game).play
+
+
+class ScriptedArena(Arena):
+    """Returns the given results, from the point of view of player1, in order."""
+
+    def __init__(self, results):
+        super().__init__(None, None, None)
+        self.results = iter(results)
+
+    def playOrderedGame(self, swapped, verbose=False):
+        return next(self.results)
+
+
+class TestArena(unittest.TestCase):
+
+    def test_parallel_matches_serial(self):
+        game = TicTacToeGame()
+        serial = Arena(firstValidFactory(game), lastValidFactory(game), game).playGames(6)
+        parallel = Arena(firstValidFactory, lastValidFactory, game, numWorkers=2).playGames(6)
+        self.assertEqual(sum(serial), 6)
+        self.assertEqual(serial, parallel)
+        # both players win the games they start
+        self.assertEqual(parallel, (3, 3, 0))
+
+    def test_gated_stops_when_certain(self):
+        # player2 wins 6 of the first 6 games: 6/10 >= 0.6 whatever happens next
+        oneWon, twoWon, draws, played = ScriptedArena([-1] * 10).playGamesGated(10, 0.6)
+        self.assertEqual((oneWon, twoWon, draws, played), (0, 6, 0, 6))
+        # player1 wins 5 of the first 5 games: at most 5/10 < 0.6
+        self.assertEqual(ScriptedArena([1] * 10).playGamesGated(10, 0.6), (5, 0, 0, 5))
+        # draws do not count, so nothing is certain until the end
+        self.assertEqual(ScriptedArena([1e-4] * 9 + [-1]).playGamesGated(10, 0.6), (0, 1, 9, 10))
+
+    def test_gated_plays_all_games_when_close(self):
+        results = [1, -1] * 20
+        self.assertEqual(ScriptedArena(results).playGamesGated(40, 0.5)[3], 40)
+        self.assertEqual(ScriptedArena(results).playGamesGated(40, 0.5, sprt=(0.1, 0.05, 0.05))[3], 40)
+
+    def test_gated_sprt(self):
+        oneWon, twoWon, draws, played = ScriptedArena([-1] * 100).playGamesGated(100, 0.6, sprt=(0.1, 0.05, 0.05))
+        # log(19) / log(0.7 / 0.5) is about 8.75 wins
+        self.assertEqual((oneWon, twoWon, played), (0, 9, 9))
+        oneWon, twoWon, draws, played = ScriptedArena([1] * 100).playGamesGated(100, 0.6, sprt=(0.1, 0.05, 0.05))
+        # log(19) / log(0.5 / 0.3) is about 5.76 losses
+        self.assertEqual((oneWon, twoWon, played), (6, 0, 6))
+
+    def test_gated_parallel(self):
+        game = TicTacToeGame()
+        oneWon, twoWon, draws, played = Arena(firstValidFactory, lastValidFactory, game,
+                                              numWorkers=2).playGamesGated(6, 0.6)
+        self.assertEqual(oneWon + twoWon + draws, played)
+        self.assertLessEqual(played, 6)
+
+    def test_gated_parallel_counts_games_in_order(self):
+        # both players win the games they start, and the games player1 starts
+        # finish last: counting in order of finishing would see player2 win 3
+        # games first and accept, counting in order of scheduling alternates
+        game = TicTacToeGame()
+        oneWon, twoWon, draws, played = Arena(slowStartFactory, lastValidFactory, game,
+                                              numWorkers=3).playGamesGated(8, 0.3)
+        self.assertEqual((oneWon, twoWon, draws, played), (3, 3, 0, 6))
+
+
+if __name__ == '__main__':
+    unittest.main()
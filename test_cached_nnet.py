@@ -0,0 +1,93 @@
+"""
+Tests for CachedNNet with the deterministic stand-in network of test_mcts.py.
+"""
+
+import unittest
+
+import numpy as np
+
+from CachedNNet import CachedNNet
+from Coach import Coach
+from MCTS import MCTS
+from test_coach import CountingNNet, make_args
+from tictactoe.TicTacToeGame import TicTacToeGame
+
+
+class BufferNNet(CountingNNet):
+    """Returns the policies of predict_batch in one output array it reuses."""
+
+    def __init__(self, game):
+        super().__init__(game)
+        self.out = None
+
+    def predict_batch(self, boards):
+        pis, vs = super().predict_batch(boards)
+        if self.out is None or len(self.out) < len(pis):
+            self.out = np.zeros_like(pis)
+        self.out[:len(pis)] = pis
+        return self.out[:len(pis)], vs
+
+
+class TestCachedNNet(unittest.TestCase):
+
+    def setUp(self):
+        self.game = TicTacToeGame()
+        self.boards = [self.game.getInitBoard()]
+        for a in (4, 0, 8):
+            self.boards.append(self.game.getNextState(self.boards[-1], 1, a)[0])
+
+    def test_predict(self):
+        nnet = CountingNNet(self.game)
+        cached = CachedNNet(nnet, self.game, 10)
+        for board in self.boards + self.boards:
+            pi, v = cached.predict(board)
+            expected_pi, expected_v = nnet.predict(board)
+            np.testing.assert_allclose(pi, expected_pi)
+            self.assertAlmostEqual(v, expected_v)
+        self.assertEqual((cached.hits, cached.misses), (4, 4))
+        self.assertEqual(cached.hitRate(), 0.5)
+
+    def test_predict_batch_only_evaluates_misses(self):
+        nnet = CountingNNet(self.game)
+        cached = CachedNNet(nnet, self.game, 10)
+        cached.predict(self.boards[1])
+        pis, vs = cached.predict_batch(self.boards)
+        self.assertEqual(pis.shape, (4, self.game.getActionSize()))
+        self.assertEqual(vs.shape, (4,))
+        self.assertEqual(nnet.boards, 4)
+        expected_pis, expected_vs = nnet.predict_batch(self.boards)
+        np.testing.assert_allclose(pis, expected_pis)
+        np.testing.assert_allclose(vs, expected_vs)
+
+    def test_predict_batch_copies_rows(self):
+        nnet = BufferNNet(self.game)
+        cached = CachedNNet(nnet, self.game, 10)
+        expected_pis, _ = cached.predict_batch(self.boards[:2])
+        cached.predict_batch(self.boards[2:])
+        pis, _ = cached.predict_batch(self.boards[:2])
+        self.assertEqual(cached.hits, 2)
+        np.testing.assert_allclose(pis, expected_pis)
+
+    def test_lru_and_invalidation(self):
+        cached = CachedNNet(CountingNNet(self.game), self.game, 2)
+        for board in self.boards[:3]:
+            cached.predict(board)
+        self.assertEqual(len(cached.cache), 2)
+        cached.predict(self.boards[0])
+        self.assertEqual(cached.hits, 0)
+        cached.train([])
+        self.assertEqual(len(cached.cache), 0)
+        cached.predict(self.boards[0])
+        cached.load_checkpoint('folder', 'filename')
+        self.assertEqual(len(cached.cache), 0)
+
+    def test_coach_shares_cache_across_episodes(self):
+        coach = Coach(self.game, CountingNNet(self.game), make_args(nnetCacheSize=1000))
+        for _ in range(2):
+            coach.mcts = MCTS(self.game, coach.nnet, coach.args)  # reset search tree, as in learn
+            coach.executeEpisode()
+        self.assertGreater(coach.nnet.hitRate(), 0.)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+"""
+Tests for the self-play drivers in Coach that do not need a deep learning
+framework (see test_mcts.py for the stand-in network).
+"""
+
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from Coach import Coach
+from MCTS import MCTS
+from othello.OthelloGame import OthelloGame
+from test_mcts import DeterministicNNet
+from tictactoe.TicTacToeGame import TicTacToeGame
+from utils import *
+
+
+class CountingNNet(DeterministicNNet):
+    """Counts how often and with how many boards the network is called."""
+
+    def __init__(self, game):
+        super().__init__(game)
+        self.calls = 0
+        self.boards = 0
+
+    def predict(self, board):
+        self.calls += 1
+        self.boards += 1
+        return super().predict(board)
+
+    def predict_batch(self, boards):
+        self.calls += 1
+        self.boards += len(boards)
+        pis, vs = zip(*[super(CountingNNet, self).predict(board) for board in boards])
+        return np.array(pis), np.array(vs)
+
+
+def make_args(**extra):
+    return dotdict({'numMCTSSims': 15, 'cpuct': 1.0, 'tempThreshold': 4, 'treeBackend': 'array', **extra})
+
+
+class TestCoach(unittest.TestCase):
+
+    def check_examples(self, game, examples):
+        self.assertGreater(len(examples), 0)
+        for board, pi, v in examples:
+            self.assertEqual(np.shape(board), game.getBoardSize())
+            self.assertEqual(len(pi), game.getActionSize())
+            self.assertAlmostEqual(sum(pi), 1.0)
+            self.assertIn(v, (-1, 1) if abs(v) >= 1 else (v,))
+
+    def test_lockstep_self_play(self):
+        game = TicTacToeGame()
+        nnet = CountingNNet(game)
+        coach = Coach(game, nnet, make_args(lockstepGames=4))
+        examples = coach.executeEpisodesLockstep(6)
+        self.check_examples(game, examples)
+        # every game contributes 8 symmetries per move, at least 5 moves per game
+        self.assertGreaterEqual(len(examples), 6 * 5 * 8)
+        self.assertLess(nnet.calls, nnet.boards)
+
+    def test_lockstep_batches_leaves(self):
+        game = TicTacToeGame()
+        nnet = CountingNNet(game)
+        coach = Coach(game, nnet, make_args(lockstepGames=4, mctsBatchSize=4))
+        self.check_examples(game, coach.executeEpisodesLockstep(4))
+        self.assertGreater(nnet.boards / nnet.calls, 4)
+
+    def test_lockstep_reuses_tree(self):
+        game = TicTacToeGame()
+        boards = []
+        for reuseTree in (False, True):
+            np.random.seed(0)
+            nnet = CountingNNet(game)
+            coach = Coach(game, nnet, make_args(lockstepGames=2, reuseTree=reuseTree))
+            self.check_examples(game, coach.executeEpisodesLockstep(2))
+            boards.append(nnet.boards)
+        self.assertLess(boards[1], boards[0])
+
+    def test_lockstep_limits_tree(self):
+        game = TicTacToeGame()
+        sizes = []
+        limitTree = MCTS.limitTree
+
+        def recordingLimitTree(mcts):
+            limitTree(mcts)
+            sizes.append(len(mcts.tree))
+
+        coach = Coach(game, CountingNNet(game), make_args(lockstepGames=2, maxTreeNodes=10))
+        with mock.patch.object(MCTS, 'limitTree', recordingLimitTree):
+            self.check_examples(game, coach.executeEpisodesLockstep(2))
+        self.assertGreaterEqual(len(sizes), 2 * 5)
+        self.assertLessEqual(max(sizes), 10)
+
+    def test_examples_hold_plain_boards(self):
+        # Othello boards are HashedBoards, the examples must not keep their keys
+        game = OthelloGame(4)
+        coach = Coach(game, CountingNNet(game), make_args(lockstepGames=2))
+        for examples in (coach.executeEpisode(), coach.executeEpisodesLockstep(2)):
+            self.check_examples(game, examples)
+            for board, _, _ in examples:
+                self.assertIs(type(board), np.ndarray)
+
+    def test_parallel_self_play_is_deterministic(self):
+        game = TicTacToeGame()
+        args = make_args(selfPlayWorkers=2, seed=7, checkpoint=tempfile.mkdtemp())
+        runs = [Coach(game, DeterministicNNet(game), args).executeEpisodesParallel(3, 1) for _ in range(2)]
+        self.check_examples(game, runs[0])
+        self.assertEqual(len(runs[0]), len(runs[1]))
+        for (board1, pi1, v1), (board2, pi2, v2) in zip(*runs):
+            np.testing.assert_array_equal(board1, board2)
+            np.testing.assert_allclose(pi1, pi2)
+            self.assertEqual(v1, v2)
+
+    def test_lockstep_requires_array_backend(self):
+        game = TicTacToeGame()
+        with self.assertRaises(ValueError):
+            Coach(game, CountingNNet(game), make_args(lockstepGames=4, treeBackend='dict'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+"""
+Tests for KerasPredictor on a small two-headed network like those of the
+Keras NNetWrappers. Skipped when TensorFlow is not installed.
+"""
+
+import unittest
+
+import numpy as np
+
+try:
+    import tensorflow as tf
+except ImportError:
+    tf = None
+
+
+def make_model():
+    from tensorflow.keras.layers import BatchNormalization, Dense, Flatten, Input
+    from tensorflow.keras.models import Model
+
+    boards = Input(shape=(3, 3))
+    hidden = BatchNormalization()(Dense(16, activation='relu')(Flatten()(boards)))
+    pi = Dense(10, activation='softmax', name='pi')(hidden)
+    v = Dense(1, activation='tanh', name='v')(hidden)
+    return Model(inputs=boards, outputs=[pi, v])
+
+
+@unittest.skipUnless(tf, 'requires tensorflow')
+class TestKerasPredictor(unittest.TestCase):
+
+    def setUp(self):
+        from KerasPredictor import KerasPredictor
+        tf.random.set_seed(0)
+        self.model = make_model()
+        self.predictor = KerasPredictor(self.model)
+        self.boards = np.random.RandomState(0).randint(-1, 2, size=(5, 3, 3))
+
+    def assert_matches_predict(self, boards):
+        pis, vs = self.predictor(boards)
+        expected_pis, expected_vs = self.model.predict(boards, verbose=False)
+        np.testing.assert_allclose(pis, expected_pis, rtol=1e-5, atol=1e-6)
+        np.testing.assert_allclose(vs, expected_vs, rtol=1e-5, atol=1e-6)
+
+    def test_matches_predict(self):
+        self.assert_matches_predict(self.boards)
+        self.assert_matches_predict(self.boards[:1])
+
+    def test_traced_once_for_all_batch_sizes(self):
+        for size in (1, 3, 5, 1):
+            pis, vs = self.predictor(self.boards[:size])
+            self.assertEqual(pis.shape, (size, 10))
+            self.assertEqual(vs.shape, (size, 1))
+        self.assertEqual(self.predictor.forward.experimental_get_tracing_count(), 1)
+
+    def test_follows_new_weights(self):
+        self.predictor(self.boards)
+        self.model.set_weights([w + 0.5 for w in self.model.get_weights()])
+        self.assert_matches_predict(self.boards)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,333 @@
+"""
+Tests for MCTS that do not need a deep learning framework. The neural network
+is replaced by a deterministic function of the board, so searches with the
+same arguments must produce exactly the same statistics.
+"""
+
+import math
+import sys
+import traceback
+import unittest
+import zlib
+
+import numpy as np
+
+from MCTS import MCTS
+from NeuralNet import NeuralNet
+from SearchTree import EPS, ArrayTree, DictTree
+from othello.OthelloGame import OthelloGame
+from tictactoe.TicTacToeGame import TicTacToeGame
+from utils import *
+
+
+class DeterministicNNet(NeuralNet):
+    """A stand-in for a trained network whose outputs only depend on the board."""
+
+    def __init__(self, game):
+        self.action_size = game.getActionSize()
+
+    def predict(self, board):
+        seed = zlib.crc32(board.tobytes())
+        rng = np.random.RandomState(seed)
+        pi = rng.dirichlet(np.ones(self.action_size))
+        v = rng.uniform(-1, 1)
+        return pi, v
+
+
+class ChainGame():
+    """A game with a single action per turn that ends in a draw after length moves."""
+
+    def __init__(self, length):
+        self.length = length
+
+    def getInitBoard(self):
+        return np.zeros(1, dtype=np.int64)
+
+    def getActionSize(self):
+        return 1
+
+    def getNextState(self, board, player, action):
+        return board + 1, -player
+
+    def getValidMoves(self, board, player):
+        return np.ones(1)
+
+    def getGameEnded(self, board, player):
+        return 1e-4 if board[0] >= self.length else 0
+
+    def getCanonicalForm(self, board, player):
+        return board
+
+    def stringRepresentation(self, board):
+        return board.tobytes()
+
+
+class RecursiveMCTS(MCTS):
+    """The recursive search that MCTS.search replaced, kept as a reference."""
+
+    def search(self, canonicalBoard):
+        s = self.game.stringRepresentation(canonicalBoard)
+        node = self.tree.getNode(s)
+        if node is None:
+            node = self.tree.addNode(s, self.game.getGameEnded(canonicalBoard, 1))
+        ended = self.tree.getEnded(node)
+        if ended != 0:
+            return -ended
+        if not self.tree.isExpanded(node):
+            ps, v = self.nnet.predict(canonicalBoard)
+            self.expand(node, canonicalBoard, ps)
+            return -float(np.squeeze(v))
+        a = self.tree.selectAction(node, self.args.cpuct)
+        next_s, next_player = self.game.getNextState(canonicalBoard, 1, a)
+        v = self.search(self.game.getCanonicalForm(next_s, next_player))
+        self.tree.update(node, a, v)
+        return -v
+
+
+class TestMCTS(unittest.TestCase):
+
+    @staticmethod
+    def play_moves(game, mcts, num_moves):
+        board = game.getInitBoard()
+        player = 1
+        all_probs = []
+        for _ in range(num_moves):
+            if game.getGameEnded(board, player) != 0:
+                break
+            canonical = game.getCanonicalForm(board, player)
+            probs = mcts.getActionProb(canonical, temp=1)
+            all_probs.append(probs)
+            board, player = game.getNextState(board, player, int(np.argmax(probs)))
+        return all_probs
+
+    def assert_backends_agree(self, game, num_moves, **extra_args):
+        results = []
+        for backend in ('dict', 'array'):
+            args = dotdict({'numMCTSSims': 30, 'cpuct': 1.0, 'treeBackend': backend, **extra_args})
+            mcts = MCTS(game, DeterministicNNet(game), args)
+            results.append(self.play_moves(game, mcts, num_moves))
+        self.assertEqual(len(results[0]), len(results[1]))
+        for probs_dict, probs_array in zip(*results):
+            np.testing.assert_allclose(probs_dict, probs_array)
+
+    def test_backends_agree_othello(self):
+        self.assert_backends_agree(OthelloGame(6), 10)
+
+    def test_backends_agree_tictactoe(self):
+        self.assert_backends_agree(TicTacToeGame(), 9)
+
+    @staticmethod
+    def select_action_loop(actions, ps, Qsa, Nsa, Ns, cpuct):
+        # the original per-action loop, with the edge statistics in dicts
+        cur_best, best_act = -float('inf'), -1
+        for a in actions:
+            if a in Qsa:
+                u = Qsa[a] + cpuct * ps[a] * math.sqrt(Ns) / (1 + Nsa[a])
+            else:
+                u = cpuct * ps[a] * math.sqrt(Ns + EPS)
+            if u > cur_best:
+                cur_best, best_act = u, a
+        return best_act
+
+    def test_select_action_matches_loop(self):
+        rng = np.random.RandomState(0)
+        actionSize = 50
+        valids = (rng.rand(actionSize) < 0.3).astype(int)
+        actions = np.flatnonzero(valids)
+        for ps in (valids / valids.sum(), rng.dirichlet(np.ones(actionSize)) * valids):
+            for tree in (DictTree(actionSize), ArrayTree(actionSize)):
+                node = tree.addNode(b's', 0)
+                tree.expand(node, ps, actions)
+                Qsa, Nsa, Ns = {}, {}, 0
+                # uniform priors with no visits are a tie: both pick the first valid action
+                for _ in range(100):
+                    a = tree.selectAction(node, 1.0)
+                    self.assertEqual(a, self.select_action_loop(actions.tolist(), ps, Qsa, Nsa, Ns, 1.0))
+                    v = rng.choice([-1., 0., 1.])
+                    tree.update(node, a, v)
+                    Qsa[a] = (Nsa.get(a, 0) * Qsa.get(a, 0) + v) / (Nsa.get(a, 0) + 1)
+                    Nsa[a] = Nsa.get(a, 0) + 1
+                    Ns += 1
+                np.testing.assert_array_equal(tree.getCounts(b's'), [Nsa.get(a, 0) for a in range(actionSize)])
+
+    def test_select_action_tie_breaks(self):
+        ps = np.array([0., .25, .25, 0., .25, .25])
+        for tree in (DictTree(6), ArrayTree(6)):
+            node = tree.addNode(b's', 0)
+            tree.expand(node, ps, np.array([1, 2, 4, 5]))
+            # no visits: all equal, the lowest valid action wins
+            self.assertEqual(tree.selectAction(node, 1.0), 1)
+            # a lost visit drops action 1 below the unvisited ones
+            tree.update(node, 1, -1.)
+            self.assertEqual(tree.selectAction(node, 1.0), 2)
+            # draws keep Q = 0 but the visits shrink the bonus, so the
+            # unvisited action 5 wins; once 2, 4 and 5 are visited once they
+            # tie again and the lowest one wins
+            tree.update(node, 2, 0.)
+            tree.update(node, 4, 0.)
+            self.assertEqual(tree.selectAction(node, 1.0), 5)
+            tree.update(node, 5, 0.)
+            self.assertEqual(tree.selectAction(node, 1.0), 2)
+
+    def test_batched_search(self):
+        game = OthelloGame(6)
+        args = dotdict({'numMCTSSims': 100, 'cpuct': 1.0, 'treeBackend': 'array',
+                        'mctsBatchSize': 8, 'virtualLoss': 1.0})
+        mcts = MCTS(game, DeterministicNNet(game), args)
+        board = game.getInitBoard()
+        probs = mcts.getActionProb(board, temp=1)
+        self.assertAlmostEqual(sum(probs), 1.0)
+        self.assertEqual(mcts.tree.pending, {})
+
+        # every simulation but the one expanding the root went through a root edge
+        root = mcts.tree.getNode(game.stringRepresentation(board))
+        self.assertEqual(mcts.tree.Nsa[root].sum(), mcts.tree.Ns[root])
+        self.assertEqual(mcts.tree.Ns[root], 99)
+
+    def test_batched_search_requires_array_backend(self):
+        game = TicTacToeGame()
+        args = dotdict({'numMCTSSims': 10, 'cpuct': 1.0, 'mctsBatchSize': 4})
+        with self.assertRaises(ValueError):
+            MCTS(game, DeterministicNNet(game), args)
+
+    def test_predict_batch_default(self):
+        game = TicTacToeGame()
+        nnet = DeterministicNNet(game)
+        boards = [game.getInitBoard(), game.getNextState(game.getInitBoard(), 1, 4)[0]]
+        pis, vs = nnet.predict_batch(boards)
+        self.assertEqual(pis.shape, (2, game.getActionSize()))
+        self.assertEqual(vs.shape, (2,))
+        for board, pi, v in zip(boards, pis, vs):
+            expected_pi, expected_v = nnet.predict(board)
+            np.testing.assert_allclose(pi, expected_pi)
+            self.assertAlmostEqual(v, expected_v)
+
+    def test_unknown_backend(self):
+        game = TicTacToeGame()
+        args = dotdict({'numMCTSSims': 1, 'cpuct': 1.0, 'treeBackend': 'nope'})
+        with self.assertRaises(ValueError):
+            MCTS(game, DeterministicNNet(game), args)
+
+    def test_array_tree_grows(self):
+        game = OthelloGame(6)
+        args = dotdict({'numMCTSSims': 200, 'cpuct': 1.0, 'treeBackend': 'array'})
+        mcts = MCTS(game, DeterministicNNet(game), args)
+        probs = mcts.getActionProb(game.getInitBoard(), temp=1)
+        self.assertGreater(len(mcts.tree), 64)
+        self.assertAlmostEqual(sum(probs), 1.0)
+
+    @staticmethod
+    def replay_reachable(game, tree, board):
+        # the nodes reachable from board through visited edges, found by
+        # replaying the moves like advanceRoot did before it recorded children
+        reachable = set()
+        stack = [board]
+        while stack:
+            board = stack.pop()
+            s = game.stringRepresentation(board)
+            if s in reachable or tree.getNode(s) is None:
+                continue
+            reachable.add(s)
+            for a in np.flatnonzero(tree.getCounts(s)):
+                nextBoard, nextPlayer = game.getNextState(board, 1, a)
+                stack.append(game.getCanonicalForm(nextBoard, nextPlayer))
+        return reachable
+
+    def test_advance_root(self):
+        game = TicTacToeGame()
+        for backend in ('dict', 'array'):
+            args = dotdict({'numMCTSSims': 200, 'cpuct': 1.0, 'treeBackend': backend})
+            mcts = MCTS(game, DeterministicNNet(game), args)
+            board = game.getInitBoard()
+            mcts.getActionProb(board, temp=1)
+            size = len(mcts.tree)
+
+            nextBoard, nextPlayer = game.getNextState(board, 1, 4)
+            child = game.getCanonicalForm(nextBoard, nextPlayer)
+            counts = np.array(mcts.tree.getCounts(game.stringRepresentation(child)))
+            expected = self.replay_reachable(game, mcts.tree, child)
+            getNextState, game.getNextState = game.getNextState, None
+            try:
+                visits = mcts.advanceRoot(child)
+            finally:
+                game.getNextState = getNextState
+            self.assertEqual(len(mcts.tree), len(expected))
+            self.assertTrue(all(mcts.tree.getNode(s) is not None for s in expected))
+            self.assertGreater(visits, 1)
+            self.assertEqual(visits, counts.sum() + 1)
+            self.assertLess(len(mcts.tree), size)
+            self.assertIsNone(mcts.tree.getNode(game.stringRepresentation(board)))
+            np.testing.assert_array_equal(mcts.tree.getCounts(game.stringRepresentation(child)), counts)
+
+    def test_reuse_tree_tops_up(self):
+        game = OthelloGame(6)
+        results = []
+        for backend, batchSize in (('dict', 1), ('array', 1), ('array', 4)):
+            args = dotdict({'numMCTSSims': 50, 'cpuct': 1.0, 'treeBackend': backend,
+                            'mctsBatchSize': batchSize, 'reuseTree': True})
+            mcts = MCTS(game, DeterministicNNet(game), args)
+            board, player = game.getInitBoard(), 1
+            for _ in range(4):
+                canonical = game.getCanonicalForm(board, player)
+                probs = mcts.getActionProb(canonical, temp=1)
+                node = mcts.tree.getNode(game.stringRepresentation(canonical))
+                self.assertEqual(mcts.tree.getVisits(node), 50)
+                board, player = game.getNextState(board, player, int(np.argmax(probs)))
+            results.append(len(mcts.tree))
+        self.assertEqual(results[0], results[1])
+
+    def test_bounded_tree(self):
+        game = OthelloGame(6)
+        for backend in ('dict', 'array'):
+            for policy in ('lru', 'generation'):
+                args = dotdict({'numMCTSSims': 40, 'cpuct': 1.0, 'treeBackend': backend,
+                                'maxTreeNodes': 60, 'treeEviction': policy})
+                mcts = MCTS(game, DeterministicNNet(game), args)
+                probs = self.play_moves(game, mcts, 6)
+                self.assertEqual(len(probs), 6)
+                self.assertLessEqual(len(mcts.tree), 60)
+                self.assertGreater(mcts.tree.evicted, 0)
+
+    def test_evict_lru(self):
+        for tree in (DictTree(4), ArrayTree(4)):
+            nodes = [tree.addNode(s, 0) for s in (b'a', b'b', b'c')]
+            for node in nodes:
+                tree.expand(node, np.ones(4) / 4, np.arange(4))
+            tree.generation = 1
+            tree.update(nodes[0], 0, 1.)
+            tree.evict(1, 'lru')
+            self.assertIsNone(tree.getNode(b'b'))
+            tree.evict(1, 'generation')
+            self.assertIsNone(tree.getNode(b'a'))
+            self.assertEqual(len(tree), 1)
+            self.assertEqual(tree.evicted, 2)
+            # a new node takes over a freed row with clean statistics
+            node = tree.addNode(b'd', 0)
+            tree.expand(node, np.ones(4) / 4, np.arange(4))
+            self.assertEqual(list(tree.getCounts(b'd')), [0] * 4)
+            self.assertEqual(tree.getVisits(node), 1)
+
+    def test_search_matches_recursive(self):
+        for game in (TicTacToeGame(), OthelloGame(6)):
+            for backend in ('dict', 'array'):
+                args = dotdict({'numMCTSSims': 40, 'cpuct': 1.0, 'treeBackend': backend})
+                results = [self.play_moves(game, cls(game, DeterministicNNet(game), args), 6)
+                           for cls in (RecursiveMCTS, MCTS)]
+                np.testing.assert_array_equal(results[0], results[1])
+
+    def test_search_deeper_than_recursion_limit(self):
+        game = ChainGame(100)
+        args = dotdict({'numMCTSSims': 101, 'cpuct': 1.0, 'treeBackend': 'array'})
+        mcts = MCTS(game, DeterministicNNet(game), args)
+        limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(len(traceback.extract_stack()) + 50)
+        try:
+            mcts.getActionProb(game.getInitBoard())
+        finally:
+            sys.setrecursionlimit(limit)
+        self.assertEqual(len(mcts.tree), 101)
+        self.assertEqual(mcts.tree.Ns[mcts.tree.getNode(game.getInitBoard().tobytes())], 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+"""
+Tests for exporting the PyTorch networks with TorchExport. Skipped when
+PyTorch is not installed; the ONNX tests also need onnx and onnxruntime.
+"""
+
+import importlib.util
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from othello.OthelloGame import OthelloGame
+from tafl.TaflGame import TaflGame
+
+HAS_TORCH = importlib.util.find_spec('torch') is not None
+HAS_ONNX = HAS_TORCH and all(importlib.util.find_spec(m) is not None for m in ('onnx', 'onnxruntime'))
+
+
+@unittest.skipUnless(HAS_TORCH, 'requires torch')
+class TestTorchExport(unittest.TestCase):
+
+    def setUp(self):
+        from othello.pytorch import NNet
+        self.game = OthelloGame(6)
+        self.nnet = self.make_nnet(self.game, NNet)
+        board = self.game.getInitBoard()
+        self.boards = [board, -board, self.game.getNextState(board, 1, 8)[0]]
+        self.folder = tempfile.mkdtemp()
+
+    def make_nnet(self, game, module, quantize=False):
+        """Returns an NNetWrapper with few channels and random batch norm statistics."""
+        import torch
+        torch.manual_seed(0)
+        # the network reads its channels from the args of module in forward
+        patcher = mock.patch.dict(module.args, {'num_channels': 16, 'cuda': False, 'quantize': quantize})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        nnet = module.NNetWrapper(game)
+        with torch.no_grad():
+            for layer in nnet.nnet.modules():
+                if isinstance(layer, torch.nn.modules.batchnorm._BatchNorm):
+                    layer.running_mean.uniform_(-0.5, 0.5)
+                    layer.running_var.uniform_(0.5, 2.0)
+                    layer.weight.uniform_(0.5, 1.5)
+                    layer.bias.uniform_(-0.2, 0.2)
+        nnet.update_inference_nnet()
+        return nnet
+
+    def check_exported(self, exported, nnet, boards):
+        pis, vs = nnet.predict_batch(boards)
+        exported_pis, exported_vs = exported.predict_batch(boards)
+        np.testing.assert_allclose(exported_pis, pis, rtol=1e-4, atol=1e-6)
+        np.testing.assert_allclose(exported_vs, vs, rtol=1e-4, atol=1e-6)
+        pi, v = exported.predict(boards[-1])
+        np.testing.assert_allclose(pi, pis[-1], rtol=1e-4, atol=1e-6)
+        self.assertEqual(v.shape, (1,))
+
+    def test_fold_batch_norm(self):
+        import torch
+        from TorchExport import InferenceNet
+        model = InferenceNet(self.nnet.nnet)
+        self.assertFalse(any(isinstance(layer, torch.nn.modules.batchnorm._BatchNorm) for layer in model.modules()))
+        with torch.no_grad():
+            pis, vs = model(torch.FloatTensor(np.array(self.boards)))
+        expected_pis, expected_vs = self.nnet.predict_batch(self.boards)
+        np.testing.assert_allclose(pis.numpy(), expected_pis, rtol=1e-4, atol=1e-6)
+        np.testing.assert_allclose(vs.numpy()[:, 0], expected_vs, rtol=1e-4, atol=1e-6)
+
+    def test_torchscript(self):
+        from TorchExport import ExportedNNet, export
+        scriptPath, _ = export(self.nnet, os.path.join(self.folder, 'othello'))
+        self.check_exported(ExportedNNet(self.game, scriptPath), self.nnet, self.boards)
+
+    @unittest.skipUnless(HAS_ONNX, 'requires onnx and onnxruntime')
+    def test_onnx(self):
+        from TorchExport import ExportedNNet, export
+        _, onnxPath = export(self.nnet, os.path.join(self.folder, 'othello'))
+        exported = ExportedNNet(self.game)
+        exported.load_checkpoint(self.folder, 'othello.onnx')
+        self.check_exported(exported, self.nnet, self.boards)
+
+    @unittest.skipUnless(HAS_ONNX, 'requires onnx and onnxruntime')
+    def test_onnx_tafl(self):
+        from tafl.pytorch import NNet
+        from TorchExport import ExportedNNet, export
+        game = TaflGame('Brandubh')
+        nnet = self.make_nnet(game, NNet)
+        board = game.getInitBoard()
+        boards = [game.getCanonicalForm(board, 1), game.getCanonicalForm(board, -1)]
+        _, onnxPath = export(nnet, os.path.join(self.folder, 'tafl'))
+        self.check_exported(ExportedNNet(game, onnxPath), nnet, boards)
+
+    def test_quantize(self):
+        import torch
+        from TorchExport import quantize
+        model = quantize(self.nnet.nnet)
+        self.assertFalse(any(type(layer) in (torch.nn.Conv2d, torch.nn.Linear) for layer in model.modules()))
+        with torch.no_grad():
+            log_pis, vs = model(torch.FloatTensor(np.array(self.boards)))
+        expected_pis, expected_vs = self.nnet.predict_batch(self.boards)
+        np.testing.assert_allclose(torch.exp(log_pis).numpy(), expected_pis, atol=0.02)
+        np.testing.assert_allclose(vs.numpy()[:, 0], expected_vs, atol=0.05)
+
+    def test_quantize_is_kept_per_wrapper(self):
+        from othello.pytorch import NNet
+        quantized = self.make_nnet(self.game, NNet, quantize=True)
+        # args.quantize is True now, the float wrapper made before stays float
+        self.nnet.update_inference_nnet()
+        self.assertIs(self.nnet.inference_nnet, self.nnet.nnet)
+        self.assertIsNot(quantized.inference_nnet, quantized.nnet)
+
+    def test_quantized_wrapper_follows_weights(self):
+        from othello.pytorch import NNet
+        quantized = self.make_nnet(self.game, NNet, quantize=True)
+        self.assertIsNot(quantized.inference_nnet, quantized.nnet)
+        # a checkpoint of different weights replaces the quantized copy
+        import torch
+        with torch.no_grad():
+            self.nnet.nnet.fc4.bias += 1
+        self.nnet.save_checkpoint(self.folder, 'othello.pth.tar')
+        _, old_vs = quantized.predict_batch(self.boards)
+        quantized.load_checkpoint(self.folder, 'othello.pth.tar')
+        pis, vs = quantized.predict_batch(self.boards)
+        self.assertGreater(np.abs(vs - old_vs).min(), 0.1)
+        expected_pis, expected_vs = self.nnet.predict_batch(self.boards)
+        np.testing.assert_allclose(pis, expected_pis, atol=0.02)
+        np.testing.assert_allclose(vs, expected_vs, atol=0.05)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,31 @@
+"""
+Helpers shared by the tests of the games, which import them as
+    from test_utils import random_positions
+when pytest runs from the repository root.
+"""
+
+import numpy as np
+
+
+def random_positions(game, num_games, seed=0, max_moves=None):
+    """
+    Plays num_games games of uniformly random valid moves and yields every
+    position reached as (board, player, ended), where ended is
+    game.getGameEnded(board, player). The last position of each game is the
+    first one with ended != 0 or without valid moves, or the one after
+    max_moves moves.
+    """
+    rng = np.random.RandomState(seed)
+    for _ in range(num_games):
+        board, player = game.getInitBoard(), 1
+        moves = 0
+        while True:
+            ended = game.getGameEnded(board, player)
+            yield board, player, ended
+            if ended != 0 or moves == max_moves:
+                break
+            valids = game.getValidMoves(board, player)
+            if not valids.any():
+                break
+            board, player = game.getNextState(board, player, rng.choice(np.flatnonzero(valids)))
+            moves += 1
@@ -0,0 +1,94 @@
+"""
+Tests that the Zobrist keys games update in getNextState agree with keys
+computed from scratch and identify boards exactly like stringRepresentation.
+"""
+
+import unittest
+
+import numpy as np
+
+from MCTS import MCTS
+from connect4.Connect4Game import Connect4Game
+from gobang.GobangGame import GobangGame
+from othello.OthelloGame import OthelloGame
+from tafl.TaflGame import TaflGame
+from test_mcts import DeterministicNNet
+from utils import *
+
+
+def fullHash(game, board):
+    """The key of board computed without the keys carried along by the moves."""
+    if isinstance(board, np.ndarray):
+        return game.getHash(np.array(board))
+    board = board.getCopy()
+    board.zobrist = None
+    return game.getHash(board)
+
+
+class TestZobrist(unittest.TestCase):
+
+    def check_game(self, game, numGames=5, maxMoves=40):
+        rng = np.random.RandomState(0)
+        keys = {}
+        for _ in range(numGames):
+            # follow boards the way MCTS does: always from the canonical form
+            board = game.getCanonicalForm(game.getInitBoard(), 1)
+            game.getHash(board)
+            for _ in range(maxMoves):
+                if game.getGameEnded(board, 1) != 0:
+                    break
+                # the keys were carried over from the previous board
+                self.assertIsNotNone(board.zobrist)
+                key = game.getHash(board)
+                self.assertEqual(key, fullHash(game, board))
+                s = game.stringRepresentation(board)
+                self.assertEqual(keys.setdefault(s, key), key)
+
+                action = rng.choice(np.flatnonzero(game.getValidMoves(board, 1)))
+                nextBoard, nextPlayer = game.getNextState(board, 1, action)
+                board = game.getCanonicalForm(nextBoard, nextPlayer)
+        # different boards got different keys
+        self.assertEqual(len(set(keys.values())), len(keys))
+
+    def test_othello(self):
+        self.check_game(OthelloGame(6))
+
+    def test_gobang(self):
+        self.check_game(GobangGame(7, 4))
+
+    def test_connect4(self):
+        self.check_game(Connect4Game())
+
+    def test_tafl(self):
+        self.check_game(TaflGame('Brandubh'))
+
+    def test_derived_arrays_drop_metadata(self):
+        game = Connect4Game(4, 4, 3, bitboard=True)
+        board, player = game.getNextState(game.getInitBoard(), 1, 0)
+        board = game.getCanonicalForm(board, player)
+        game.getHash(board)
+        board, player = game.getNextState(board, 1, 1)
+        self.assertIsNotNone(board.zobrist)
+        self.assertIsNotNone(board.winner)
+        pi = np.ones(game.getActionSize()) / game.getActionSize()
+        derived = [board[:], board[::-1], board.copy(), board.reshape(-1), board.T, -board, board + 0,
+                   board.view(type(board))] + [b for b, _ in game.getSymmetries(board, pi) if b is not board]
+        for array in derived:
+            self.assertIsNone(getattr(array, 'zobrist', None))
+            self.assertIsNone(getattr(array, 'winner', None))
+
+    def test_mcts_hash_states(self):
+        game = OthelloGame(6)
+        results = []
+        for hashStates in (False, True):
+            args = dotdict({'numMCTSSims': 50, 'cpuct': 1.0, 'treeBackend': 'array', 'hashStates': hashStates})
+            mcts = MCTS(game, DeterministicNNet(game), args)
+            board = game.getCanonicalForm(game.getInitBoard(), 1)
+            results.append(mcts.getActionProb(board, temp=1))
+            if hashStates:
+                self.assertTrue(all(isinstance(key, int) for key in mcts.tree.index))
+        np.testing.assert_array_equal(results[0], results[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
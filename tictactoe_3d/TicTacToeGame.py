@@ -61,11 +61,13 @@ class TicTacToeGame(Game):
         # return 0 if not ended, 1 if player 1 won, -1 if player 1 lost
         # player = 1
         b = Board(self.n)
-        b.pieces = np.copy(board)
+        b.pieces = board
 
-        if b.is_win(player):
+        # one gather over the winning lines for both players
+        sums = b.line_sums()
+        if (sums == player * self.n).any():
             return 1
-        if b.is_win(-player):
+        if (sums == -player * self.n).any():
             return -1
         if b.has_legal_moves():
             return 0
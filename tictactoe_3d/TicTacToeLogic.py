@@ -15,6 +15,31 @@ Date: Jan 5, 2018.
 Based on the board for the game of Othello by Eric P. Nichols.
 
 '''
+# winning lines of the boards of each size, built on first use
+winningLines = {}
+
+
+def getWinningLines(n):
+    """Returns an array with one row per line of n squares on an n x n x n
+    board, holding the flat indices of its squares: the 3n^2 rows and columns
+    along the axes, the 6n diagonals of the planes and the 4 diagonals through
+    the cube.
+    """
+    if n not in winningLines:
+        # one of each pair of opposite directions
+        directions = [d for d in np.ndindex(3, 3, 3) if d > (1, 1, 1)]
+        lines = []
+        for d in directions:
+            d = np.array(d) - 1
+            for start in np.ndindex(n, n, n):
+                end = np.array(start) + (n - 1) * d
+                if ((end >= 0) & (end < n)).all():
+                    cells = np.array(start) + np.outer(np.arange(n), d)
+                    lines.append(np.ravel_multi_index(cells.T, (n, n, n)))
+        winningLines[n] = np.array(lines)
+    return winningLines[n]
+
+
 # from bkcharts.attributes import color
 class Board():
 
@@ -55,188 +80,19 @@ class Board():
         return list(moves)
 
     def has_legal_moves(self):
-        for z in range(self.n):
-            for y in range(self.n):
-                for x in range(self.n):
-                    if self.pieces[z][x][y]==0:
-                        return True
-        return False
-    
+        return bool((self.pieces == 0).any())
+
+    def line_sums(self):
+        """Returns the sum of the pieces on every winning line, see
+        getWinningLines. A line sums to n*color if color holds all of it.
+        """
+        return np.asarray(self.pieces).ravel()[getWinningLines(self.n)].sum(axis=1)
+
     def is_win(self, color):
-        """Check whether the given player has collected a triplet in any direction; 
+        """Check whether the given player has collected a line in any direction;
         @param color (1=white,-1=black)
         """
-        win = self.n
-        # check z-dimension
-        count = 0
-        for z in range(self.n):
-            count = 0
-            for y in range(self.n):
-                count = 0
-                for x in range(self.n):
-                    if self.pieces[z,x,y]==color:
-                        count += 1
-                if count==win:
-                    return True
-
-        count = 0
-        for z in range(self.n):
-            count = 0
-            for x in range(self.n):
-                count = 0
-                for y in range(self.n):
-                    if self.pieces[z,x,y]==color:
-                        count += 1
-                if count==win:
-                    return True
-        
-        # check x dimension
-        count = 0
-        for x in range(self.n):
-            count = 0
-            for z in range(self.n):
-                count = 0
-                for y in range(self.n):
-                    if self.pieces[z,x,y]==color:
-                        count += 1
-                if count==win:
-                    return True
-
-        count = 0
-        for x in range(self.n):
-            count = 0
-            for y in range(self.n):
-                count = 0
-                for z in range(self.n):
-                    if self.pieces[z,x,y]==color:
-                        count += 1
-                if count==win:
-                    return True
-
-        # check y dimension
-        count = 0
-        for y in range(self.n):
-            count = 0
-            for x in range(self.n):
-                count = 0
-                for z in range(self.n):
-                    if self.pieces[z,x,y]==color:
-                        count += 1
-                if count==win:
-                    return True
-        
-        count = 0
-        for y in range(self.n):
-            count = 0
-            for z in range(self.n):
-                count = 0
-                for x in range(self.n):
-                    if self.pieces[z,x,y]==color:
-                        count += 1
-                if count==win:
-                    return True
-        
-        # check flat diagonals
-        # check z dimension
-        count = 0
-        for z in range(self.n):
-            count = 0
-            for d in range(self.n):
-                if self.pieces[z,d,d]==color:
-                    count += 1
-            if count==win:
-                return True
-        
-        count = 0
-        for z in range(self.n):
-            count = 0
-            for d in range(self.n):
-                if self.pieces[z,d,self.n-d-1]==color:
-                    count += 1
-            if count==win:
-                return True
-
-        # check x dimension
-        count = 0
-        for x in range(self.n):
-            count = 0
-            for d in range(self.n):
-                if self.pieces[d,x,d]==color:
-                    count += 1
-            if count==win:
-                return True
-
-        count = 0
-        for x in range(self.n):
-            count = 0
-            for d in range(self.n):
-                if self.pieces[d,x,self.n-d-1]==color:
-                    count += 1
-            if count==win:
-                return True
-
-        # check y dimension
-        count = 0
-        for y in range(self.n):
-            count = 0
-            for d in range(self.n):
-                if self.pieces[d,d,y]==color:
-                    count += 1
-            if count==win:
-                return True
-
-        count = 0
-        for y in range(self.n):
-            count = 0
-            for d in range(self.n):
-                if self.pieces[self.n-d-1,d,y]==color:
-                    count += 1
-            if count==win:
-                return True
-        
-        # check 4 true diagonals
-        count = 0
-        if self.pieces[0,0,0] == color:
-            count += 1
-            if self.pieces[1,1,1] == color:
-                count += 1
-                if self.pieces[2,2,2] == color:
-                    count += 1
-                    if count == win:
-                        return True
-            
-        count = 0
-        if self.pieces[2,0,0] == color:
-            count += 1
-            if self.pieces[1,1,1] == color:
-                count += 1
-                if self.pieces[0,2,2] == color:
-                    count += 1
-                    if count == win:
-                        return True
-        
-        count = 0
-        if self.pieces[2,2,0] == color:
-            count += 1
-            if self.pieces[1,1,1] == color:
-                count += 1
-                if self.pieces[0,0,2] == color:
-                    count += 1
-                    if count == win:
-                        return True
-        
-        count = 0
-        if self.pieces[0,2,0] == color:
-            count += 1
-            if self.pieces[1,1,1] == color:
-                count += 1
-                if self.pieces[2,0,2] == color:
-                    count += 1
-                    if count == win:
-                        return True
-
-        # return false if no 3 is reached
-        return False
+        return bool((self.line_sums() == color * self.n).any())
 
     def execute_move(self, move, color):
         """Perform the given move on the board; 
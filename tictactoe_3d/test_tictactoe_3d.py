@@ -0,0 +1,72 @@
+"""
+To run tests:
+pytest-3 tictactoe_3d
+"""
+
+import itertools
+
+import numpy as np
+
+from test_utils import random_positions
+from .TicTacToeGame import TicTacToeGame
+from .TicTacToeLogic import Board, getWinningLines
+
+
+def reference_lines(n):
+    """Lines whose coordinates are each constant, ascending or descending."""
+    coords = [lambda i, c=c: c for c in range(n)] + [lambda i: i, lambda i: n - 1 - i]
+    lines = set()
+    for fz, fx, fy in itertools.product(coords, repeat=3):
+        line = frozenset((fz(i), fx(i), fy(i)) for i in range(n))
+        if len(line) == n:
+            lines.add(line)
+    return lines
+
+
+def test_winning_lines():
+    for n in (2, 3, 4, 5):
+        lines = {frozenset(zip(*np.unravel_index(line, (n, n, n)))) for line in getWinningLines(n)}
+        assert lines == reference_lines(n)
+        assert len(getWinningLines(n)) == ((n + 2) ** 3 - n ** 3) // 2
+
+
+def test_game_ended():
+    for n in (3, 4):
+        game = TicTacToeGame(n)
+        lines = reference_lines(n)
+        for board, player, ended in random_positions(game, 30, seed=n):
+            won = {color for color in (1, -1) for line in lines if all(board[c] == color for c in line)}
+            if won:
+                assert ended == (1 if player in won else -1)
+            elif ended:
+                assert ended == 1e-4 and not (board == 0).any()
+            else:
+                assert (board == 0).any()
+
+
+def test_space_diagonal():
+    b = Board(4)
+    for d in range(4):
+        b.execute_move((3 - d, d, d), -1)
+    assert b.is_win(-1) and not b.is_win(1)
+
+
+def test_last_move_inside_face_diagonal():
+    game = TicTacToeGame(4)
+    board = game.getInitBoard()
+    for cell in ((2, 0, 0), (2, 2, 2), (2, 3, 3)):
+        board[cell] = 1
+    board[0, 0, 0] = board[1, 0, 0] = board[3, 0, 0] = -1
+    assert game.getGameEnded(board, 1) == 0
+    board, player = game.getNextState(board, 1, np.ravel_multi_index((2, 1, 1), (4, 4, 4)))
+    assert game.getGameEnded(board, player) == -1
+    assert game.getGameEnded(board, -player) == 1
+
+
+def test_consecutive_cells_are_not_a_line():
+    game = TicTacToeGame(4)
+    board = game.getInitBoard()
+    # four consecutive actions that run from the end of one row into the next
+    for action in range(3, 7):
+        board, _ = game.getNextState(board, 1, action)
+    assert game.getGameEnded(board, 1) == 0
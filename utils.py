@@ -19,4 +19,8 @@ class AverageMeter(object):
 
 class dotdict(dict):
     def __getattr__(self, name):
-        return self[name]
+        try:
+            return self[name]
+        except KeyError:
+            # raise AttributeError so getattr(args, name, default) works for optional args
+            raise AttributeError(name)